@@ -1,18 +1,46 @@
-from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import FastAPI, Header
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-import pandas as pd
+from pydantic import BaseModel, Field, model_validator
+from contextlib import asynccontextmanager
+import anyio
+import asyncio
 import numpy as np
-import lightgbm as lgb
-import pickle
-import calendar
+import hmac
 import os
 import sys
-from pathlib import Path
+import time
+from typing import List
 
-app = FastAPI(title="Coal Demand Forecasting")
+from coal_stock_store import SOURCE_COLUMNS, CoalStockStore, format_period
+from forecast_cache import ForecastCache, MemoryBackend, SQLiteBackend
+from forecast_export import EXPORT_FORMATS, make_encoder
+from gem_units import load_unit_index
+from instrumentation import NULL_TIMER, MetricsRegistry, RequestProfiler
+from model_registry import ModelBundle, ModelRegistry
+import plant_forecast
+from plant_forecast import (MAX_ROLLOUT_MONTHS, build_base_features, calculate_coal_requirement_batch,
+                            calculate_electricity_generation_batch, days_in_month, fleet_arrays,
+                            get_capacity_band_batch)
+from request_batcher import RequestBatcher
+from startup_artifact import QUANTILE_ALPHAS, load_startup_state
+from stock_planner import DEFAULT_TARGET_DAYS, MAX_STALE_MONTHS, criticality_order, plan_stock
+from uncertainty import QUANTILES, ResidualDistribution, coal_quantiles
+
+@asynccontextmanager
+async def lifespan(app):
+    initialize()
+    watchers = []
+    if MODEL_WATCH_INTERVAL > 0:
+        watchers.append(asyncio.create_task(watch_registry()))
+    if COAL_STORE_WATCH_INTERVAL > 0:
+        watchers.append(asyncio.create_task(watch_coal_store()))
+    yield
+    for watcher in watchers:
+        watcher.cancel()
+
+app = FastAPI(title="Coal Demand Forecasting", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,32 +50,130 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-try:
-    base_model = lgb.Booster(model_file='plf_base_model.txt')
-    enhanced_model = lgb.Booster(model_file='plf_enhanced_model.txt')
-    print("Models loaded successfully")
-except Exception as e:
-    print(f"ERROR: Failed to load models: {e}")
-    print("Please ensure plf_base_model.txt and plf_enhanced_model.txt exist in the project directory.")
-    sys.exit(1)
-
-try:
-    with open('generalized_model_metadata.pkl', 'rb') as f:
-        metadata = pickle.load(f)
-    print(" Metadata loaded successfully")
-except Exception as e:
-    print(f" ERROR: Failed to load metadata: {e}")
-    print("Please ensure generalized_model_metadata.pkl exists in the project directory.")
-    sys.exit(1)
-
-try:
-    df_reference = pd.read_csv('FINAL_MERGED_DATA.csv')
-    df_reference = df_reference[df_reference['Capacity'].notna()]
-    print(f"Reference data loaded: {len(df_reference['plant_key'].unique())} plants available")
-except Exception as e:
-    print(f" ERROR: Failed to load reference data: {e}")
-    print("Please ensure FINAL_MERGED_DATA.csv exists in the project directory.")
-    sys.exit(1)
+INFERENCE_ENGINE = os.getenv("INFERENCE_ENGINE", "lightgbm")
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", "artifacts")
+FORECAST_CACHE_SIZE = int(os.getenv("FORECAST_CACHE_SIZE", "10000"))
+FORECAST_CACHE_TTL = float(os.getenv("FORECAST_CACHE_TTL", "3600"))
+FORECAST_CACHE_BACKEND = os.getenv("FORECAST_CACHE_BACKEND", "memory")
+FORECAST_CACHE_PATH = os.getenv("FORECAST_CACHE_PATH", "forecast_cache.sqlite")
+SCORING_CONCURRENCY = int(os.getenv("SCORING_CONCURRENCY", os.cpu_count() or 1))
+MODEL_REGISTRY_DIR = os.getenv("MODEL_REGISTRY_DIR", "model_registry")
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "30"))
+SMOKE_BATCH_SIZE = int(os.getenv("SMOKE_BATCH_SIZE", "32"))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+UNCERTAINTY_SAMPLES = int(os.getenv("UNCERTAINTY_SAMPLES", "20000"))
+UNCERTAINTY_SEED = int(os.getenv("UNCERTAINTY_SEED", "0"))
+COAL_STORE_DIR = os.getenv("COAL_STORE_DIR", "coal_store")
+COAL_STORE_WATCH_INTERVAL = float(os.getenv("COAL_STORE_WATCH_INTERVAL", "60"))
+GEM_CACHE_DIR = os.getenv("GEM_CACHE_DIR", "gem_cache")
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "20000"))
+MAX_HORIZON_MONTHS = int(os.getenv("MAX_HORIZON_MONTHS", "120"))
+FORECAST_BATCH_WINDOW_MS = float(os.getenv("FORECAST_BATCH_WINDOW_MS", "0"))
+FORECAST_BATCH_MAX_ITEMS = int(os.getenv("FORECAST_BATCH_MAX_ITEMS", "64"))
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") not in ("0", "false", "")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+scoring_limiter = None
+started_at = time.time()
+
+metrics = MetricsRegistry(METRICS_ENABLED)
+requests_total = metrics.counter('coal_forecast_requests_total', 'Requests by endpoint and mode', ['endpoint', 'mode'])
+errors_total = metrics.counter('coal_forecast_errors_total', 'Requests answered with an error', ['endpoint', 'mode'])
+cache_lookups_total = metrics.counter('coal_forecast_cache_lookups_total', '/forecast cache lookups by result',
+                                      ['mode', 'result'])
+request_seconds = metrics.histogram('coal_forecast_request_seconds', 'Handler time per request', ['endpoint', 'mode'])
+stage_seconds = metrics.histogram('coal_forecast_stage_seconds', 'Time spent in each stage of /forecast',
+                                  ['stage', 'mode'])
+batch_size = metrics.histogram('coal_forecast_microbatch_size', 'Single /forecast requests scored together', [],
+                               buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256))
+batch_wait_seconds = metrics.histogram('coal_forecast_microbatch_wait_seconds',
+                                       'Time a /forecast request queued for its micro-batch')
+profiler = RequestProfiler(PROFILE_DIR, PROFILE_SAMPLE_RATE)
+metrics.gauge('coal_forecast_model_info', 'Active model version', ['version', 'engine'],
+              lambda: [((active_models.version, INFERENCE_ENGINE), 1)])
+metrics.gauge('coal_forecast_plants', 'Plants available for forecasting', [], lambda: [((), len(plant_records))])
+metrics.gauge('coal_forecast_cache_entries', 'Cached /forecast responses', [],
+              lambda: [((), forecast_cache.stats()['entries'])] if forecast_cache else [])
+metrics.gauge('coal_forecast_uptime_seconds', 'Seconds since the worker started', [],
+              lambda: [((), round(time.time() - started_at, 1))])
+reload_lock = asyncio.Lock()
+
+# Reference data, models, coal stocks and the cache are loaded by initialize()
+startup = metadata = plant_records = lag_store = fleet = None
+active_models = None
+coal_stock = None
+gem_units = None
+forecast_cache = None
+model_registry = ModelRegistry(MODEL_REGISTRY_DIR)
+coal_store = CoalStockStore(COAL_STORE_DIR)
+
+def load_model_bundle(version=None):
+    if version is None:
+        version = model_registry.latest_version()
+    if version is None:
+        return ModelBundle('local', metadata, startup['model_files'], INFERENCE_ENGINE, startup['compiled_dirs'])
+    return ModelBundle.from_registry(model_registry, version, INFERENCE_ENGINE)
+
+def initialize():
+    """Load everything the handlers read; later calls are no-ops.
+
+    The lifespan hook calls this in each worker. Under gunicorn it already
+    ran in the master (see ``gunicorn.conf.py``), so forked workers share
+    the loaded state instead of building their own.
+    """
+    global startup, metadata, plant_records, lag_store, fleet, active_models, coal_stock, gem_units, forecast_cache
+    if active_models is not None:
+        return
+    try:
+        startup = load_startup_state(ARTIFACT_DIR)
+        metadata = startup['metadata']
+        plant_records = startup['plant_records']
+        lag_store = startup['lag_store']
+        print(f"Reference data loaded from {startup['source']} in {startup['seconds']:.2f}s: "
+              f"{len(plant_records)} plants available")
+    except Exception as e:
+        print(f" ERROR: Failed to load metadata and reference data: {e}")
+        print("Please ensure generalized_model_metadata.pkl and FINAL_MERGED_DATA.csv exist in the project directory.")
+        sys.exit(1)
+
+    try:
+        models = load_model_bundle()
+        print(f"Models loaded successfully (version: {models.version}, inference engine: {INFERENCE_ENGINE})")
+    except Exception as e:
+        print(f"ERROR: Failed to load models: {e}")
+        print("Please ensure plf_base_model.txt and plf_enhanced_model.txt exist in the project directory.")
+        sys.exit(1)
+
+    try:
+        coal_stock = coal_store.load_state()
+        latest = int(coal_stock.last_period.max(initial=-1))
+        months = f"latest month {format_period(latest)}" if latest >= 0 else "no months ingested"
+        print(f"Coal stock data: {len(coal_stock.plant_keys)} plants, {months}")
+    except Exception as e:
+        coal_stock = None
+        print(f"WARNING: Coal stock store {COAL_STORE_DIR} could not be loaded: {e}")
+
+    try:
+        gem_units, source, seconds = load_unit_index(GEM_CACHE_DIR)
+        print(f"GEM units loaded from {source} in {seconds:.2f}s: {len(gem_units)} units, "
+              f"{len(gem_units.plants)} plants")
+    except Exception as e:
+        gem_units = None
+        print(f"WARNING: GEM unit tables could not be loaded, /forecast/units is disabled: {e}")
+
+    fleet = fleet_arrays(plant_records)
+    active_models = models.bind_fleet(fleet)
+    print(f"Lag state built: {int((~np.isnan(lag_store.lag_features(np.arange(len(plant_records))))).all(axis=1).sum())} "
+          f"plants have full PLF history for the enhanced model")
+
+    if FORECAST_CACHE_SIZE <= 0:
+        forecast_cache = None
+    elif FORECAST_CACHE_BACKEND == "sqlite":
+        forecast_cache = ForecastCache(
+            SQLiteBackend(FORECAST_CACHE_PATH, FORECAST_CACHE_SIZE), FORECAST_CACHE_TTL, startup['fingerprint']
+        )
+    else:
+        forecast_cache = ForecastCache(MemoryBackend(FORECAST_CACHE_SIZE), FORECAST_CACHE_TTL, startup['fingerprint'])
 
 class ForecastRequest(BaseModel):
     is_new_plant: bool
@@ -56,25 +182,828 @@ class ForecastRequest(BaseModel):
     plant_key: str = None
     capacity: float = None
     technology: str = None
+    uncertainty: bool = False
+
+class BatchForecastItem(BaseModel):
+    year: int
+    month: int
+    is_new_plant: bool = False
+    plant_key: str = None
+    capacity: float = None
+    technology: str = None
+
+class HorizonRequest(BaseModel):
+    """A request for consecutive months from ``start_year``/``start_month``.
+
+    The start may be at most ``MAX_ROLLOUT_MONTHS`` after the latest observed
+    month, so the last month is within that plus ``MAX_HORIZON_MONTHS``.
+    """
+
+    @model_validator(mode='after')
+    def check_start(self):
+        if self.start_year is not None and self.start_month is not None and lag_store is not None:
+            latest = int(lag_store.last_period.max())
+            if self.start_year * 12 + self.start_month - 1 > latest + MAX_ROLLOUT_MONTHS:
+                raise ValueError(f"start must be no later than {format_period(latest + MAX_ROLLOUT_MONTHS)}, "
+                                 f"{MAX_ROLLOUT_MONTHS} months after the latest observed month")
+        return self
+
+class BatchForecastRequest(HorizonRequest):
+    items: List[BatchForecastItem] = None
+    fleet: bool = False
+    start_year: int = None
+    start_month: int = Field(None, ge=1, le=12)
+    horizon_months: int = Field(12, ge=1, le=MAX_HORIZON_MONTHS)
+    uncertainty: bool = False
+
+class UnitForecastRequest(HorizonRequest):
+    start_year: int
+    start_month: int = Field(ge=1, le=12)
+    horizon_months: int = Field(36, ge=1, le=MAX_HORIZON_MONTHS)
+    plants: List[str] = None
+    target_plf: float = None
+    include_units: bool = False
+
+class ExportRequest(HorizonRequest):
+    start_year: int
+    start_month: int = Field(ge=1, le=12)
+    horizon_months: int = Field(12, ge=1, le=MAX_HORIZON_MONTHS)
+    plant_keys: List[str] = None
+    format: str = 'csv'
+    gzip: bool = False
+
+class StockPlanRequest(BaseModel):
+    horizon_months: int = Field(12, ge=1, le=MAX_HORIZON_MONTHS)
+    target_days: float = DEFAULT_TARGET_DAYS
+    receipts: str = "run_rate"
+    plant_keys: List[str] = None
+    limit: int = None
+    monthly: bool = True
+
+def interval_fields(models, enhanced, plf, capacity, year, month, heat_rate, gcv, coal_grade, aux_consumption):
+    """Monte Carlo bands, drawing PLF errors from the residuals of the model that scored each row."""
+    full_load_kwh = capacity * 24 * days_in_month(year, month) * 1000
+    plf_q = np.empty((len(plf), len(QUANTILES)))
+    coal_q = np.empty((len(plf), len(QUANTILES)))
+    rng = np.random.default_rng(UNCERTAINTY_SEED)
+    for name, rows in (('base', ~enhanced), ('enhanced', enhanced)):
+        if rows.any():
+            metadata = models.metadata
+            residuals = ResidualDistribution(metadata.get(f'{name}_residuals'), metadata[f'{name}_metrics']['rmse'])
+            result = coal_quantiles(
+                plf[rows], full_load_kwh[rows], heat_rate[rows], gcv[rows], coal_grade[rows],
+                aux_consumption[rows], residuals, UNCERTAINTY_SAMPLES, rng,
+            )
+            plf_q[rows] = result['plf']
+            coal_q[rows] = result['coal_required_tonnes']
+
+    fields = {}
+    for j, q in enumerate(QUANTILES):
+        fields[f'plf_percentage_p{round(q * 100)}'] = plf_q[:, j] * 100
+        fields[f'coal_required_tonnes_p{round(q * 100)}'] = coal_q[:, j]
+    return fields
+
+def quantile_intervals(models, features, enhanced, point_plf, capacity, year, month, heat_rate, gcv, aux_consumption):
+    """PLF and coal intervals, all alphas in one scoring pass.
+
+    The quantile models see only the base features, so rows scored by the
+    enhanced model take its residual quantiles around their point forecast
+    instead; their P50 is the returned PLF.
+    """
+    plf = np.empty((len(point_plf), len(QUANTILE_ALPHAS)))
+    if not enhanced.all():
+        plf[~enhanced] = np.sort(models.quantile_scorer.predict(features[~enhanced]), axis=1)
+    if enhanced.any():
+        plf[enhanced] = point_plf[enhanced, None] + models.enhanced_quantile_offsets
+    plf = np.clip(plf, 0, 1)
+    coal = np.column_stack([
+        calculate_coal_requirement_batch(
+            calculate_electricity_generation_batch(capacity, plf[:, k], year, month), heat_rate, gcv, aux_consumption
+        )
+        for k in range(plf.shape[1])
+    ])
+    return plf, coal
+
+def quantile_fields(plf, coal):
+    labels = [f'p{round(alpha * 100)}' for alpha in QUANTILE_ALPHAS]
+    return {
+        'plf_interval': {label: float(value * 100) for label, value in zip(labels, plf)},
+        'coal_interval_tonnes': {label: float(value) for label, value in zip(labels, coal)},
+    }
+
+NEW_PLANT_DEFAULTS = {
+    'Ultra Supercritical': (2500, 6500, 'G3'),
+    'Supercritical': (2700, 6000, 'G6'),
+}
+NEW_PLANT_FALLBACK = (2850, 5000, 'G9')
+
+def fleet_base_features(models, rows, month):
+    return plant_forecast.fleet_base_features(models, fleet, rows, month)
+
+def predict_existing_plf(models, plant_keys, year, month):
+    return plant_forecast.predict_existing_plf(models, fleet, lag_store, plant_keys, year, month)
+
+def forecast_batch(items, models=None, uncertainty=False):
+    models = models or active_models
+    metadata = models.metadata
+    n = len(items)
+    results = [None] * n
+    new_index, existing_index = [], []
+
+    for i, item in enumerate(items):
+        base = {'plant_key': item.plant_key, 'year': item.year, 'month': item.month}
+        if not 1 <= item.month <= 12:
+            results[i] = {**base, 'error': "month must be between 1 and 12"}
+        elif item.is_new_plant:
+            if item.capacity is None or item.technology is None:
+                results[i] = {**base, 'error': "capacity and technology are required for new plants"}
+            elif item.technology not in metadata['tech_map']:
+                results[i] = {**base, 'error': f"Unknown technology: {item.technology}"}
+            else:
+                new_index.append(i)
+        elif item.plant_key not in lag_store.index:
+            results[i] = {**base, 'error': "Plant not found"}
+        elif not models.has_averages[lag_store.index[item.plant_key]]:
+            technology = fleet['technology'][lag_store.index[item.plant_key]]
+            results[i] = {**base, 'error': f"No monthly PLF average for technology {technology}"}
+        else:
+            existing_index.append(i)
+
+    capacity = np.full(n, np.nan)
+    heat_rate = np.full(n, np.nan)
+    gcv = np.full(n, np.nan)
+    aux_consumption = np.full(n, np.nan)
+    predicted_plf = np.full(n, np.nan)
+    enhanced = np.zeros(n, dtype=bool)
+    plant_name = np.empty(n, dtype=object)
+    coal_grade = np.empty(n, dtype=object)
+    year = np.array([item.year for item in items], dtype=np.int64)
+    month = np.array([item.month for item in items], dtype=np.int64)
+    if models.quantile_scorer is not None:
+        base_features = np.full((n, len(metadata['base_features'])), np.nan)
+
+    if new_index:
+        idx = np.array(new_index)
+        technology = [items[i].technology for i in new_index]
+        capacity[idx] = [items[i].capacity for i in new_index]
+        band = get_capacity_band_batch(capacity[idx])
+        avg_tech = models.tech_month_table.lookup_batch(technology, month[idx])
+        avg_band = models.band_month_table.lookup_batch(band, month[idx])
+
+        valid = ~(np.isnan(avg_tech) | np.isnan(avg_band))
+        for j in np.flatnonzero(~valid):
+            item = items[idx[j]]
+            results[idx[j]] = {
+                'plant_key': item.plant_key, 'year': item.year, 'month': item.month,
+                'error': f"No monthly PLF average for technology {item.technology} in month {item.month}",
+            }
+
+        if valid.any():
+            features = build_base_features(
+                metadata,
+                np.array([metadata['tech_map'][t] for t in technology])[valid],
+                capacity[idx][valid],
+                np.array([metadata['band_map'][b] for b in band])[valid],
+                month[idx][valid], avg_tech[valid], avg_band[valid],
+            )
+            predicted_plf[idx[valid]] = np.clip(models.base_scorer.predict(features), 0.30, 1.0)
+            if models.quantile_scorer is not None:
+                base_features[idx[valid]] = features
+
+        for i in new_index:
+            item = items[i]
+            heat_rate[i], gcv[i], coal_grade[i] = NEW_PLANT_DEFAULTS.get(item.technology, NEW_PLANT_FALLBACK)
+            plant_name[i] = f"New {item.technology} Plant ({item.capacity} MW)"
+        aux_consumption[idx] = 8.0
+
+    if existing_index:
+        idx = np.array(existing_index)
+        plant_keys = [items[i].plant_key for i in existing_index]
+        rows = lag_store.rows_for(plant_keys)
+        capacity[idx] = fleet['capacity'][rows]
+        heat_rate[idx] = fleet['heat_rate'][rows]
+        gcv[idx] = fleet['gcv'][rows]
+        aux_consumption[idx] = fleet['aux_consumption'][rows]
+        plant_name[idx] = fleet['plant_name'][rows]
+        coal_grade[idx] = fleet['coal_grade'][rows]
+        predicted_plf[idx], enhanced[idx] = predict_existing_plf(models, plant_keys, year[idx], month[idx])
+        if models.quantile_scorer is not None:
+            base_features[idx] = fleet_base_features(models, rows, month[idx])
+
+    columns = {
+        'plant_key': [item.plant_key for item in items], 'year': year, 'month': month, 'plant_name': plant_name,
+        'capacity': capacity, 'plf': predicted_plf, 'enhanced': enhanced, 'heat_rate': heat_rate, 'gcv': gcv,
+        'coal_grade': coal_grade, 'aux_consumption': aux_consumption,
+    }
+    if models.quantile_scorer is not None:
+        columns['base_features'] = base_features
+    return batch_response(results, models, columns, uncertainty)
+
+def batch_response(results, models, columns, uncertainty=False):
+    """Fill ``results`` for the rows of ``columns`` with a PLF (the others hold an error) and add the totals."""
+    scored = np.flatnonzero(~np.isnan(columns['plf']))
+    if len(scored):
+        capacity, plf, enhanced = columns['capacity'][scored], columns['plf'][scored], columns['enhanced'][scored]
+        year, month = columns['year'][scored], columns['month'][scored]
+        heat_rate, gcv, aux_consumption = columns['heat_rate'][scored], columns['gcv'][scored], columns['aux_consumption'][scored]
+        electricity_kwh = calculate_electricity_generation_batch(capacity, plf, year, month)
+        coal_required = calculate_coal_requirement_batch(electricity_kwh, heat_rate, gcv, aux_consumption)
+        intervals = {}
+        if uncertainty:
+            intervals = interval_fields(
+                models, enhanced, plf, capacity, year, month, heat_rate, gcv, columns['coal_grade'][scored],
+                aux_consumption,
+            )
+        if models.quantile_scorer is not None:
+            plf_q, coal_q = quantile_intervals(
+                models, columns['base_features'][scored], enhanced, plf, capacity, year, month,
+                heat_rate, gcv, aux_consumption,
+            )
+
+        for j, i in enumerate(scored):
+            results[i] = {
+                'plant_key': columns['plant_key'][i],
+                'year': int(year[j]),
+                'month': int(month[j]),
+                'plant_name': columns['plant_name'][i],
+                'capacity_mw': float(capacity[j]),
+                'plf_percentage': float(plf[j] * 100),
+                'electricity_mwh': float(electricity_kwh[j] / 1000),
+                'coal_required_tonnes': float(coal_required[j]),
+                'coal_grade': columns['coal_grade'][i],
+                'gcv_kcal_kg': float(gcv[j]),
+                **{name: float(values[j]) for name, values in intervals.items()},
+            }
+            if models.quantile_scorer is not None:
+                results[i].update(quantile_fields(plf_q[j], coal_q[j]))
+
+    succeeded = [r for r in results if 'error' not in r]
+    return {
+        'results': results,
+        'totals': {
+            'items': len(results),
+            'succeeded': len(succeeded),
+            'failed': len(results) - len(succeeded),
+            'electricity_mwh': float(sum(r['electricity_mwh'] for r in succeeded)),
+            'coal_required_tonnes': float(sum(r['coal_required_tonnes'] for r in succeeded)),
+        },
+        'model_version': models.version,
+    }
+
+def forecast_fleet(request, models=None, uncertainty=False):
+    """``forecast_batch`` over every plant and month of the horizon, built from the plant x period grid."""
+    models = models or active_models
+    if request.start_year is None or request.start_month is None:
+        raise ValueError("start_year and start_month are required for fleet forecasts")
+    periods = request.start_year * 12 + request.start_month - 1 + np.arange(request.horizon_months)
+    keys = np.array(plant_records.plant_keys, dtype=object)
+    rows = np.repeat(lag_store.rows_for(keys), len(periods))
+    year = np.tile(periods // 12, len(keys))
+    month = np.tile(periods % 12 + 1, len(keys))
+    plf = np.full(len(rows), np.nan)
+    enhanced = np.zeros(len(rows), dtype=bool)
+    results = [None] * len(rows)
+
+    scored = models.has_averages[rows]
+    for i in np.flatnonzero(~scored):
+        results[i] = {'plant_key': keys[i // len(periods)], 'year': int(year[i]), 'month': int(month[i]),
+                      'error': f"No monthly PLF average for technology {fleet['technology'][rows[i]]}"}
+    if scored.any():
+        plf[scored], enhanced[scored] = predict_existing_plf(models, keys[rows[scored]], year[scored], month[scored])
+
+    columns = {
+        'plant_key': np.repeat(keys, len(periods)), 'year': year, 'month': month,
+        'plant_name': fleet['plant_name'][rows], 'capacity': fleet['capacity'][rows], 'plf': plf,
+        'enhanced': enhanced, 'heat_rate': fleet['heat_rate'][rows], 'gcv': fleet['gcv'][rows],
+        'coal_grade': fleet['coal_grade'][rows], 'aux_consumption': fleet['aux_consumption'][rows],
+    }
+    if models.quantile_scorer is not None:
+        columns['base_features'] = fleet_base_features(models, rows, month)
+    return batch_response(results, models, columns, uncertainty)
+
+def request_mode(request):
+    return 'new' if request.is_new_plant else 'existing'
+
+def forecast_single(request, models=None, timer=NULL_TIMER):
+    models = models or active_models
+    metadata = models.metadata
+    # the same checks and messages as forecast_batch, so coalesced requests answer alike
+    if not 1 <= request.month <= 12:
+        raise ValueError("month must be between 1 and 12")
+    if request.is_new_plant:
+        if request.capacity is None or request.technology is None:
+            raise ValueError("capacity and technology are required for new plants")
+        if request.technology not in metadata['tech_map']:
+            raise ValueError(f"Unknown technology: {request.technology}")
+        capacity = request.capacity
+        technology = request.technology
+        tech_encoded = metadata['tech_map'][technology]
+        heat_rate, gcv, coal_grade = NEW_PLANT_DEFAULTS.get(technology, NEW_PLANT_FALLBACK)
+        aux_consumption = 8.0
+        plant_name = f"New {technology} Plant ({capacity} MW)"
+    else:
+        plant = plant_records.get(request.plant_key)
+        if plant is None:
+            return JSONResponse(status_code=404, content={"error": "Plant not found"})
+        if not models.has_averages[lag_store.index[request.plant_key]]:
+            raise ValueError(f"No monthly PLF average for technology {plant.technology}")
+
+        capacity = plant.capacity
+        technology = plant.technology
+        heat_rate = plant.heat_rate
+        gcv = plant.gcv
+        coal_grade = plant.coal_grade
+        aux_consumption = plant.aux_consumption
+        plant_name = plant.plant_name
+
+    band = str(get_capacity_band_batch(capacity))
+    try:
+        avg_tech = models.tech_month_table.lookup(technology, request.month)
+        avg_band = models.band_month_table.lookup(band, request.month)
+    except KeyError:
+        raise ValueError(f"No monthly PLF average for technology {technology} in month {request.month}")
+    timer.mark('lookup')
+
+    if request.is_new_plant:
+        enhanced = np.zeros(1, dtype=bool)
+        features = build_base_features(
+            metadata, tech_encoded, capacity, metadata['band_map'][band], request.month, avg_tech, avg_band
+        )
+        timer.mark('features')
+        predicted_plf = np.clip(models.base_scorer.predict(features)[0], 0.30, 1.0)
+        timer.mark('predict')
+    else:
+        plf, enhanced = predict_existing_plf(models, [request.plant_key], [request.year], [request.month])
+        predicted_plf = plf[0]
+        timer.mark('predict')
+        if models.quantile_scorer is not None:
+            features = fleet_base_features(models, lag_store.rows_for([request.plant_key]), np.array([request.month]))
+            timer.mark('features')
 
-def calculate_electricity_generation(capacity_mw, plf, year, month):
-    days = calendar.monthrange(year, month)[1]
-    return capacity_mw * plf * 24 * days * 1000
+    # length-1 arrays through the batch path's physics, so a single forecast computes exactly what a batch does
+    plf, capacity, heat_rate, gcv, aux_consumption = (
+        np.array([value], dtype=float) for value in (predicted_plf, capacity, heat_rate, gcv, aux_consumption)
+    )
+    year, month = np.array([request.year]), np.array([request.month])
+    electricity_kwh = calculate_electricity_generation_batch(capacity, plf, year, month)
+    coal_required = calculate_coal_requirement_batch(electricity_kwh, heat_rate, gcv, aux_consumption)
+    timer.mark('physics')
+    intervals = {}
+    if request.uncertainty:
+        intervals = interval_fields(
+            models, enhanced, plf, capacity, year, month, heat_rate, gcv, np.array([coal_grade], dtype=object),
+            aux_consumption,
+        )
+        timer.mark('uncertainty')
+    quantiles = {}
+    if models.quantile_scorer is not None:
+        plf_q, coal_q = quantile_intervals(
+            models, features, enhanced, plf, capacity, year, month, heat_rate, gcv, aux_consumption,
+        )
+        quantiles = quantile_fields(plf_q[0], coal_q[0])
+        timer.mark('quantiles')
 
-def calculate_coal_requirement(electricity_kwh, heat_rate, gcv, aux_consumption):
-    aux = aux_consumption / 100 if aux_consumption > 1 else aux_consumption
-    coal_kg = (electricity_kwh * heat_rate) / (gcv * (1 - aux))
-    return coal_kg / 1000
+    return {
+        'plant_name': plant_name,
+        'capacity_mw': float(capacity[0]),
+        'plf_percentage': float(plf[0] * 100),
+        'electricity_mwh': float(electricity_kwh[0] / 1000),
+        'coal_required_tonnes': float(coal_required[0]),
+        'coal_grade': coal_grade,
+        'gcv_kcal_kg': float(gcv[0]),
+        **{name: float(values[0]) for name, values in intervals.items()},
+        **quantiles,
+        'model_version': models.version,
+    }
+
+def forecast_single_cached(request, timer=NULL_TIMER):
+    models = active_models
+    key = forecast_cache.key(request, models.version)
+    cached = forecast_cache.get(key)
+    timer.mark('cache_lookup')
+    if cached is not None:
+        cache_lookups_total.inc(request_mode(request), 'hit')
+        return cached
+
+    cache_lookups_total.inc(request_mode(request), 'miss')
+    result = forecast_single(request, models, timer)
+    if isinstance(result, dict):
+        forecast_cache.set(key, result)
+        timer.mark('cache_store')
+    return result
+
+def single_response(result, models):
+    """A ``forecast_batch`` result in the shape and status ``forecast_single`` returns."""
+    if 'error' in result:
+        return JSONResponse(status_code=404 if result['error'] == "Plant not found" else 400,
+                            content={"error": result['error']})
+    fields = {k: v for k, v in result.items() if k not in ('plant_key', 'year', 'month')}
+    return {**fields, 'model_version': models.version}
+
+def forecast_coalesced(entries, models=None):
+    """Score queued ``(request, timer)`` pairs of single /forecast calls with one ``forecast_batch``."""
+    models = models or active_models
+    results = [None] * len(entries)
+    keys, misses = {}, []
+    for i, (request, timer) in enumerate(entries):
+        timer.mark('queue')
+        if forecast_cache:
+            keys[i] = forecast_cache.key(request, models.version)
+            cached = forecast_cache.get(keys[i])
+            cache_lookups_total.inc(request_mode(request), 'miss' if cached is None else 'hit')
+            if cached is not None:
+                results[i] = cached
+                continue
+        misses.append(i)
+
+    if misses:
+        fields = ['year', 'month', 'is_new_plant', 'plant_key', 'capacity', 'technology']
+        items = [
+            BatchForecastItem(**{name: getattr(request, name) for name in fields if getattr(request, name) is not None})
+            for request, _ in (entries[i] for i in misses)
+        ]
+        for i, result in zip(misses, forecast_batch(items, models)['results']):
+            results[i] = single_response(result, models)
+            if forecast_cache and isinstance(results[i], dict):
+                forecast_cache.set(keys[i], results[i])
+    for _, timer in entries:
+        timer.mark('batch')
+    return results
+
+def record_batch(size, waits):
+    batch_size.observe(size)
+    for wait in waits:
+        batch_wait_seconds.observe(wait)
+
+def fleet_forecast(models, plant_keys, periods):
+    return plant_forecast.fleet_forecast(models, fleet, lag_store, plant_keys, periods)
+
+def fleet_coal_matrix(models, plant_keys, periods):
+    return plant_forecast.fleet_coal_matrix(models, fleet, lag_store, plant_keys, periods)
+
+def export_selection(request, models):
+    """Plants and periods of an export; plants without a monthly PLF average are skipped and counted."""
+    keys = list(plant_records) if request.plant_keys is None else request.plant_keys
+    unknown = [key for key in keys if key not in lag_store.index]
+    if unknown:
+        raise ValueError(f"Plant not found: {', '.join(unknown[:5])}")
+    keys = np.array(keys, dtype=object)
+    scored = models.has_averages[lag_store.rows_for(keys)] if len(keys) else np.zeros(0, dtype=bool)
+    periods = request.start_year * 12 + request.start_month - 1 + np.arange(request.horizon_months)
+    return keys[scored], periods, int((~scored).sum())
+
+def export_chunk(encoder, models, plant_keys, periods):
+    forecast = fleet_forecast(models, plant_keys, periods)
+    rows = forecast['rows']
+    return encoder.write({
+        'plant_key': np.repeat(plant_keys, len(periods)),
+        'plant_name': fleet['plant_name'][rows],
+        'year': forecast['year'],
+        'month': forecast['month'],
+        'capacity_mw': fleet['capacity'][rows],
+        'plf_percentage': forecast['plf'] * 100,
+        'electricity_mwh': forecast['electricity_kwh'] / 1000,
+        'coal_required_tonnes': forecast['coal'],
+        'coal_grade': fleet['coal_grade'][rows],
+        'gcv_kcal_kg': fleet['gcv'][rows],
+    })
+
+def forecast_units(request, models=None):
+    """Coal demand of GEM plants summed over their units, for every plant and month in one pass.
+
+    Each unit burns at its own heat rate; PLF comes from the base model for
+    the unit's technology and its plant's capacity, or from ``target_plf``.
+    """
+    models = models or active_models
+    if gem_units is None:
+        raise ValueError("GEM unit tables are not loaded")
+
+    names = gem_units.plants if request.plants is None else request.plants
+    unknown = [name for name in names if name not in gem_units.index]
+    plant_rows = np.array([gem_units.index[name] for name in names if name in gem_units.index], dtype=np.int64)
+    if not len(plant_rows):
+        raise ValueError(f"No GEM plants matched; unknown: {', '.join(unknown[:5])}")
+    rows, offsets = gem_units.slices(plant_rows)
+    periods = request.start_year * 12 + request.start_month - 1 + np.arange(request.horizon_months)
+    year, month = periods // 12, periods % 12 + 1
+
+    units = {name: values[rows] for name, values in gem_units.columns.items()}
+    capacity = units['capacity_mw']
+    technology = units['technology']
+    if request.target_plf is not None:
+        plf = np.full((len(rows), len(periods)), request.target_plf / 100 if request.target_plf > 1 else
+                      request.target_plf)
+    else:
+        metadata = models.metadata
+        unknown_technology = sorted(set(technology) - set(metadata['tech_map']))
+        if unknown_technology:
+            raise ValueError(f"Unknown technology: {', '.join(unknown_technology)}")
+        # the base features depend only on technology, plant capacity and month, so units of one
+        # plant that share a technology are scored once
+        plant_of_unit = np.repeat(np.arange(len(plant_rows)), np.diff(offsets))
+        groups, first, inverse = np.unique(
+            np.column_stack([plant_of_unit, [metadata['tech_map'][t] for t in technology]]),
+            axis=0, return_index=True, return_inverse=True,
+        )
+        group_technology = technology[first]
+        group_capacity = gem_units.plant_capacity[plant_rows][groups[:, 0]]
+        band = get_capacity_band_batch(group_capacity)
+        flat_technology = np.repeat(group_technology, len(periods))
+        flat_band = np.repeat(band, len(periods))
+        flat_month = np.tile(month, len(groups))
+        features = build_base_features(
+            metadata,
+            np.repeat(groups[:, 1], len(periods)),
+            np.repeat(group_capacity, len(periods)),
+            np.repeat([metadata['band_map'][b] for b in band], len(periods)),
+            flat_month,
+            models.tech_month_table.lookup_batch(flat_technology, flat_month),
+            models.band_month_table.lookup_batch(flat_band, flat_month),
+        )
+        group_plf = np.clip(models.base_scorer.predict(features), 0.30, 1.0).reshape(len(groups), len(periods))
+        plf = group_plf[inverse.ravel()]
+
+    defaults = [NEW_PLANT_DEFAULTS.get(t, NEW_PLANT_FALLBACK) for t in technology]
+    gcv = np.array([d[1] for d in defaults], dtype=float)
+    coal_grade = np.array([d[2] for d in defaults], dtype=object)
+    electricity_kwh = calculate_electricity_generation_batch(capacity[:, None], plf, year[None, :], month[None, :])
+    coal = calculate_coal_requirement_batch(
+        electricity_kwh, units['heat_rate'][:, None], gcv[:, None], np.full((len(rows), 1), 8.0)
+    )
+    plant_electricity_kwh = gem_units.reduce(electricity_kwh, offsets)
+    plant_coal = gem_units.reduce(coal, offsets)
+    full_load_kwh = calculate_electricity_generation_batch(
+        gem_units.plant_capacity[plant_rows][:, None], 1.0, year[None, :], month[None, :]
+    )
+
+    plants = []
+    for i, p in enumerate(plant_rows):
+        start, stop = offsets[i], offsets[i + 1]
+        entry = {
+            'plant': gem_units.plants[p],
+            'units': int(stop - start),
+            'capacity_mw': float(gem_units.plant_capacity[p]),
+            'technology': sorted(set(technology[start:stop])),
+            'heat_rate_kcal_kwh': float(gem_units.plant_heat_rate[p]),
+            'design_heat_rate_kcal_kwh': float(gem_units.plant_design_heat_rate[p]),
+            'coal_grade': sorted(set(coal_grade[start:stop])),
+            'plf_percentage': (plant_electricity_kwh[i] / full_load_kwh[i] * 100).tolist(),
+            'electricity_mwh': (plant_electricity_kwh[i] / 1000).tolist(),
+            'coal_required_tonnes': plant_coal[i].tolist(),
+        }
+        if request.include_units:
+            entry['unit_breakdown'] = [
+                {
+                    'unit': units['unit'][u],
+                    'technology': technology[u],
+                    'capacity_mw': float(capacity[u]),
+                    'heat_rate_kcal_kwh': float(units['heat_rate'][u]),
+                    'gcv_kcal_kg': float(gcv[u]),
+                    'plf_percentage': (plf[u] * 100).tolist(),
+                    'coal_required_tonnes': coal[u].tolist(),
+                }
+                for u in range(start, stop)
+            ]
+        plants.append(entry)
+
+    return {
+        'months': [format_period(int(p)) for p in periods],
+        'plants': plants,
+        'fleet': {
+            'plants': len(plant_rows),
+            'units': len(rows),
+            'capacity_mw': float(capacity.sum()),
+            'electricity_mwh': (electricity_kwh.sum(axis=0) / 1000).tolist(),
+            'coal_required_tonnes': coal.sum(axis=0).tolist(),
+        },
+        'unknown_plants': unknown,
+        'model_version': models.version,
+    }
+
+def stock_plan(request, models=None):
+    models = models or active_models
+    state = coal_stock
+    if state is None or not state.plant_keys:
+        raise ValueError("No coal stock data; ingest final_monthly_coal_combined.csv with coal_stock_store.py")
+    if request.receipts not in ("run_rate", "none"):
+        raise ValueError("receipts must be 'run_rate' or 'none'")
+
+    keys = list(plant_records) if request.plant_keys is None else request.plant_keys
+    unknown = [key for key in keys if key not in lag_store.index]
+    keys = np.array([key for key in keys if key in lag_store.index], dtype=object)
+    aggregates = state.aggregates()
+    stock_rows = state.match(keys)
+    latest = int(state.last_period.max())
+    plant_last = np.where(stock_rows >= 0, aggregates['last_period'][np.maximum(stock_rows, 0)], -1)
+    opening = np.where(stock_rows >= 0, aggregates['closing_stock'][np.maximum(stock_rows, 0)] * 1000, np.nan)
+
+    has_stock = (stock_rows >= 0) & np.isfinite(opening)
+    fresh = plant_last >= latest - MAX_STALE_MONTHS
+    has_forecast = models.has_averages[lag_store.rows_for(keys)] if len(keys) else np.zeros(0, dtype=bool)
+    selected = has_stock & fresh & has_forecast
+    keys, stock_rows, plant_last, opening = keys[selected], stock_rows[selected], plant_last[selected], opening[selected]
+
+    first = int(plant_last.min()) + 1 if len(keys) else latest + 1
+    periods = np.arange(first, latest + 1 + request.horizon_months)
+    report_from = latest + 1 - first
+    active = periods[None, :] > plant_last[:, None]
+    consumption = np.where(active, fleet_coal_matrix(models, keys, periods), 0.0) if len(keys) else \
+        np.zeros((0, len(periods)))
+
+    receipts = np.zeros((len(keys), len(periods), len(SOURCE_COLUMNS)))
+    if request.receipts == "run_rate" and len(keys):
+        months = np.maximum(aggregates['months_in_window'][stock_rows], 1)
+        run_rate = aggregates['receipts_12m'][stock_rows] * 1000 / months[:, None]
+        receipts = np.where(active[:, :, None], run_rate[:, None, :], 0.0)
+
+    plan = plan_stock(
+        opening, consumption, receipts, days_in_month(periods // 12, periods % 12 + 1), request.target_days,
+        report_from, aggregates['source_share_12m'][stock_rows],
+    )
+    order = criticality_order(plan)[:request.limit]
+    reported = periods[report_from:]
+    labels = [format_period(int(p)) for p in reported]
+    finite = lambda value: float(value) if np.isfinite(value) else None
+
+    plants = []
+    for i in order:
+        days_to_stockout = plan['days_to_stockout'][i]
+        entry = {
+            'plant_key': keys[i],
+            'plant_name': fleet['plant_name'][lag_store.index[keys[i]]],
+            'stock_as_of': format_period(int(plant_last[i])),
+            'opening_stock_tonnes': float(opening[i]),
+            'days_to_stockout': finite(days_to_stockout),
+            'stockout_month': labels[int(np.argmax(plan['stock'][i] <= 0))] if np.isfinite(days_to_stockout) else None,
+            'min_days_of_cover': finite(plan['min_days_of_cover'][i]),
+            'total_gap_tonnes': float(plan['total_gap'][i]),
+            'gap_by_source_tonnes': dict(zip(SOURCE_COLUMNS, plan['gap_by_source'][i].sum(axis=0).tolist())),
+        }
+        if request.monthly:
+            entry['monthly'] = {
+                'consumption_tonnes': consumption[i, report_from:].tolist(),
+                'planned_receipts_tonnes': receipts[i, report_from:].sum(axis=1).tolist(),
+                'stock_tonnes': plan['stock'][i].tolist(),
+                'days_of_cover': [finite(v) for v in plan['days_of_cover'][i]],
+                'gap_tonnes': plan['gap'][i].tolist(),
+            }
+        plants.append(entry)
+
+    return {
+        'start': labels[0],
+        'months': labels,
+        'target_days': request.target_days,
+        'receipts': request.receipts,
+        'fleet': {
+            'plants': len(keys),
+            'consumption_tonnes': consumption[:, report_from:].sum(axis=0).tolist(),
+            'planned_receipts_tonnes': receipts[:, report_from:].sum(axis=(0, 2)).tolist(),
+            'gap_tonnes': plan['gap'].sum(axis=0).tolist(),
+            'gap_by_source_tonnes': dict(zip(SOURCE_COLUMNS, plan['gap_by_source'].sum(axis=0).T.tolist())),
+            'plants_below_target': plan['below_target'].sum(axis=0).tolist(),
+            'plants_stocked_out': (plan['stock'] <= 0).sum(axis=0).tolist(),
+            'total_gap_tonnes': float(plan['total_gap'].sum()),
+        },
+        'plants': plants,
+        'skipped': {
+            'unknown_plants': unknown,
+            'no_stock_data': int((~has_stock).sum()),
+            'stale_stock_data': int((has_stock & ~fresh).sum()),
+            'no_forecast': int((has_stock & fresh & ~has_forecast).sum()),
+        },
+        'model_version': models.version,
+    }
+
+async def run_scoring(fn, *args):
+    global scoring_limiter
+    if scoring_limiter is None:
+        scoring_limiter = anyio.CapacityLimiter(SCORING_CONCURRENCY)
+    return await anyio.to_thread.run_sync(fn, *args, limiter=scoring_limiter)
+
+# Concurrent single /forecast calls are coalesced into one forecast_batch when a window is set
+forecast_batcher = RequestBatcher(
+    forecast_coalesced, run_scoring, FORECAST_BATCH_WINDOW_MS / 1000, FORECAST_BATCH_MAX_ITEMS, record_batch
+) if FORECAST_BATCH_WINDOW_MS > 0 else None
+
+async def run_instrumented(endpoint, mode, fn, *args, profile=None, timer=NULL_TIMER):
+    """``run_scoring`` with request/error counts, handler latency and the optional profiler.
+
+    A coroutine function ``fn`` is awaited on the event loop instead, and is not profiled.
+    """
+    start = time.perf_counter()
+    requests_total.inc(endpoint, mode)
+    headers = {}
+    coroutine = asyncio.iscoroutinefunction(fn)
+    if not coroutine and profiler.should_profile(profile):
+        fn, path = profiler.wrap(fn, endpoint)
+        headers['X-Profile-File'] = os.path.basename(path)
+    try:
+        result = await fn(*args) if coroutine else await run_scoring(fn, *args)
+        timer.mark('return')
+    except KeyError as e:
+        result = JSONResponse(status_code=400, content={"error": str(e.args[0])})
+    except Exception as e:
+        result = JSONResponse(status_code=400, content={"error": str(e)})
+    if isinstance(result, JSONResponse):
+        errors_total.inc(endpoint, mode)
+        response = result
+    else:
+        response = JSONResponse(result)
+        timer.mark('serialize')
+    response.headers.update(headers)
+    request_seconds.observe(time.perf_counter() - start, endpoint, mode)
+    return response
+
+rejected_versions = set()
+
+def smoke_test(models):
+    models.check_features()
+    items = [
+        BatchForecastItem(plant_key=key, year=int((period + 1) // 12), month=int((period + 1) % 12 + 1))
+        for key, period in zip(lag_store.plant_keys[:SMOKE_BATCH_SIZE], lag_store.last_period[:SMOKE_BATCH_SIZE])
+        if period >= 0
+    ]
+    items += [
+        BatchForecastItem(is_new_plant=True, capacity=800, technology=technology, year=2025, month=1)
+        for technology in models.metadata['tech_map']
+    ]
+    scored = [r for r in forecast_batch(items, models)['results'] if 'error' not in r]
+    if not scored:
+        raise ValueError("Smoke batch produced no forecasts")
+    for r in scored:
+        if not (0 <= r['plf_percentage'] <= 100 and np.isfinite(r['coal_required_tonnes'])):
+            raise ValueError(f"Smoke batch produced an invalid forecast for {r['plant_key']}: {r}")
+        if 'coal_interval_tonnes' in r and not np.isfinite(list(r['coal_interval_tonnes'].values())).all():
+            raise ValueError(f"Smoke batch produced an invalid interval for {r['plant_key']}: {r}")
+
+def prepare_models(version=None):
+    models = load_model_bundle(version).bind_fleet(fleet)
+    smoke_test(models)
+    return models
+
+async def reload_models(version=None):
+    global active_models
+    async with reload_lock:
+        models = await anyio.to_thread.run_sync(prepare_models, version)
+        previous, active_models = active_models, models
+        print(f"Model version {previous.version} replaced by {models.version}")
+        return previous
+
+async def watch_registry():
+    while True:
+        await asyncio.sleep(MODEL_WATCH_INTERVAL)
+        latest = model_registry.latest_version()
+        if latest is None or latest == active_models.version or latest in rejected_versions:
+            continue
+        try:
+            await reload_models(latest)
+        except Exception as e:
+            rejected_versions.add(latest)
+            print(f"ERROR: Model version {latest} rejected, keeping {active_models.version}: {e}")
+
+async def watch_coal_store():
+    global coal_stock
+    while True:
+        await asyncio.sleep(COAL_STORE_WATCH_INTERVAL)
+        try:
+            if coal_stock is None:
+                updated = await anyio.to_thread.run_sync(coal_store.load_state)
+            else:
+                updated = await anyio.to_thread.run_sync(coal_store.refresh, coal_stock)
+        except Exception as e:
+            print(f"ERROR: Coal stock refresh failed, keeping the current aggregates: {e}")
+            continue
+        if updated is not coal_stock:
+            coal_stock = updated
+            print(f"Coal stock data updated to {format_period(int(coal_stock.last_period.max(initial=-1)))} "
+                  f"({coal_stock.segments} segments)")
+
+def check_admin_token(token):
+    if not ADMIN_TOKEN:
+        return JSONResponse(status_code=403, content={"error": "Admin endpoints are disabled; set ADMIN_TOKEN"})
+    if not token or not hmac.compare_digest(token, ADMIN_TOKEN):
+        return JSONResponse(status_code=401, content={"error": "Invalid admin token"})
+    return None
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 @app.get("/health")
 async def health_check():
+    models_loaded = active_models.base_scorer is not None and active_models.enhanced_scorer is not None
     return {
-        "status": "healthy",
+        "status": "healthy" if models_loaded else "degraded",
         "service": "coal-demand-forecasting",
-        "models_loaded": True,
-        "plants_available": len(df_reference['plant_key'].unique())
+        "models_loaded": models_loaded,
+        "model_version": active_models.version,
+        "uptime_seconds": round(time.time() - started_at, 1),
+        "plants_available": len(plant_records),
+        "forecast_cache": forecast_cache.stats() if forecast_cache else None,
+        "coal_stock": {
+            "plants": len(coal_stock.plant_keys),
+            "latest_month": format_period(int(coal_stock.last_period.max(initial=-1))),
+            "segments": coal_stock.segments,
+        } if coal_stock else None,
+        "gem_units": {"plants": len(gem_units.plants), "units": len(gem_units)} if gem_units else None,
     }
 
 @app.get("/", response_class=HTMLResponse)
@@ -84,135 +1013,124 @@ async def home():
 
 @app.get("/plants")
 async def get_plants():
-    return sorted(df_reference['plant_key'].unique().tolist())
+    return list(plant_records)
+
+@app.get("/plants/{plant_key}/coal-stock")
+async def get_coal_stock(plant_key: str):
+    summary = coal_stock.plant_summary(plant_key) if coal_stock else None
+    if summary is None:
+        return JSONResponse(status_code=404, content={"error": "No coal stock data for plant"})
+    return summary
+
+@app.get("/metrics")
+async def get_metrics():
+    if not metrics.enabled:
+        return JSONResponse(status_code=404, content={"error": "Metrics are disabled; set METRICS_ENABLED=1"})
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 @app.post("/forecast")
-async def predict(request: ForecastRequest):
+async def predict(request: ForecastRequest, x_profile: str = Header(None)):
+    mode = request_mode(request)
+    timer = metrics.timer(stage_seconds, mode)
+    # uncertainty bands and explicitly profiled requests are scored on their own
+    if forecast_batcher is not None and not request.uncertainty and not x_profile:
+        return await run_instrumented('forecast', mode, forecast_batcher.submit, (request, timer), timer=timer)
+    forecast = forecast_single_cached if forecast_cache else forecast_single
+
+    def score(request):
+        timer.mark('dispatch')
+        return forecast(request, timer=timer)
+
+    return await run_instrumented('forecast', mode, score, request, profile=x_profile, timer=timer)
+
+@app.post("/forecast/batch")
+async def predict_batch(request: BatchForecastRequest, x_profile: str = Header(None)):
+    mode = 'fleet' if request.fleet else 'items'
+    if request.fleet:
+        return await run_instrumented('forecast_batch', mode, forecast_fleet, request, None, request.uncertainty,
+                                      profile=x_profile)
+    if not request.items:
+        errors_total.inc('forecast_batch', mode)
+        return JSONResponse(status_code=400, content={"error": "Provide items or set fleet to true"})
+    return await run_instrumented('forecast_batch', mode, forecast_batch, request.items, None, request.uncertainty,
+                                  profile=x_profile)
+
+@app.post("/forecast/export")
+async def export_forecasts(request: ExportRequest):
+    start = time.perf_counter()
+    mode = request.format if request.format in EXPORT_FORMATS else 'invalid'
+    requests_total.inc('forecast_export', mode)
+    # one export is served by one model version even if a reload lands while it streams
+    models = active_models
     try:
-        if request.is_new_plant:
-            capacity = request.capacity
-            technology = request.technology
-            
-            capacity_norm = (capacity - metadata['capacity_stats']['mean']) / metadata['capacity_stats']['std']
-            
-            if capacity < 500:
-                band = 'Small'
-            elif capacity < 1500:
-                band = 'Medium'
-            else:
-                band = 'Large'
-            
-            tech_encoded = metadata['tech_map'][technology]
-            band_encoded = metadata['band_map'][band]
-            
-            tech_month_avg = pd.DataFrame(metadata['tech_month_avg'])
-            band_month_avg = pd.DataFrame(metadata['band_month_avg'])
-            
-            avg_tech = tech_month_avg[(tech_month_avg['Technology'] == technology) & 
-                                      (tech_month_avg['Month'] == request.month)]['avg_plf_tech_month'].values[0]
-            avg_band = band_month_avg[(band_month_avg['capacity_band'] == band) & 
-                                      (band_month_avg['Month'] == request.month)]['avg_plf_band_month'].values[0]
-            
-            features = pd.DataFrame([{
-                'technology_encoded': tech_encoded,
-                'capacity_normalized': capacity_norm,
-                'capacity_band_encoded': band_encoded,
-                'Month': request.month,
-                'quarter': (request.month-1)//3 + 1,
-                'month_sin': np.sin(2 * np.pi * request.month / 12),
-                'month_cos': np.cos(2 * np.pi * request.month / 12),
-                'is_summer': 1 if request.month in [4,5,6] else 0,
-                'is_monsoon': 1 if request.month in [7,8,9] else 0,
-                'is_winter': 1 if request.month in [11,12,1,2] else 0,
-                'avg_plf_tech_month': avg_tech,
-                'avg_plf_band_month': avg_band,
-            }])
-            
-            raw_plf = base_model.predict(features)[0]
-            predicted_plf = np.clip(raw_plf, 0.30, 1.0)
-            
-            if technology == 'Ultra Supercritical':
-                heat_rate = 2500
-                gcv = 6500
-                coal_grade = 'G3'
-            elif technology == 'Supercritical':
-                heat_rate = 2700
-                gcv = 6000
-                coal_grade = 'G6'
-            else:
-                heat_rate = 2850
-                gcv = 5000
-                coal_grade = 'G9'
-            
-            aux_consumption = 8.0
-            plant_name = f"New {technology} Plant ({capacity} MW)"
-            
-        else:
-            plant_data = df_reference[df_reference['plant_key'] == request.plant_key]
-            if len(plant_data) == 0:
-                return JSONResponse(status_code=404, content={"error": "Plant not found"})
-            
-            latest = plant_data.iloc[-1]
-            capacity = latest['Capacity']
-            technology = latest['Technology']
-            heat_rate = latest.get('Actual SHR', 2750)
-            gcv = latest['Estimated_GCV_kcal_per_kg']
-            coal_grade = latest['Coal_Grade']
-            aux_consumption = latest.get('Auxiliary consumption (%)', 8.0)
-            plant_name = latest.get('Name of TPS', request.plant_key)
-            
-            capacity_norm = (capacity - metadata['capacity_stats']['mean']) / metadata['capacity_stats']['std']
-            
-            if capacity < 500:
-                band = 'Small'
-            elif capacity < 1500:
-                band = 'Medium'
-            else:
-                band = 'Large'
-            
-            tech_encoded = metadata['tech_map'].get(technology, 0)
-            band_encoded = metadata['band_map'][band]
-            
-            tech_month_avg = pd.DataFrame(metadata['tech_month_avg'])
-            band_month_avg = pd.DataFrame(metadata['band_month_avg'])
-            
-            avg_tech = tech_month_avg[(tech_month_avg['Technology'] == technology) & 
-                                      (tech_month_avg['Month'] == request.month)]['avg_plf_tech_month'].values[0]
-            avg_band = band_month_avg[(band_month_avg['capacity_band'] == band) & 
-                                      (band_month_avg['Month'] == request.month)]['avg_plf_band_month'].values[0]
-            
-            features = pd.DataFrame([{
-                'technology_encoded': tech_encoded,
-                'capacity_normalized': capacity_norm,
-                'capacity_band_encoded': band_encoded,
-                'Month': request.month,
-                'quarter': (request.month-1)//3 + 1,
-                'month_sin': np.sin(2 * np.pi * request.month / 12),
-                'month_cos': np.cos(2 * np.pi * request.month / 12),
-                'is_summer': 1 if request.month in [4,5,6] else 0,
-                'is_monsoon': 1 if request.month in [7,8,9] else 0,
-                'is_winter': 1 if request.month in [11,12,1,2] else 0,
-                'avg_plf_tech_month': avg_tech,
-                'avg_plf_band_month': avg_band,
-            }])
-            
-            predicted_plf = np.clip(base_model.predict(features)[0], 0, 1)
-        
-        electricity_kwh = calculate_electricity_generation(capacity, predicted_plf, request.year, request.month)
-        coal_required = calculate_coal_requirement(electricity_kwh, heat_rate, gcv, aux_consumption)
-        
-        return {
-            'plant_name': plant_name,
-            'capacity_mw': float(capacity),
-            'plf_percentage': float(predicted_plf * 100),
-            'electricity_mwh': float(electricity_kwh / 1000),
-            'coal_required_tonnes': float(coal_required),
-            'coal_grade': coal_grade,
-            'gcv_kcal_kg': float(gcv),
-        }
-        
+        keys, periods, skipped = export_selection(request, models)
+        encoder = make_encoder(request.format, request.gzip)
     except Exception as e:
+        errors_total.inc('forecast_export', mode)
         return JSONResponse(status_code=400, content={"error": str(e)})
+    plants_per_chunk = max(1, EXPORT_CHUNK_ROWS // len(periods))
+
+    async def body():
+        try:
+            for i in range(0, len(keys), plants_per_chunk):
+                yield await run_scoring(export_chunk, encoder, models, keys[i:i + plants_per_chunk], periods)
+            yield encoder.close()
+        except Exception:
+            errors_total.inc('forecast_export', mode)
+            raise
+        finally:
+            request_seconds.observe(time.perf_counter() - start, 'forecast_export', mode)
+
+    filename = f"coal_forecast_{format_period(int(periods[0]))}_{len(periods)}m.{encoder.extension}"
+    return StreamingResponse(body(), media_type=encoder.media_type, headers={
+        'Content-Disposition': f'attachment; filename="{filename}"',
+        'X-Model-Version': models.version,
+        'X-Export-Rows': str(len(keys) * len(periods)),
+        'X-Export-Skipped-Plants': str(skipped),
+    })
+
+@app.post("/forecast/units")
+async def predict_units(request: UnitForecastRequest, x_profile: str = Header(None)):
+    return await run_instrumented('forecast_units', 'units', forecast_units, request, profile=x_profile)
+
+@app.post("/planner/stock")
+async def plan_stocks(request: StockPlanRequest, x_profile: str = Header(None)):
+    return await run_instrumented('planner_stock', 'fleet', stock_plan, request, profile=x_profile)
+
+class ReloadRequest(BaseModel):
+    version: str = None
+    promote: bool = True
+
+@app.get("/admin/models")
+async def list_models(x_admin_token: str = Header(None)):
+    denied = check_admin_token(x_admin_token)
+    if denied:
+        return denied
+    return {
+        "active": active_models.version,
+        "latest": model_registry.latest_version(),
+        "versions": [
+            {"version": version, **model_registry.metrics(version)} for version in model_registry.versions()
+        ],
+    }
+
+@app.post("/admin/models/reload")
+async def reload(request: ReloadRequest = None, x_admin_token: str = Header(None)):
+    denied = check_admin_token(x_admin_token)
+    if denied:
+        return denied
+    request = request or ReloadRequest()
+    try:
+        previous = await reload_models(request.version)
+    except Exception as e:
+        return JSONResponse(status_code=400, content={
+            "error": f"Model reload failed, keeping {active_models.version}: {e}"
+        })
+
+    if request.version and request.promote:
+        model_registry.set_latest(request.version)
+    rejected_versions.discard(active_models.version)
+    return {"model_version": active_models.version, "previous_version": previous.version}
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,58 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from synthetic import REPO_ROOT
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched fleet LP vs one LP per plant for coal grade/source allocation")
+    parser.add_argument('--fleets', type=int, nargs='+', default=[50, 200, 800, 3200])
+    parser.add_argument('--months', type=int, default=12)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--loop-max', type=int, default=800, help="largest fleet also solved plant by plant")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(REPO_ROOT))
+    from coal_allocation import CEEW_FILES, allocate_plants, grade_options, load_price_table
+
+    plants, calibration = load_price_table([REPO_ROOT / path for path in CEEW_FILES])
+    rng = np.random.default_rng(0)
+
+    print(f"{len(plants)} CEEW plants resampled to each fleet size, {args.months} months, "
+          f"{len(grade_options())} options (seconds, best of {args.repeat})")
+    print(f"{'plants':>8}{'plant mix LP':>14}{'plant-month LP':>16}{'per-plant LPs':>15}{'speedup':>9}{'cost match':>12}")
+    for n_plants in args.fleets:
+        fleet = plants.iloc[rng.integers(0, len(plants), n_plants)]
+        # Heat demand in Gcal: capacity x PLF x hours x heat rate
+        energy = fleet['capacity'].to_numpy()[:, None] * rng.uniform(0.4, 0.85, (n_plants, args.months)) \
+            * 730 * 1000 * rng.uniform(2300, 2900, (n_plants, 1)) / 1e6
+
+        def best(fn):
+            times = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                result = fn()
+                times.append(time.perf_counter() - start)
+            return result, min(times)
+
+        batched, batched_seconds = best(lambda: allocate_plants(fleet, calibration, energy))
+        # A fleet import limit nobody reaches keeps every plant-month as its own block
+        blocks, blocks_seconds = best(lambda: allocate_plants(fleet, calibration, energy, import_limit=1e12))
+        costs = [blocks['cost'].sum()]
+
+        loop_seconds = float('nan')
+        if n_plants <= args.loop_max:
+            start = time.perf_counter()
+            looped = [allocate_plants(fleet.iloc[[p]], calibration, energy[[p]]) for p in range(n_plants)]
+            loop_seconds = time.perf_counter() - start
+            costs.append(sum(plan['cost'].sum() for plan in looped))
+        match = np.allclose(costs, batched['cost'].sum(), rtol=1e-6)
+
+        print(f"{n_plants:>8}{batched_seconds:>14.3f}{blocks_seconds:>16.3f}{loop_seconds:>15.3f}"
+              f"{loop_seconds / batched_seconds:>9.1f}{str(match):>12}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from synthetic import REPO_ROOT, prepare_workdir
+
+LOAD_STATE = (
+    "import time, sys; start = time.perf_counter(); "
+    "from startup_artifact import load_startup_state; "
+    "load_startup_state(sys.argv[1]); print(time.perf_counter() - start)"
+)
+
+
+def run(code, *args, env=None):
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, '-c', code, *args],
+        check=True, capture_output=True, text=True, env=env,
+    ).stdout
+    return time.perf_counter() - start, output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker cold-start time: source files vs prepared artifact")
+    parser.add_argument('--plants', type=int, default=2000)
+    parser.add_argument('--months', type=int, default=60)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--engine', choices=['lightgbm', 'native'], default='lightgbm')
+    args = parser.parse_args()
+
+    prepare_workdir(args.plants, n_months=args.months)
+    env = {**os.environ, 'PYTHONPATH': str(REPO_ROOT), 'INFERENCE_ENGINE': args.engine}
+
+    from startup_artifact import build_artifact
+    build_seconds = build_artifact('artifacts')
+    print(f"\n{args.plants} plants x {args.months} months, {args.engine} engine; "
+          f"artifact build took {build_seconds:.2f}s")
+
+    print(f"{'mode':<22}{'state load (s)':>16}{'app startup (s)':>17}")
+    for label, artifact_dir in [('source files', ''), ('artifact', 'artifacts')]:
+        load_times, app_times = [], []
+        for _ in range(args.repeat):
+            load_times.append(float(run(LOAD_STATE, artifact_dir, env=env)[1].strip().splitlines()[-1]))
+            app_times.append(run("import app; app.initialize()", env={**env, 'ARTIFACT_DIR': artifact_dir})[0])
+        print(f"{label:<22}{np.median(load_times):>16.3f}{np.median(app_times):>17.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from synthetic import prepare_workdir
+
+
+async def post(app, path, body):
+    """POST through the ASGI app and count the response bytes without keeping them."""
+    payload = json.dumps(body).encode()
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'POST', 'scheme': 'http',
+        'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(payload)).encode())],
+        'server': ('bench', 80), 'client': ('bench', 1),
+    }
+    received = False
+    result = {'status': None, 'bytes': 0, 'chunks': 0}
+
+    async def receive():
+        nonlocal received
+        if received:
+            await asyncio.Event().wait()
+        received = True
+        return {'type': 'http.request', 'body': payload, 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            result['status'] = message['status']
+        elif message.get('body'):
+            result['bytes'] += len(message['body'])
+            result['chunks'] += 1
+
+    await app(scope, receive, send)
+    return result
+
+
+def measure(app, path, body):
+    """Wall seconds, Python heap peak in MB (NumPy included) and the response of one request."""
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    result = asyncio.run(post(app, path, body))
+    wall = time.perf_counter() - start
+    peak = (tracemalloc.get_traced_memory()[1] - baseline) / 1e6
+    if result['status'] != 200:
+        raise RuntimeError(f"{path} returned {result['status']}")
+    return wall, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak memory and throughput of /forecast/export vs the JSON fleet batch")
+    parser.add_argument('--plants', type=int, default=1000)
+    parser.add_argument('--horizons', type=int, nargs='+', default=[100, 400], help="months; 1000 x 100 = 100k rows")
+    parser.add_argument('--max-peak-mb', type=float, default=64,
+                        help="fail when an export's heap peak exceeds this many MB")
+    args = parser.parse_args()
+
+    prepare_workdir(args.plants)
+    os.environ.update({'ARTIFACT_DIR': '', 'FORECAST_CACHE_SIZE': '0', 'GEM_CACHE_DIR': '',
+                       'MODEL_WATCH_INTERVAL': '0', 'COAL_STORE_WATCH_INTERVAL': '0', 'MODEL_REGISTRY_DIR': '',
+                       'MAX_HORIZON_MONTHS': str(max(args.horizons))})
+    import app
+    app.initialize()
+    tracemalloc.start()
+
+    print(f"\n{'request':<34}{'rows':>10}{'wall (s)':>10}{'rows/s':>11}{'MB out':>9}{'heap peak (MB)':>16}")
+    over_budget = []
+    for horizon in args.horizons:
+        body = {'start_year': 2025, 'start_month': 1, 'horizon_months': horizon}
+        cases = [(f'export {fmt}{" gzip" if gz else ""}', '/forecast/export', {**body, 'format': fmt, 'gzip': gz})
+                 for fmt, gz in [('csv', False), ('csv', True), ('ndjson', True), ('parquet', False)]]
+        # the JSON batch holds every result, so it is only run at the smallest horizon
+        if horizon == min(args.horizons):
+            cases.append(('batch fleet (JSON)', '/forecast/batch', {**body, 'fleet': True}))
+        for label, path, request in cases:
+            wall, peak, result = measure(app.app, path, request)
+            rows = args.plants * horizon
+            print(f"{label:<34}{rows:>10,}{wall:>10.2f}{rows / wall:>11,.0f}{result['bytes'] / 1e6:>9.1f}{peak:>16.1f}",
+                  flush=True)
+            if path == '/forecast/export' and peak > args.max_peak_mb:
+                over_budget.append(f"{label} at {rows:,} rows: {peak:.1f} MB")
+
+    if over_budget:
+        print(f"\nExport heap peak above {args.max_peak_mb:g} MB: " + '; '.join(over_budget))
+        sys.exit(1)
+    print(f"\nEvery export stayed under {args.max_peak_mb:g} MB of heap")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from synthetic import REPO_ROOT, prepare_workdir
+
+
+def unit_loop(app, request):
+    """Per plant, per unit and per month, one scalar at a time through the physics helpers: the baseline."""
+    from gem_units import GEM_UNIT_FILES, read_unit_tables
+
+    units = read_unit_tables(GEM_UNIT_FILES)
+    models = app.active_models
+    metadata = models.metadata
+    periods = request.start_year * 12 + request.start_month - 1 + np.arange(request.horizon_months)
+    totals = {}
+    for plant in sorted(set(units['plant'])):
+        rows = np.flatnonzero(units['plant'] == plant)
+        plant_capacity = units['capacity_mw'][rows].sum()
+        band = str(app.get_capacity_band_batch(plant_capacity))
+        coal = np.zeros(len(periods))
+        for u in rows:
+            technology = str(units['technology'][u])
+            gcv = app.NEW_PLANT_DEFAULTS.get(technology, app.NEW_PLANT_FALLBACK)[1]
+            for m, period in enumerate(periods):
+                year, month = int(period // 12), int(period % 12 + 1)
+                features = app.build_base_features(
+                    metadata, metadata['tech_map'][technology], plant_capacity, metadata['band_map'][band], month,
+                    models.tech_month_table.lookup(technology, month), models.band_month_table.lookup(band, month),
+                )
+                plf = np.clip(models.base_scorer.predict(features)[0], 0.30, 1.0)
+                electricity_kwh = app.calculate_electricity_generation_batch(units['capacity_mw'][u], plf, year, month)
+                coal[m] += app.calculate_coal_requirement_batch(electricity_kwh, units['heat_rate'][u], gcv, 8.0)
+        totals[plant] = coal
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GEM unit index load and the unit-resolution /forecast/units pass")
+    parser.add_argument('--plants', type=int, default=150)
+    parser.add_argument('--horizon', type=int, default=36)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = prepare_workdir(args.plants)
+    from gem_units import GEM_UNIT_FILES, load_unit_index
+    for name in GEM_UNIT_FILES:
+        os.symlink(REPO_ROOT / name, workdir / name)
+    os.environ.update({'MODEL_WATCH_INTERVAL': '0', 'COAL_STORE_WATCH_INTERVAL': '0', 'MODEL_REGISTRY_DIR': ''})
+
+    print(f"\n{'unit index load':<34}{'median (s)':>12}")
+    load_unit_index('gem_cache')
+    for label, cache_dir in [('source tables (csv + xlsx)', ''), ('binary cache', 'gem_cache')]:
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            index, _, _ = load_unit_index(cache_dir)
+            timings.append(time.perf_counter() - start)
+        print(f"{label:<34}{np.median(timings):>12.4f}")
+    print(f"{len(index)} units in {len(index.plants)} plants")
+
+    import app
+    app.initialize()
+    request = app.UnitForecastRequest(start_year=2025, start_month=1, horizon_months=args.horizon)
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        result = app.forecast_units(request)
+        timings.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    expected = unit_loop(app, request)
+    loop_seconds = time.perf_counter() - start
+
+    batch = {p['plant']: np.array(p['coal_required_tonnes']) for p in result['plants']}
+    error = max(np.max(np.abs(batch[plant] / coal - 1)) for plant, coal in expected.items())
+    cells = len(index) * args.horizon
+    print(f"\nAll {len(index)} GEM units x {args.horizon} months ({cells:,} unit-months)")
+    print(f"{'per-unit loop':<34}{loop_seconds:>12.3f} s")
+    print(f"{'forecast_units batch':<34}{np.median(timings):>12.3f} s  ({loop_seconds / np.median(timings):.0f}x)")
+    print(f"Max relative difference in plant coal: {error:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from synthetic import REPO_ROOT, prepare_workdir
+
+HEAVY_MODULES = ['pandas', 'lightgbm', 'sklearn', 'scipy', 'fastapi']
+TARGETS = [
+    ('physics library', 'import coal_forecasting_model', {}),
+    ('training CLI', 'import train_generalized_model', {}),
+    ('server module', 'import app', {}),
+    ('server startup, lightgbm engine', 'import app; app.initialize()', {'INFERENCE_ENGINE': 'lightgbm'}),
+    ('server startup, native engine', 'import app; app.initialize()', {'INFERENCE_ENGINE': 'native'}),
+]
+
+
+def import_profile(code, env, blocked=()):
+    """Wall seconds, summed top-level ``-X importtime`` seconds and the root packages imported."""
+    if blocked:
+        # a None entry in sys.modules makes the import raise ImportError, as if the package were not installed
+        code = f"import sys; sys.modules.update(dict.fromkeys({list(blocked)!r})); {code}"
+    start = time.perf_counter()
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], check=True, capture_output=True,
+                            text=True, env=env).stderr
+    wall = time.perf_counter() - start
+    total, modules = 0, set()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        modules.add(name.strip().split('.')[0])
+        # nested imports are indented below their parent and already counted in its cumulative time
+        if not name[1:].startswith(' '):
+            total += int(cumulative)
+    return wall, total / 1e6, modules - set(blocked)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="`python -X importtime` for the library, CLI and server entry points")
+    parser.add_argument('--plants', type=int, default=150)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--block', nargs='+', default=[], help="packages to treat as not installed, e.g. sklearn")
+    args = parser.parse_args()
+
+    prepare_workdir(args.plants)
+    from startup_artifact import build_artifact
+    build_artifact('artifacts')
+    env = {**os.environ, 'PYTHONPATH': str(REPO_ROOT), 'ARTIFACT_DIR': 'artifacts',
+           'MODEL_WATCH_INTERVAL': '0', 'COAL_STORE_WATCH_INTERVAL': '0'}
+
+    print(f"\n{'entry point':<34}{'wall (s)':>10}{'imports (s)':>13}  heavy modules loaded")
+    for label, code, extra in TARGETS:
+        walls, imports = [], []
+        for _ in range(args.repeat):
+            wall, seconds, modules = import_profile(code, {**env, **extra}, args.block)
+            walls.append(wall)
+            imports.append(seconds)
+        heavy = ', '.join(m for m in HEAVY_MODULES if m in modules) or '-'
+        print(f"{label:<34}{np.median(walls):>10.3f}{np.median(imports):>13.3f}  {heavy}")
+
+
+if __name__ == "__main__":
+    main()
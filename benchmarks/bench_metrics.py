@@ -0,0 +1,107 @@
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import timeit
+
+import numpy as np
+
+from synthetic import prepare_workdir
+
+METRIC_GLOBALS = ['requests_total', 'errors_total', 'cache_lookups_total', 'request_seconds', 'stage_seconds']
+
+
+def instrumentation_states(app, profile_dir):
+    """Module globals of ``app`` as METRICS_ENABLED=0, =1 and =1 with every request profiled."""
+    from instrumentation import MetricsRegistry, NullMetric, RequestProfiler
+
+    enabled = {name: getattr(app, name) for name in METRIC_GLOBALS + ['metrics', 'profiler']}
+    disabled = {**{name: NullMetric() for name in METRIC_GLOBALS}, 'metrics': MetricsRegistry(False),
+                'profiler': RequestProfiler()}
+    profiled = {**enabled, 'profiler': RequestProfiler(profile_dir, sample_rate=1.0)}
+    return {'metrics disabled': disabled, 'metrics enabled': enabled, 'every request profiled': profiled}
+
+
+def primitive_costs():
+    """Nanoseconds per call of each instrumentation primitive."""
+    from instrumentation import NULL_TIMER, MetricsRegistry
+
+    enabled, disabled = MetricsRegistry(True), MetricsRegistry(False)
+    counter, histogram = enabled.counter('c', 'c', ['a', 'b']), enabled.histogram('h', 'h', ['a', 'b'])
+    null_counter = disabled.counter('c', 'c', ['a', 'b'])
+    timer = enabled.timer(histogram, 'existing')
+    calls = {
+        'NULL_TIMER.mark': lambda: NULL_TIMER.mark('predict'),
+        'disabled counter inc': lambda: null_counter.inc('forecast', 'existing'),
+        'StageTimer.mark': lambda: timer.mark('predict'),
+        'Counter.inc': lambda: counter.inc('forecast', 'existing'),
+        'Histogram.observe': lambda: histogram.observe(0.001, 'forecast', 'existing'),
+    }
+    n = 200_000
+    return {name: min(timeit.repeat(fn, number=n, repeat=5)) / n * 1e9 for name, fn in calls.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/forecast latency with metrics and the profiler hook on and off")
+    parser.add_argument('--plants', type=int, default=150)
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--rounds', type=int, default=30)
+    args = parser.parse_args()
+
+    workdir = prepare_workdir(args.plants)
+    os.environ['MODEL_WATCH_INTERVAL'] = '0'
+    os.environ['COAL_STORE_WATCH_INTERVAL'] = '0'
+    import app
+    app.initialize()
+
+    rng = np.random.default_rng(1)
+    plant_keys = list(app.plant_records)
+    next_period = int(app.lag_store.last_period.max()) + 1
+    requests = [
+        app.ForecastRequest(is_new_plant=False, plant_key=plant_keys[i], year=next_period // 12,
+                            month=next_period % 12 + 1)
+        for i in rng.integers(0, len(plant_keys), args.requests)
+    ]
+    states = instrumentation_states(app, tempfile.mkdtemp(dir=workdir))
+    cache = app.forecast_cache
+    loop = asyncio.new_event_loop()
+
+    # Process-to-process variation is larger than the effect being measured, so the
+    # configurations are swapped in and out of one process, interleaved round by round
+    results = {}
+    for path, forecast_cache in [('scored (cache off)', None), ('cache hit', cache)]:
+        app.forecast_cache = forecast_cache
+        for request in requests:
+            loop.run_until_complete(app.predict(request, x_profile=None))
+        for _ in range(args.rounds):
+            for name, state in states.items():
+                for attribute, value in state.items():
+                    setattr(app, attribute, value)
+                timings = results.setdefault((path, name), [])
+                for request in requests:
+                    start = time.perf_counter()
+                    loop.run_until_complete(app.predict(request, x_profile=None))
+                    timings.append(time.perf_counter() - start)
+
+    print(f"\n/forecast for existing plants, {args.requests} requests x {args.rounds} interleaved rounds")
+    print(f"{'path':<20}{'configuration':<26}{'p50 (us)':>10}{'p99 (us)':>10}{'mean (us)':>11}{'vs disabled':>13}")
+    for (path, name), t in results.items():
+        t = np.array(t) * 1e6
+        baseline = np.percentile(results[path, 'metrics disabled'], 50) * 1e6
+        print(f"{path:<20}{name:<26}{np.percentile(t, 50):>10.1f}{np.percentile(t, 99):>10.1f}{t.mean():>11.1f}"
+              f"{np.percentile(t, 50) / baseline - 1:>+13.1%}")
+
+    costs = primitive_costs()
+    print(f"\n{'primitive':<24}{'ns/call':>10}")
+    for name, ns in costs.items():
+        print(f"{name:<24}{ns:>10.1f}")
+    # A scored request passes up to 9 timer marks, 2 counter sites and 1 histogram site
+    disabled_us = (9 * costs['NULL_TIMER.mark'] + 3 * costs['disabled counter inc']) / 1000
+    hit_p50 = np.percentile(results['cache hit', 'metrics disabled'], 50) * 1e6
+    print(f"Disabled instrumentation costs ~{disabled_us:.2f} us per request, "
+          f"{disabled_us / hit_p50:.2%} of a {hit_p50:.0f} us cache hit")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import argparse
+import asyncio
+import os
+import random
+import time
+
+import numpy as np
+
+from synthetic import prepare_workdir
+
+
+async def client_loop(client, payloads, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        payload = random.choice(payloads)
+        start = time.perf_counter()
+        response = await client.post('/forecast', json=payload)
+        latencies.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            errors.append(response.status_code)
+
+
+async def run_level(app, payloads, concurrency, duration):
+    import httpx
+
+    latencies, errors = [], []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://bench') as client:
+        deadline = time.perf_counter() + duration
+        start = time.perf_counter()
+        await asyncio.gather(*[client_loop(client, payloads, deadline, latencies, errors) for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+    latencies = np.array(latencies) * 1000
+    return len(latencies) / elapsed, np.percentile(latencies, 50), np.percentile(latencies, 99), len(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process asyncio load test of /forecast with and without "
+                                                 "micro-batching")
+    parser.add_argument('--plants', type=int, default=150)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--windows', type=float, nargs='+', default=[2, 5], help="batch windows to compare, ms")
+    parser.add_argument('--max-items', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=5.0)
+    args = parser.parse_args()
+
+    prepare_workdir(args.plants)
+    os.environ.update({'ARTIFACT_DIR': '', 'FORECAST_CACHE_SIZE': '0', 'GEM_CACHE_DIR': '',
+                       'MODEL_WATCH_INTERVAL': '0', 'COAL_STORE_WATCH_INTERVAL': '0', 'MODEL_REGISTRY_DIR': ''})
+    import app
+    app.initialize()
+
+    random.seed(0)
+    payloads = [{'is_new_plant': False, 'plant_key': key, 'year': 2026, 'month': month}
+                for key in app.plant_records for month in range(1, 13)]
+    payloads += [{'is_new_plant': True, 'capacity': capacity, 'technology': technology, 'year': 2026, 'month': month}
+                 for capacity in (250, 800, 2000) for technology in ('Subcritical', 'Supercritical')
+                 for month in range(1, 13)]
+
+    sizes = []
+    configs = [('off', None)] + [
+        (f'{window:g} ms', app.RequestBatcher(app.forecast_coalesced, app.run_scoring, window / 1000, args.max_items,
+                                              lambda size, waits: sizes.append(size)))
+        for window in args.windows
+    ]
+    print(f"\nScored /forecast (cache off), {args.duration:g}s per level")
+    print(f"{'batching':<10}{'clients':>8}{'req/s':>10}{'p50 (ms)':>10}{'p99 (ms)':>10}{'mean batch':>12}{'errors':>8}")
+    for label, batcher in configs:
+        app.forecast_batcher = batcher
+        for concurrency in args.concurrency:
+            sizes.clear()
+            throughput, p50, p99, errors = asyncio.run(run_level(app.app, payloads, concurrency, args.duration))
+            batch = f"{np.mean(sizes):.1f}" if sizes else '-'
+            print(f"{label:<10}{concurrency:>8}{throughput:>10.0f}{p50:>10.2f}{p99:>10.2f}{batch:>12}{errors:>8}",
+                  flush=True)
+
+
+if __name__ == "__main__":
+    main()
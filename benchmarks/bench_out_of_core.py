@@ -0,0 +1,70 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from synthetic import REPO_ROOT, prepare_workdir
+
+
+def train(data, extra_args, env, run_dir):
+    """Wall seconds, peak RSS in MB and the base/enhanced RMSE of one training run in a fresh process."""
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, str(REPO_ROOT / 'train_generalized_model.py'), *extra_args],
+                               stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                               env={**env, 'TRAIN_DATA': str(data)}, cwd=run_dir)
+    output = process.stdout.read()
+    # ru_maxrss of the reaped child is its own high-water mark, in KB on Linux
+    _, status, usage = os.wait4(process.pid, 0)
+    wall = time.perf_counter() - start
+    if os.waitstatus_to_exitcode(status) != 0:
+        raise RuntimeError(f"training failed:\n{output[-2000:]}")
+    rmse = re.findall(r'Model \(.*\): RMSE = ([0-9.]+)', output)
+    return wall, usage.ru_maxrss / 1024, rmse
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak RSS and wall time of in-memory vs out-of-core training")
+    parser.add_argument('--units', type=int, default=2000, help="daily unit series; 2000 x 14 years = ~10.2M rows")
+    parser.add_argument('--years', type=int, default=14)
+    parser.add_argument('--budgets', type=int, nargs='+', default=[128, 512], help="--memory-budget values, MB")
+    parser.add_argument('--plants', type=int, default=10_000, help="monthly plants for the in-memory comparison")
+    parser.add_argument('--months', type=int, default=100)
+    parser.add_argument('--rounds', type=int, default=50)
+    args = parser.parse_args()
+
+    workdir = prepare_workdir()
+    env = {**os.environ, 'MODEL_REGISTRY_DIR': '', 'FEATURE_CACHE_DIR': '', 'TRAIN_WORK_DIR': str(workdir)}
+    common = ['--rounds', str(args.rounds), '--no-quantiles']
+    # the workdir's model files link to the repo's, so the trained models are written elsewhere
+    run_dir = workdir / 'run'
+    run_dir.mkdir()
+
+    print("Generating data...", flush=True)
+    monthly, units = workdir / 'monthly.csv', workdir / 'units'
+    # Linux carries the parent's peak RSS into a child's ru_maxrss across fork and exec, so the
+    # frames are generated in a process of their own and this one stays smaller than any run
+    subprocess.run([sys.executable, '-c', f"from synthetic import make_reference_frame, make_unit_daily_partitions; "
+                    f"make_reference_frame({args.plants}, start_year=2010, n_months={args.months}, seed=1)"
+                    f".to_csv({str(monthly)!r}, index=False); "
+                    f"make_unit_daily_partitions({str(units)!r}, {args.units}, n_years={args.years})"],
+                   check=True, cwd=Path(__file__).resolve().parent)
+
+    runs = [(f'monthly {args.plants * args.months:,} rows', 'in memory', monthly, [])]
+    runs += [(f'monthly {args.plants * args.months:,} rows', f'out of core, {budget} MB', monthly,
+              ['--out-of-core', '--memory-budget', str(budget)]) for budget in args.budgets]
+    # the in-memory trainer reads one CSV and keys lags by plant, so the unit partitions are out of core only
+    runs += [(f'unit-daily ~{round(args.units * args.years * 365.25):,} rows', f'out of core, {budget} MB', units,
+              ['--out-of-core', '--series-key', 'unit_key', '--memory-budget', str(budget)])
+             for budget in args.budgets]
+
+    print(f"\n{'dataset':<30}{'mode':<22}{'wall (s)':>10}{'peak RSS (MB)':>15}  base / enhanced RMSE")
+    for dataset, mode, data, extra in runs:
+        wall, rss, rmse = train(data, extra + common, env, run_dir)
+        print(f"{dataset:<30}{mode:<22}{wall:>10.1f}{rss:>15.0f}  {' / '.join(rmse)}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import asyncio
+import os
+import time
+
+import numpy as np
+
+from synthetic import prepare_workdir
+
+
+def time_per_call(fn, requests, repeat):
+    timings = []
+    for _ in range(repeat):
+        for request in requests:
+            start = time.perf_counter()
+            fn(request)
+            timings.append(time.perf_counter() - start)
+    return np.array(timings) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantile PLF intervals: calibration and scoring overhead")
+    parser.add_argument('--plants', type=int, default=150)
+    parser.add_argument('--months', type=int, default=12)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--engine', choices=['lightgbm', 'native'], default='lightgbm')
+    args = parser.parse_args()
+
+    prepare_workdir(args.plants)
+    os.environ['INFERENCE_ENGINE'] = args.engine
+    os.environ['FORECAST_CACHE_SIZE'] = '0'
+    os.environ['MODEL_WATCH_INTERVAL'] = '0'
+
+    from feature_pipeline import BASE_FEATURES, add_fleet_features, load_training_frame, plant_local_features
+    from startup_artifact import QUANTILE_MODEL_FILES
+    from train_generalized_model import DEFAULT_PARAMS, fit_quantile_models, stage_seconds
+
+    df, _ = add_fleet_features(plant_local_features(load_training_frame('FINAL_MERGED_DATA.csv')))
+    quantile_models, metrics = fit_quantile_models(df, BASE_FEATURES, DEFAULT_PARAMS)
+    for model, path in zip(quantile_models, QUANTILE_MODEL_FILES.values()):
+        model.save_model(path)
+
+    import app
+    app.initialize()
+
+    request = app.BatchForecastRequest(fleet=True, start_year=2025, start_month=11, horizon_months=args.months)
+    models = app.active_models
+    quantile_scorer = models.quantile_scorer
+
+    def fleet_seconds(scorer):
+        models.quantile_scorer = scorer
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            app.forecast_fleet(request, models)
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    rng = np.random.default_rng(1)
+    plant_keys = list(app.plant_records)
+    next_period = int(app.lag_store.last_period.max()) + 1
+    requests = [
+        app.ForecastRequest(is_new_plant=False, plant_key=plant_keys[i], year=next_period // 12,
+                            month=next_period % 12 + 1)
+        for i in rng.integers(0, len(plant_keys), args.requests)
+    ]
+    loop = asyncio.new_event_loop()
+
+    def single_latency(scorer):
+        models.quantile_scorer = scorer
+        return time_per_call(lambda r: loop.run_until_complete(app.predict(r)), requests, args.repeat)
+
+    fleet = {'point only': fleet_seconds(None), 'point + P10/P50/P90': fleet_seconds(quantile_scorer)}
+    single = {'point only': single_latency(None), 'point + P10/P50/P90': single_latency(quantile_scorer)}
+
+    print(f"\nQuantile models trained in {stage_seconds['fit_quantiles']:.2f}s on one shared Dataset "
+          f"(best iterations {metrics['best_iterations']})")
+    print(f"Time-split test coverage of [P10, P90]: {metrics['coverage']:.3f} (nominal {metrics['nominal_coverage']:.2f}), "
+          f"below {metrics['below_lower']:.3f}, above {metrics['above_upper']:.3f}, "
+          f"crossing rate {metrics['crossing_rate']:.3f}")
+    print(f"Pinball loss: {', '.join(f'{a}: {v:.4f}' for a, v in metrics['pinball_loss'].items())}")
+
+    print(f"\n{args.engine} engine, fleet batch of {len(app.plant_records) * args.months:,} plant-months (best of {args.repeat})")
+    print(f"{'path':<24}{'seconds':>10}{'overhead':>10}")
+    for name, seconds in fleet.items():
+        print(f"{name:<24}{seconds:>10.4f}{seconds / fleet['point only'] - 1:>10.1%}")
+
+    print(f"\nSingle /forecast, {args.requests} requests x {args.repeat} repeats")
+    print(f"{'path':<24}{'p50 (us)':>12}{'p99 (us)':>12}{'mean (us)':>12}")
+    for name, t in single.items():
+        print(f"{name:<24}{np.percentile(t, 50):>12.1f}{np.percentile(t, 99):>12.1f}{t.mean():>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import argparse
+import asyncio
+import time
+
+import numpy as np
+import pandas as pd
+
+from synthetic import prepare_workdir
+
+
+def legacy_existing_plant(app, df_reference, request):
+    plant_data = df_reference[df_reference['plant_key'] == request.plant_key]
+    latest = plant_data.iloc[-1]
+    capacity = latest['Capacity']
+    technology = latest['Technology']
+    heat_rate = latest.get('Actual SHR', 2750)
+    gcv = latest['Estimated_GCV_kcal_per_kg']
+    aux_consumption = latest.get('Auxiliary consumption (%)', 8.0)
+
+    metadata = app.active_models.metadata
+    capacity_norm = (capacity - metadata['capacity_stats']['mean']) / metadata['capacity_stats']['std']
+    band = str(app.get_capacity_band_batch(capacity))
+
+    tech_month_avg = pd.DataFrame(metadata['tech_month_avg'])
+    band_month_avg = pd.DataFrame(metadata['band_month_avg'])
+    avg_tech = tech_month_avg[(tech_month_avg['Technology'] == technology) &
+                              (tech_month_avg['Month'] == request.month)]['avg_plf_tech_month'].values[0]
+    avg_band = band_month_avg[(band_month_avg['capacity_band'] == band) &
+                              (band_month_avg['Month'] == request.month)]['avg_plf_band_month'].values[0]
+
+    features = pd.DataFrame([{
+        'technology_encoded': metadata['tech_map'].get(technology, 0),
+        'capacity_normalized': capacity_norm,
+        'capacity_band_encoded': metadata['band_map'][band],
+        'Month': request.month,
+        'quarter': (request.month-1)//3 + 1,
+        'month_sin': np.sin(2 * np.pi * request.month / 12),
+        'month_cos': np.cos(2 * np.pi * request.month / 12),
+        'is_summer': 1 if request.month in [4,5,6] else 0,
+        'is_monsoon': 1 if request.month in [7,8,9] else 0,
+        'is_winter': 1 if request.month in [11,12,1,2] else 0,
+        'avg_plf_tech_month': avg_tech,
+        'avg_plf_band_month': avg_band,
+    }])
+    predicted_plf = np.clip(app.active_models.base_model.predict(features)[0], 0, 1)
+    electricity_kwh = app.calculate_electricity_generation_batch(capacity, predicted_plf, request.year, request.month)
+    return app.calculate_coal_requirement_batch(electricity_kwh, heat_rate, gcv, aux_consumption)
+
+
+def time_per_call(fn, requests, repeat):
+    timings = []
+    for _ in range(repeat):
+        for request in requests:
+            start = time.perf_counter()
+            fn(request)
+            timings.append(time.perf_counter() - start)
+    return np.array(timings) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-request /forecast latency before and after lookup tables")
+    parser.add_argument('--plants', type=int, default=150)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    prepare_workdir(args.plants)
+    import app
+    app.initialize()
+    df_reference = pd.read_csv('FINAL_MERGED_DATA.csv')
+    df_reference = df_reference[df_reference['Capacity'].notna()]
+
+    rng = np.random.default_rng(1)
+    plant_keys = list(app.plant_records)
+    next_period = int(app.lag_store.last_period.max()) + 1
+    requests = [
+        app.ForecastRequest(is_new_plant=False, plant_key=plant_keys[i], year=next_period // 12,
+                            month=next_period % 12 + 1)
+        for i in rng.integers(0, len(plant_keys), args.requests)
+    ]
+
+    loop = asyncio.new_event_loop()
+    results = {
+        'legacy (DataFrame rebuild + table scan)': time_per_call(
+            lambda r: legacy_existing_plant(app, df_reference, r), requests, args.repeat),
+        'lookup tables': time_per_call(
+            lambda r: loop.run_until_complete(app.predict(r)), requests, args.repeat),
+    }
+
+    print(f"\n{args.plants} plants, {args.requests} requests x {args.repeat} repeats")
+    print(f"{'path':<42}{'p50 (us)':>12}{'p99 (us)':>12}{'mean (us)':>12}")
+    for name, t in results.items():
+        print(f"{name:<42}{np.percentile(t, 50):>12.1f}{np.percentile(t, 99):>12.1f}{t.mean():>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
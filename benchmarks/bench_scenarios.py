@@ -0,0 +1,60 @@
+import argparse
+import time
+
+import numpy as np
+
+from synthetic import prepare_workdir
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Scenario engine: broadcast plants x months x scenarios vs the per-call loop"
+    )
+    parser.add_argument('--plants', type=int, default=500)
+    parser.add_argument('--months', type=int, default=60)
+    parser.add_argument('--loop-sample', type=int, default=500,
+                        help="loop calls to time; the full loop cost is extrapolated from them")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    prepare_workdir(args.plants)
+    import coal_forecasting_model as cfm
+
+    plant_keys = cfm.df['plant_key'].unique()[:args.plants]
+    months_since = 2025 * 12 + np.arange(args.months)
+    years, months = months_since // 12, months_since % 12 + 1
+    grid = cfm.plf_grid()
+    n_cells = len(plant_keys) * args.months * len(grid)
+
+    rng = np.random.default_rng(0)
+    sample = [
+        (plant_keys[p], int(years[m]), int(months[m]), float(grid[s]))
+        for p, m, s in zip(rng.integers(0, len(plant_keys), args.loop_sample),
+                           rng.integers(0, args.months, args.loop_sample),
+                           rng.integers(0, len(grid), args.loop_sample))
+    ]
+    start = time.perf_counter()
+    for key, y, m, plf in sample:
+        cfm.forecast_coal_demand(key, y, m, target_plf=plf)
+    per_call = (time.perf_counter() - start) / len(sample)
+
+    cube_times, tidy_times = [], []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        cfm.forecast_scenarios(plant_keys, years, months, target_plf=grid, tidy=False)
+        cube_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        frame = cfm.forecast_scenarios(plant_keys, years, months, target_plf=grid)
+        tidy_times.append(time.perf_counter() - start)
+
+    print(f"\n{len(plant_keys)} plants x {args.months} months x {len(grid)} PLF scenarios = {n_cells:,} cells")
+    print(f"{'path':<38}{'seconds':>12}{'cells/s':>14}")
+    print(f"{'loop (extrapolated)':<38}{per_call * n_cells:>12.2f}{1 / per_call:>14,.0f}")
+    for label, times in [('scenario cube (tidy=False)', cube_times), ('scenario DataFrame (tidy=True)', tidy_times)]:
+        best = min(times)
+        print(f"{label:<38}{best:>12.4f}{n_cells / best:>14,.0f}")
+    print(f"Tidy frame: {len(frame):,} rows, {frame.memory_usage(deep=True).sum() / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from synthetic import make_coal_frame, prepare_workdir
+
+
+def loop_plan(opening_stock, consumption, receipts, days, target_days):
+    """Month-by-month, plant-by-plant reference for ``plan_stock``; tests/test_stock_planner.py compares the two."""
+    n_plants, n_months = consumption.shape
+    stock = np.empty((n_plants, n_months))
+    gap = np.empty((n_plants, n_months))
+    days_to_stockout = np.full(n_plants, np.inf)
+    for p in range(n_plants):
+        level, shortfall, elapsed = opening_stock[p], 0.0, 0.0
+        for m in range(n_months):
+            planned = receipts[p, m].sum()
+            draw = (consumption[p, m] - planned) / days[m]
+            previous = level
+            level += planned - consumption[p, m]
+            if level <= 0 and np.isinf(days_to_stockout[p]):
+                days_to_stockout[p] = elapsed + (max(previous, 0) / draw if draw > 0 else 0)
+            needed = max(target_days * consumption[p, m] / days[m] - level, 0)
+            gap[p, m] = max(needed - shortfall, 0)
+            shortfall = max(shortfall, needed)
+            stock[p, m] = level
+            elapsed += days[m]
+    return {'stock': stock, 'gap': gap, 'days_to_stockout': days_to_stockout}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stock-days / procurement-gap planner over the fleet")
+    parser.add_argument('--plants', type=int, default=500)
+    parser.add_argument('--months', type=int, default=36)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    prepare_workdir(args.plants)
+    keys = pd.read_csv('FINAL_MERGED_DATA.csv')['plant_key'].unique()
+    make_coal_frame(args.plants, n_months=22, names=keys).to_csv('coal.csv', index=False)
+
+    from coal_stock_store import CoalStockStore
+    CoalStockStore('coal_store').ingest('coal.csv')
+    import app
+    app.initialize()
+    from stock_planner import plan_stock
+
+    rng = np.random.default_rng(0)
+    opening = rng.uniform(50_000, 600_000, args.plants)
+    consumption = rng.uniform(100_000, 500_000, (args.plants, args.months))
+    receipts = rng.dirichlet([4, 1, 1, 1, 1, 1, 1], (args.plants, args.months)) * \
+        rng.uniform(80_000, 450_000, (args.plants, args.months))[:, :, None]
+    periods = 2025 * 12 + 10 + np.arange(args.months)
+    days = app.days_in_month(periods // 12, periods % 12 + 1)
+
+    start = time.perf_counter()
+    loop_plan(opening, consumption, receipts, days, 20)
+    loop_seconds = time.perf_counter() - start
+
+    vector_times = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        plan_stock(opening, consumption, receipts, days, 20)
+        vector_times.append(time.perf_counter() - start)
+
+    endpoint_times = {}
+    for monthly in (False, True):
+        request = app.StockPlanRequest(horizon_months=args.months, monthly=monthly)
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = app.stock_plan(request)
+            times.append(time.perf_counter() - start)
+        endpoint_times[monthly] = min(times)
+
+    cells = args.plants * args.months
+    print(f"\n{args.plants} plants x {args.months} months = {cells:,} plant-months")
+    print(f"{'path':<46}{'seconds':>10}{'plant-months/s':>16}")
+    print(f"{'per-plant loop (plan only)':<46}{loop_seconds:>10.4f}{cells / loop_seconds:>16,.0f}")
+    print(f"{'plan_stock cumulative pass (plan only)':<46}{min(vector_times):>10.4f}{cells / min(vector_times):>16,.0f}")
+    print(f"{'stock_plan: forecast + plan, summary only':<46}{endpoint_times[False]:>10.4f}"
+          f"{cells / endpoint_times[False]:>16,.0f}")
+    print(f"{'stock_plan: forecast + plan, monthly detail':<46}{endpoint_times[True]:>10.4f}"
+          f"{cells / endpoint_times[True]:>16,.0f}")
+    print(f"Planned {result['fleet']['plants']} plants; most critical: {result['plants'][0]['plant_key']} "
+          f"({result['plants'][0]['days_to_stockout']} days to stockout)")
+
+
+if __name__ == "__main__":
+    main()
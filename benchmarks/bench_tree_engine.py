@@ -0,0 +1,101 @@
+import argparse
+import pickle
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import lightgbm as lgb
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from tree_engine import CompiledEnsemble
+
+TOLERANCE = 1e-9
+
+
+def training_feature_grid(metadata, with_lags=False, seed=0):
+    tech_avg = pd.DataFrame(metadata['tech_month_avg'])
+    band_avg = pd.DataFrame(metadata['band_month_avg'])
+    stats = metadata['capacity_stats']
+
+    grid = pd.MultiIndex.from_product([
+        list(metadata['tech_map']),
+        np.linspace(50, 5000, 100),
+        range(1, 13),
+    ], names=['Technology', 'Capacity', 'Month']).to_frame(index=False)
+    grid['capacity_band'] = np.where(grid['Capacity'] < 500, 'Small',
+                                     np.where(grid['Capacity'] < 1500, 'Medium', 'Large'))
+    grid = grid.merge(tech_avg, on=['Technology', 'Month'], how='left')
+    grid = grid.merge(band_avg, on=['capacity_band', 'Month'], how='left')
+
+    month = grid['Month']
+    grid['technology_encoded'] = grid['Technology'].map(metadata['tech_map'])
+    grid['capacity_normalized'] = (grid['Capacity'] - stats['mean']) / stats['std']
+    grid['capacity_band_encoded'] = grid['capacity_band'].map(metadata['band_map'])
+    grid['quarter'] = (month - 1) // 3 + 1
+    grid['month_sin'] = np.sin(2 * np.pi * month / 12)
+    grid['month_cos'] = np.cos(2 * np.pi * month / 12)
+    grid['is_summer'] = month.isin([4, 5, 6]).astype(int)
+    grid['is_monsoon'] = month.isin([7, 8, 9]).astype(int)
+    grid['is_winter'] = month.isin([11, 12, 1, 2]).astype(int)
+
+    if not with_lags:
+        return grid[metadata['base_features']]
+
+    rng = np.random.default_rng(seed)
+    for column in ['PLF_lag1', 'PLF_lag3', 'PLF_rolling_mean_3']:
+        grid[column] = rng.uniform(0, 1, len(grid))
+        grid.loc[rng.random(len(grid)) < 0.05, column] = np.nan
+    return grid[metadata['enhanced_features']]
+
+
+def verify(booster, compiled, X):
+    expected = booster.predict(X)
+    actual = compiled.predict(X)
+    max_diff = float(np.abs(expected - actual).max())
+    assert max_diff <= TOLERANCE, f"compiled ensemble differs from Booster.predict by {max_diff}"
+    return max_diff
+
+
+def time_call(fn, X, min_seconds=0.5):
+    fn(X)
+    runs = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_seconds:
+        fn(X)
+        runs += 1
+    return (time.perf_counter() - start) / runs * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify and benchmark the compiled tree ensemble against LightGBM")
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 100, 10000])
+    args = parser.parse_args()
+
+    with open(REPO_ROOT / 'generalized_model_metadata.pkl', 'rb') as f:
+        metadata = pickle.load(f)
+
+    for model_file, with_lags in [('plf_base_model.txt', False), ('plf_enhanced_model.txt', True)]:
+        booster = lgb.Booster(model_file=str(REPO_ROOT / model_file))
+        compiled = CompiledEnsemble.from_model_file(REPO_ROOT / model_file)
+        grid = training_feature_grid(metadata, with_lags=with_lags)
+
+        max_diff = verify(booster, compiled, grid.to_numpy(dtype=float))
+        print(f"\n{model_file}: {compiled.num_trees} trees, verified on {len(grid)} grid rows "
+              f"(max |diff| = {max_diff:.2e})")
+
+        print(f"{'batch':>8}{'Booster(DataFrame) ms':>24}{'Booster(ndarray) ms':>22}{'compiled ms':>14}")
+        for n in args.batch_sizes:
+            X = grid.sample(n, replace=True, random_state=n)
+            X_np = X.to_numpy(dtype=float)
+            print(f"{n:>8}"
+                  f"{time_call(booster.predict, X):>24.3f}"
+                  f"{time_call(booster.predict, X_np):>22.3f}"
+                  f"{time_call(compiled.predict, X_np):>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from synthetic import prepare_workdir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo P10/P50/P90 coal tonnage across the fleet")
+    parser.add_argument('--plants', type=int, default=150)
+    parser.add_argument('--months', type=int, default=12)
+    parser.add_argument('--samples', type=int, default=20000)
+    args = parser.parse_args()
+
+    prepare_workdir(args.plants)
+    import app
+    import uncertainty
+    app.initialize()
+
+    app.UNCERTAINTY_SAMPLES = args.samples
+    request = app.BatchForecastRequest(fleet=True, start_year=2025, start_month=11, horizon_months=args.months)
+
+    start = time.perf_counter()
+    point = app.forecast_fleet(request)
+    point_seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    app.forecast_fleet(request, uncertainty=True)
+    batch_seconds = time.perf_counter() - start
+    batch_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    results = point['results']
+    rows = app.lag_store.rows_for([r['plant_key'] for r in results])
+    year = np.array([r['year'] for r in results])
+    month = np.array([r['month'] for r in results])
+    metadata = app.active_models.metadata
+    residuals = uncertainty.ResidualDistribution(metadata.get('enhanced_residuals'), metadata['enhanced_metrics']['rmse'])
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    plants = 0
+    for plant_key, plant_rows, quantiles in uncertainty.iter_plant_quantiles(
+        [r['plant_key'] for r in results],
+        np.array([r['plf_percentage'] / 100 for r in results]),
+        app.fleet['capacity'][rows] * 24 * app.days_in_month(year, month) * 1000,
+        app.fleet['heat_rate'][rows], app.fleet['gcv'][rows], app.fleet['coal_grade'][rows],
+        app.fleet['aux_consumption'][rows], residuals, args.samples,
+    ):
+        plants += 1
+    stream_seconds = time.perf_counter() - start
+    stream_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    draws = len(results) * args.samples
+    print(f"\n{args.plants} plants x {args.months} months x {args.samples:,} samples = {draws:,} joint draws")
+    print(f"{'path':<36}{'seconds':>10}{'draws/s':>14}{'peak MB':>10}")
+    print(f"{'point forecast only':<36}{point_seconds:>10.2f}{'':>14}{'':>10}")
+    print(f"{'batch with P10/P50/P90':<36}{batch_seconds:>10.2f}{draws / batch_seconds:>14,.0f}{batch_peak / 1e6:>10.1f}")
+    print(f"{'streamed per plant (' + str(plants) + ' plants)':<36}{stream_seconds:>10.2f}"
+          f"{draws / stream_seconds:>14,.0f}{stream_peak / 1e6:>10.1f}")
+    print(f"Full sample tensor would need {draws * 4 / 1e6:,.0f} MB as float32")
+
+
+if __name__ == "__main__":
+    main()
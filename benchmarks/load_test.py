@@ -0,0 +1,66 @@
+import argparse
+import asyncio
+import random
+import time
+
+import numpy as np
+import httpx
+
+
+async def client_loop(client, payloads, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        payload = random.choice(payloads)
+        start = time.perf_counter()
+        response = await client.post('/forecast', json=payload)
+        latencies.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            errors.append(response.status_code)
+
+
+async def run_level(url, payloads, concurrency, duration):
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + duration
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            client_loop(client, payloads, deadline, latencies, errors) for _ in range(concurrency)
+        ])
+        elapsed = time.perf_counter() - start
+    latencies = np.array(latencies) * 1000
+    return len(latencies) / elapsed, np.percentile(latencies, 50), np.percentile(latencies, 99), len(errors)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Local load test for POST /forecast")
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--year', type=int, default=None)
+    parser.add_argument('--month', type=int, default=None)
+    args = parser.parse_args()
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=60) as client:
+        plant_keys = (await client.get('/plants')).json()
+
+    payloads = [
+        {'is_new_plant': False, 'plant_key': key,
+         'year': args.year or 2026, 'month': args.month or month}
+        for key in plant_keys for month in range(1, 13)
+    ]
+    payloads += [
+        {'is_new_plant': True, 'capacity': capacity, 'technology': technology,
+         'year': args.year or 2026, 'month': args.month or month}
+        for capacity in (250, 800, 2000) for technology in ('Subcritical', 'Supercritical')
+        for month in range(1, 13)
+    ]
+
+    print(f"{args.url} /forecast, {args.duration:.0f}s per level")
+    print(f"{'clients':>8}{'req/s':>10}{'p50 (ms)':>10}{'p99 (ms)':>10}{'errors':>8}")
+    for concurrency in args.concurrency:
+        throughput, p50, p99, errors = await run_level(args.url, payloads, concurrency, args.duration)
+        print(f"{concurrency:>8}{throughput:>10.1f}{p50:>10.2f}{p99:>10.2f}{errors:>8}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,270 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Single-threaded native code keeps timings comparable between runs and machines
+os.environ.setdefault('OMP_NUM_THREADS', '1')
+os.environ.update({
+    'MODEL_WATCH_INTERVAL': '0',
+    'COAL_STORE_WATCH_INTERVAL': '0',
+    'FORECAST_CACHE_SIZE': '0',
+    'TRAIN_NUM_THREADS': '1',
+})
+
+import numpy as np
+
+from synthetic import REPO_ROOT, make_reference_frame, prepare_workdir
+
+BENCH_DIR = Path(__file__).resolve().parent
+BASELINE_FILE = BENCH_DIR / 'baseline.json'
+RESULTS_DIR = BENCH_DIR / 'results'
+
+
+def measure(fn, repeat, number=1, warmup=1):
+    """Seconds per call of ``fn``: one figure per repeat, each the mean of ``number`` calls."""
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        timings.append((time.perf_counter() - start) / number)
+    return timings
+
+
+def bench_startup(args):
+    """Fresh-process worker startup (``import app`` and ``app.initialize()``) and bare module imports."""
+    from startup_artifact import build_artifact
+
+    build_artifact('artifacts')
+    env = {**os.environ, 'PYTHONPATH': str(REPO_ROOT)}
+    runs = {
+        'startup.import_app.source_files': ('import app; app.initialize()', ''),
+        'startup.import_app.artifact': ('import app; app.initialize()', 'artifacts'),
+        'startup.import_only.app': ('import app', 'artifacts'),
+        'startup.import_only.coal_forecasting_model': ('import coal_forecasting_model', 'artifacts'),
+    }
+    results = {}
+    for name, (code, artifact_dir) in runs.items():
+        run = lambda: subprocess.run([sys.executable, '-c', code], check=True, capture_output=True,
+                                     env={**env, 'ARTIFACT_DIR': artifact_dir})
+        results[name] = measure(run, args.repeat, warmup=1)
+    return results
+
+
+def bench_forecast_api(args):
+    """``/forecast`` and ``/forecast/batch`` end to end through the ASGI test client."""
+    import app
+    from fastapi.testclient import TestClient
+
+    app.initialize()
+
+    client = TestClient(app.app)
+    plant_keys = list(app.plant_records)
+    next_period = int(app.lag_store.last_period.max()) + 1
+    year, month = next_period // 12, next_period % 12 + 1
+    existing = [{'is_new_plant': False, 'plant_key': key, 'year': year, 'month': month} for key in plant_keys[:50]]
+    new = [{'is_new_plant': True, 'capacity': capacity, 'technology': 'Subcritical', 'year': year, 'month': month}
+           for capacity in np.linspace(200, 2000, 50)]
+
+    def post_all(path, bodies):
+        for body in bodies:
+            response = client.post(path, json=body)
+            assert response.status_code == 200, response.text
+
+    fleet = {'fleet': True, 'start_year': year, 'start_month': month, 'horizon_months': 12}
+    return {
+        'forecast_api.single_existing': [t / len(existing) for t in measure(lambda: post_all('/forecast', existing),
+                                                                            args.repeat)],
+        'forecast_api.single_new': [t / len(new) for t in measure(lambda: post_all('/forecast', new), args.repeat)],
+        'forecast_api.batch_items_100': measure(lambda: post_all('/forecast/batch', [{'items': existing + new}]),
+                                                args.repeat),
+        'forecast_api.batch_fleet_12m': measure(lambda: post_all('/forecast/batch', [fleet]), args.repeat),
+    }
+
+
+def bench_booster_predict(args):
+    """Raw ``lgb.Booster.predict`` on NumPy feature rows at several batch sizes."""
+    import pickle
+
+    import lightgbm as lgb
+    from bench_tree_engine import training_feature_grid
+
+    with open(REPO_ROOT / 'generalized_model_metadata.pkl', 'rb') as f:
+        metadata = pickle.load(f)
+    results = {}
+    for name, with_lags in [('base', False), ('enhanced', True)]:
+        booster = lgb.Booster(model_file=str(REPO_ROOT / f'plf_{name}_model.txt'))
+        grid = training_feature_grid(metadata, with_lags).to_numpy(dtype=float)
+        for size in args.batch_sizes:
+            X = np.resize(grid, (size, grid.shape[1]))
+            number = max(1, 1000 // size)
+            results[f'booster_predict.{name}.batch_{size}'] = measure(lambda: booster.predict(X), args.repeat, number)
+    return results
+
+
+def bench_physics(args):
+    """``forecast_coal_demand`` called across the fleet, and the broadcast scenario engine."""
+    import coal_forecasting_model as cfm
+
+    plant_keys = cfm.df['plant_key'].unique()
+    calls = [(key, 2025 + m // 12, m % 12 + 1) for m in range(12) for key in plant_keys]
+
+    def loop():
+        for key, year, month in calls:
+            cfm.forecast_coal_demand(key, year, month, target_plf=0.7)
+
+    months_since = 2025 * 12 + np.arange(12)
+    scenarios = lambda: cfm.forecast_scenarios(plant_keys, months_since // 12, months_since % 12 + 1,
+                                               target_plf=cfm.plf_grid(), tidy=False)
+    return {
+        f'physics.forecast_coal_demand.{len(calls)}_calls': measure(loop, args.repeat),
+        'physics.forecast_scenarios.fleet_12m_10plf': measure(scenarios, args.repeat),
+    }
+
+
+def bench_training(args):
+    """Feature engineering and one base-model fit on 1x, 10x, ... the synthetic fleet."""
+    from feature_pipeline import BASE_FEATURES, add_fleet_features, load_training_frame, plant_local_features
+    from train_generalized_model import DEFAULT_PARAMS, fit_model
+
+    results = {}
+    for scale in args.scales:
+        path = f'train_x{scale}.csv'
+        make_reference_frame(args.plants * scale, seed=scale).to_csv(path, index=False)
+        features = lambda: add_fleet_features(plant_local_features(load_training_frame(path)))
+        repeat = args.repeat if scale <= 10 else 1
+        results[f'training.features.x{scale}'] = measure(features, repeat, warmup=0)
+        df, _ = features()
+        params = {**DEFAULT_PARAMS, 'num_threads': 1, 'seed': 0, 'deterministic': True}
+        fit = lambda: fit_model(df, 'base', BASE_FEATURES, params, num_boost_round=args.train_rounds)
+        results[f'training.fit_base.x{scale}'] = measure(fit, repeat, warmup=0)
+    return results
+
+
+CASES = {
+    'startup': bench_startup,
+    'forecast_api': bench_forecast_api,
+    'booster_predict': bench_booster_predict,
+    'physics': bench_physics,
+    'training': bench_training,
+}
+
+
+def summarize(timings):
+    t = np.asarray(timings)
+    return {'median': float(np.median(t)), 'min': float(t.min()), 'max': float(t.max()), 'repeat': len(t),
+            'unit': 's'}
+
+
+def environment():
+    import lightgbm
+    import pandas
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pandas.__version__,
+        'lightgbm': lightgbm.__version__,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Print current vs baseline medians; returns the names that regressed."""
+    regressions = []
+    print(f"\n{'case':<52}{'baseline':>12}{'current':>12}{'ratio':>8}  status")
+    for name in sorted(set(results) | set(baseline)):
+        if name not in results:
+            print(f"{name:<52}{baseline[name]['median']:>12.6f}{'':>12}{'':>8}  not run")
+            continue
+        current = results[name]['median']
+        if name not in baseline:
+            print(f"{name:<52}{'':>12}{current:>12.6f}{'':>8}  new")
+            continue
+        ratio = current / baseline[name]['median']
+        status = 'ok'
+        if ratio > 1 + threshold:
+            status = 'REGRESSION'
+            regressions.append(name)
+        elif ratio < 1 / (1 + threshold):
+            status = 'faster'
+        print(f"{name:<52}{baseline[name]['median']:>12.6f}{current:>12.6f}{ratio:>8.2f}  {status}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite with JSON results and a stored baseline")
+    parser.add_argument('--only', nargs='+', default=None, help="run only cases whose name starts with these")
+    parser.add_argument('--plants', type=int, default=150)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 100, 10_000])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--train-rounds', type=int, default=200)
+    parser.add_argument('--threshold', type=float, default=0.25, help="allowed slowdown of the median, 0.25 = 25%%")
+    parser.add_argument('--baseline', default=str(BASELINE_FILE))
+    parser.add_argument('--output', default=None, help="results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument('--save-baseline', action='store_true', help="also write the results as the baseline")
+    args = parser.parse_args()
+
+    prepare_workdir(args.plants)
+    sys.path.insert(0, str(BENCH_DIR))
+    results = {}
+    for name, bench in CASES.items():
+        if args.only and not any(name.startswith(prefix) or prefix.startswith(name) for prefix in args.only):
+            continue
+        print(f"Running {name}...", flush=True)
+        for case, timings in bench(args).items():
+            if args.only is None or any(case.startswith(prefix) for prefix in args.only):
+                results[case] = summarize(timings)
+
+    report = {
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'environment': environment(),
+        'config': {key: value for key, value in vars(args).items()
+                   if key in ('plants', 'repeat', 'batch_sizes', 'scales', 'train_rounds')},
+        'results': results,
+    }
+    output = Path(args.output) if args.output else \
+        RESULTS_DIR / f"{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {output}")
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline = json.loads(baseline_path.read_text())['results'] if baseline_path.exists() else {}
+        report['results'] = {**baseline, **results}
+        baseline_path.write_text(json.dumps(report, indent=2))
+        print(f"Baseline written to {baseline_path}")
+        return
+    if not baseline_path.exists():
+        print(f"No baseline at {baseline_path}; run with --save-baseline to record one")
+        return
+
+    baseline = json.loads(baseline_path.read_text())
+    if baseline.get('environment', {}).get('platform') != report['environment']['platform']:
+        print(f"Note: baseline was recorded on {baseline['environment'].get('platform')}")
+    regressions = compare(results, baseline['results'], args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} case(s) slower than the baseline by more than {args.threshold:.0%}")
+        sys.exit(1)
+    print(f"\nNo regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
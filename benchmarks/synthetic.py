@@ -0,0 +1,122 @@
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+MODEL_FILES = [
+    'plf_base_model.txt',
+    'plf_enhanced_model.txt',
+    'generalized_model_metadata.pkl',
+    'static',
+]
+
+CAPACITIES = [210, 250, 420, 500, 600, 660, 1000, 1200, 1320, 2000, 2600, 3000]
+TECHNOLOGIES = ['Subcritical', 'Supercritical']
+GRADES = [('G6', 6000), ('G9', 5000), ('G11', 4600), ('G13', 4000)]
+
+
+def make_reference_frame(n_plants=150, start_year=2024, n_months=22, seed=0):
+    rng = np.random.default_rng(seed)
+    plant_idx = np.repeat(np.arange(n_plants), n_months)
+    months_since = start_year * 12 + np.tile(np.arange(n_months), n_plants)
+
+    capacity = rng.choice(CAPACITIES, n_plants).astype(float)
+    technology = rng.choice(TECHNOLOGIES, n_plants, p=[0.7, 0.3])
+    grade_idx = rng.integers(0, len(GRADES), n_plants)
+    base_plf = rng.uniform(0.35, 0.85, n_plants)
+    n_rows = len(plant_idx)
+
+    return pd.DataFrame({
+        'plant_key': np.char.add('PLANT_', np.char.zfill(plant_idx.astype(str), 5)),
+        'Name of TPS': np.char.add('Synthetic TPS ', plant_idx.astype(str)),
+        'Year': months_since // 12,
+        'Month': months_since % 12 + 1,
+        'Capacity': capacity[plant_idx],
+        'Technology': technology[plant_idx],
+        'Actual SHR': rng.uniform(2350, 2950, n_plants)[plant_idx],
+        'Estimated_GCV_kcal_per_kg': np.array([g for _, g in GRADES], dtype=float)[grade_idx][plant_idx],
+        'Coal_Grade': np.array([g for g, _ in GRADES])[grade_idx][plant_idx],
+        'Auxiliary consumption (%)': rng.uniform(5.5, 10.0, n_plants)[plant_idx],
+        'Actual avg PLF': np.clip(base_plf[plant_idx] + rng.normal(0, 0.05, n_rows), 0.05, 1.0) * 100,
+    })
+
+
+def make_coal_frame(n_plants=150, start_year=2024, n_months=22, seed=0, names=None):
+    """Monthly receipts by source, consumption and closing stocks in the
+    ``final_monthly_coal_combined.csv`` layout (thousand tonnes)."""
+    rng = np.random.default_rng(seed)
+    names = np.char.add('SYNTHETIC TPS-', np.arange(n_plants).astype(str)) if names is None else np.asarray(names)
+    months_since = start_year * 12 + np.repeat(np.arange(n_months), n_plants)
+    plant_idx = np.tile(np.arange(n_plants), n_months)
+    capacity = rng.choice(CAPACITIES, n_plants).astype(float)
+    consumption = capacity[plant_idx] * rng.uniform(0.25, 0.45, len(plant_idx))
+    shares = rng.dirichlet([4, 1, 1, 0.5, 1, 0.5], n_plants)[plant_idx]
+    receipts = consumption[:, None] * rng.uniform(0.8, 1.2, len(plant_idx))[:, None] * shares
+    frame = pd.DataFrame({
+        'Name of TPS': names[plant_idx],
+        'Installed Capacity (MW)': capacity[plant_idx],
+        **dict(zip(['CIL', 'SSCL', 'Captive', 'E-Auction', 'Import', 'Others'], receipts.T)),
+    })
+    frame['Total'] = receipts.sum(axis=1)
+    frame['Total Consumption'] = consumption
+    frame['Closing Stocks'] = consumption * rng.uniform(0.3, 1.5, len(plant_idx))
+    frame['Month'] = months_since % 12 + 1
+    frame['Year'] = months_since // 12
+    return frame
+
+
+def make_unit_daily_partitions(directory, n_units=2000, start_year=2010, n_years=14, seed=0):
+    """Daily unit-level PLF, one CSV per year sorted by date then unit, for the out-of-core trainer.
+
+    2000 units over 14 years is ~10.2M rows. Returns the partition paths.
+    """
+    rng = np.random.default_rng(seed)
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    unit_keys = np.char.add('UNIT_', np.char.zfill(np.arange(n_units).astype(str), 5))
+    plant_keys = np.char.add('PLANT_', np.char.zfill((np.arange(n_units) // 4).astype(str), 5))
+    capacity = rng.choice([210, 250, 500, 660, 800], n_units).astype(float)
+    technology = rng.choice(TECHNOLOGIES + ['Ultra Supercritical'], n_units, p=[0.6, 0.3, 0.1])
+    base_plf = rng.uniform(0.35, 0.85, n_units)
+    paths = []
+    for year in range(start_year, start_year + n_years):
+        days = pd.date_range(f'{year}-01-01', f'{year}-12-31', freq='D')
+        unit_idx = np.tile(np.arange(n_units), len(days))
+        day_idx = np.repeat(np.arange(len(days)), n_units)
+        season = 0.08 * np.cos(2 * np.pi * (days.dayofyear.to_numpy() - 120) / 365.25)
+        plf = np.clip(base_plf[unit_idx] + season[day_idx] + rng.normal(0, 0.05, len(unit_idx)), 0.0, 1.0)
+        plf[rng.random(len(plf)) < 0.01] = np.nan
+        path = directory / f'units_{year}.csv'
+        pd.DataFrame({
+            'unit_key': unit_keys[unit_idx],
+            'plant_key': plant_keys[unit_idx],
+            'Year': year,
+            'Month': days.month.to_numpy()[day_idx],
+            'Day': days.day.to_numpy()[day_idx],
+            'Capacity': capacity[unit_idx],
+            'Technology': technology[unit_idx],
+            'Actual avg PLF': np.round(plf * 100, 2),
+        }).to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def prepare_workdir(n_plants=150, n_months=22, seed=0):
+    workdir = Path(tempfile.mkdtemp(prefix='coal_bench_'))
+    atexit.register(shutil.rmtree, workdir, ignore_errors=True)
+    make_reference_frame(n_plants, n_months=n_months, seed=seed).to_csv(
+        workdir / 'FINAL_MERGED_DATA.csv', index=False
+    )
+    for name in MODEL_FILES:
+        os.symlink(REPO_ROOT / name, workdir / name)
+    os.chdir(workdir)
+    if str(REPO_ROOT) not in sys.path:
+        sys.path.insert(0, str(REPO_ROOT))
+    return workdir
@@ -0,0 +1,268 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.optimize import linprog
+
+from coal_stock_store import format_period, standardize_plant_names
+from model_registry import ModelBundle, ModelRegistry
+from plant_forecast import fleet_arrays, fleet_coal_matrix
+from startup_artifact import load_startup_state
+from uncertainty import COAL_GRADE_GCV_BANDS
+
+CEEW_FILES = ['CEEW_subcritical_with_ws_price.csv', 'CEEW_supercritical_with_ws_price.csv']
+BOILER_DESIGNS = {1: 'Subcritical', 2: 'Supercritical'}
+
+# Domestic grades offered to every plant, at the middle of their Ministry of Coal band
+DOMESTIC_GRADES = [f'G{k}' for k in range(3, 15)]
+# CEEW has no as-received GCV for imported coal; typical Indonesian/South African blends
+IMPORT_GCV = 5500
+# Ministry of Power blending advisory; plants that already import more keep their own share
+IMPORT_BLEND_CAP = 0.10
+# Each boiler design is run between these quantiles of the as-fired GCV of the CEEW
+# units of that design, widened to take in the plant's own current GCV
+GCV_BOUND_QUANTILES = (0.05, 0.95)
+GCV_RANGE = (2500, 7000)
+# Heat (Gcal) of the single block solved per plant when months can be scaled from it
+UNIT_HEAT = 1000.0
+
+
+def implied_gcv(units):
+    """As-fired GCV (kcal/kg) from annual generation, heat rate and coal burnt."""
+    generation_kwh = units['Capacity'] * units['Actual avg PLF'] * 8760 * 1000
+    gcv = generation_kwh * units['Actual SHR'] / (units['Actual coal used'] * 1000)
+    return gcv.where((gcv >= GCV_RANGE[0]) & (gcv <= GCV_RANGE[1]))
+
+
+def load_price_table(paths=CEEW_FILES):
+    """Plant-level delivered cost, transport share, GCV bounds and import cap from the CEEW unit files.
+
+    Units are combined per ``plant_key`` weighted by capacity. Also returns the
+    fleet-wide calibration used to price grades a plant does not burn today:
+    pit-head cost per Mcal as a linear function of GCV, fitted over domestic
+    units, and the delivered cost per Mcal of units that fire only imports.
+    """
+    units = pd.concat([pd.read_csv(path) for path in paths], ignore_index=True)
+    units['plant_key'] = standardize_plant_names(units['Plant name'])
+    units['design'] = units['Boiler design'].map(BOILER_DESIGNS)
+    gcv = implied_gcv(units)
+    units['gcv'] = gcv.fillna(gcv.groupby(units['design']).transform('median'))
+    units['transport_share'] = (units['Actual energy-transport cost'] / units['Actual energy']).fillna(0)
+    units['coal_inr_per_mcal'] = units['INR/Mcal'] * (1 - units['transport_share'])
+
+    domestic = units[(units['Import share'] < 0.05) & gcv.notna()]
+    slope, intercept = np.polyfit(domestic['gcv'], domestic['coal_inr_per_mcal'], 1)
+    import_only = units[units['Import share'] >= 0.9]
+    bounds = gcv.groupby(units['design']).quantile(list(GCV_BOUND_QUANTILES)).unstack()
+
+    by_plant = units.groupby('plant_key', sort=True)
+    capacity = by_plant['Capacity'].sum()
+    plants = pd.DataFrame({
+        column: (units[column] * units['Capacity']).groupby(units['plant_key']).sum() / capacity
+        for column in ['INR/Mcal', 'coal_inr_per_mcal', 'transport_share', 'gcv', 'Import share']
+    })
+    plants['capacity'] = capacity
+    plants['state'] = by_plant['State'].first()
+    plants['design'] = by_plant['design'].agg(lambda design: design.mode().iloc[0])
+    plants['pithead'] = by_plant['Pithead plant'].agg(lambda pithead: bool((pithead == 'Y').any()))
+    plants['gcv_low'] = np.minimum(bounds[GCV_BOUND_QUANTILES[0]].reindex(plants['design']).to_numpy(), plants['gcv'])
+    plants['gcv_high'] = np.maximum(bounds[GCV_BOUND_QUANTILES[1]].reindex(plants['design']).to_numpy(), plants['gcv'])
+    plants['import_cap'] = np.maximum(plants['Import share'], IMPORT_BLEND_CAP)
+    calibration = {
+        'coal_inr_per_mcal': (float(intercept), float(slope)),
+        'import_inr_per_mcal': float(import_only['INR/Mcal'].median()),
+    }
+    return plants, calibration
+
+
+def grade_options(grades=DOMESTIC_GRADES):
+    """One row per allocation option: each domestic grade, then imported coal."""
+    return pd.DataFrame({
+        'source': ['Domestic'] * len(grades) + ['Import'],
+        'grade': list(grades) + ['Import'],
+        'gcv': [sum(COAL_GRADE_GCV_BANDS[grade]) / 2 for grade in grades] + [IMPORT_GCV],
+    })
+
+
+def delivered_prices(plants, calibration, options):
+    """Delivered INR/tonne of every option at every plant, (plants, options).
+
+    A domestic grade costs the plant's own pit-head INR/Mcal moved along the
+    fleet grade curve, plus its transport cost per tonne, which does not
+    depend on grade. Imports are priced at the fleet import-only INR/Mcal.
+    """
+    intercept, slope = calibration['coal_inr_per_mcal']
+    curve = lambda gcv: intercept + slope * gcv
+    gcv = options['gcv'].to_numpy(dtype=float)
+    level = (plants['coal_inr_per_mcal'] / curve(plants['gcv'])).to_numpy()
+    transport = (plants['INR/Mcal'] * plants['transport_share'] * plants['gcv']).to_numpy()
+    prices = level[:, None] * curve(gcv) * gcv + transport[:, None]
+    is_import = (options['source'] == 'Import').to_numpy()
+    prices[:, is_import] = calibration['import_inr_per_mcal'] * gcv[is_import]
+    return prices
+
+
+def allocation_totals(tonnes, prices, energy, is_import):
+    total = tonnes.sum(axis=2)
+    return {
+        'tonnes': tonnes,
+        'prices': prices,
+        'cost': (tonnes * prices[:, None, :]).sum(axis=2),
+        'blend_gcv': np.divide(energy * 1000, total, out=np.full(total.shape, np.nan), where=total > 0),
+        'import_share': np.divide(tonnes[:, :, is_import].sum(axis=2), total, out=np.zeros(total.shape),
+                                  where=total > 0),
+    }
+
+
+def allocate(energy, prices, option_gcv, gcv_low, gcv_high, import_cap, is_import, import_limit=None):
+    """Least-cost tonnage of each option for every plant-month, solved as one LP.
+
+    ``energy`` is the heat each plant needs per month (plants, months) in Gcal,
+    ``prices`` the delivered INR/tonne (plants, options). Every plant-month is
+    a block of the constraint matrix: heat balance, blend GCV within the
+    plant's ``gcv_low``..``gcv_high`` and imports at most ``import_cap`` of its
+    tonnage. ``import_limit`` (tonnes per month, scalar or per month) caps
+    fleet imports and is the only constraint that couples blocks.
+    """
+    energy = np.asarray(energy, dtype=float)
+    prices = np.asarray(prices, dtype=float)
+    option_gcv = np.asarray(option_gcv, dtype=float)
+    n_plants, n_months = energy.shape
+    n_options = len(option_gcv)
+    n_blocks = n_plants * n_months
+
+    if import_limit is None and n_months > 1:
+        # Without the fleet limit a plant's blocks differ only in the heat they supply and
+        # every other row is homogeneous, so its least-cost mix per Gcal is the same each
+        # month: solve one block per plant and scale it by the monthly heat
+        mix = allocate(np.full((n_plants, 1), UNIT_HEAT), prices, option_gcv, gcv_low, gcv_high, import_cap, is_import)
+        tonnes = mix['tonnes'] / UNIT_HEAT * energy[:, :, None]
+        return {**allocation_totals(tonnes, prices, energy, is_import),
+                **{key: mix[key] for key in ['solve_seconds', 'variables', 'constraints']}}
+
+    # Variables are kilotonnes (1 kt of coal at g kcal/kg carries g Gcal) and costs INR crore
+    block = np.repeat(np.arange(n_blocks), n_options)
+    option = np.tile(np.arange(n_options), n_blocks)
+    plant = block // n_months
+    column = np.arange(n_blocks * n_options)
+    cost = prices[plant, option] * 1e-4
+
+    a_eq = sparse.csr_array((option_gcv[option], (block, column)), shape=(n_blocks, len(column)))
+    rows = [3 * block, 3 * block + 1, 3 * block + 2]
+    data = [
+        (gcv_low[plant] - option_gcv[option]) / 1000,
+        (option_gcv[option] - gcv_high[plant]) / 1000,
+        is_import[option] - import_cap[plant],
+    ]
+    columns = [column] * 3
+    b_ub = [np.zeros(3 * n_blocks)]
+    if import_limit is not None:
+        imports = is_import[option]
+        rows.append(3 * n_blocks + block[imports] % n_months)
+        data.append(np.ones(imports.sum()))
+        columns.append(column[imports])
+        b_ub.append(np.broadcast_to(np.asarray(import_limit, dtype=float) / 1000, n_months))
+    b_ub = np.concatenate(b_ub)
+    a_ub = sparse.csr_array((np.concatenate(data), (np.concatenate(rows), np.concatenate(columns))),
+                            shape=(len(b_ub), len(column)))
+
+    start = time.perf_counter()
+    result = linprog(cost, A_ub=a_ub, b_ub=b_ub, A_eq=a_eq, b_eq=energy.ravel(), bounds=(0, None), method='highs')
+    solve_seconds = time.perf_counter() - start
+    if not result.success:
+        raise ValueError(f"Allocation LP failed: {result.message}")
+
+    tonnes = result.x.reshape(n_plants, n_months, n_options) * 1000
+    allocation = {
+        **allocation_totals(tonnes, prices, energy, is_import),
+        'solve_seconds': solve_seconds,
+        'variables': len(column),
+        'constraints': len(b_ub) + n_blocks,
+    }
+    if import_limit is not None:
+        # INR a further tonne of fleet import allowance would save in each month
+        allocation['import_limit_value'] = -result.ineqlin.marginals[3 * n_blocks:] * 1e4
+    return allocation
+
+
+def allocate_plants(plants, calibration, energy, options=None, import_limit=None):
+    """``allocate`` for the rows of ``load_price_table`` (in the order of ``energy``)."""
+    options = grade_options() if options is None else options
+    return allocate(
+        energy, delivered_prices(plants, calibration, options), options['gcv'].to_numpy(dtype=float),
+        plants['gcv_low'].to_numpy(), plants['gcv_high'].to_numpy(), plants['import_cap'].to_numpy(),
+        (options['source'] == 'Import').to_numpy(), import_limit,
+    )
+
+
+def allocation_frame(plant_keys, periods, options, allocation):
+    """Long table of the non-zero allocations: one row per plant, month and option."""
+    plant, month, option = np.nonzero(allocation['tonnes'] > 1e-6)
+    tonnes = allocation['tonnes'][plant, month, option]
+    return pd.DataFrame({
+        'plant_key': np.asarray(plant_keys, dtype=object)[plant],
+        'month': [format_period(int(p)) for p in np.asarray(periods)[month]],
+        'source': options['source'].to_numpy()[option],
+        'grade': options['grade'].to_numpy()[option],
+        'gcv': options['gcv'].to_numpy()[option],
+        'tonnes': tonnes,
+        'cost_inr': tonnes * allocation['prices'][plant, option],
+    })
+
+
+def load_models(state):
+    """The registry's latest model version, as the API serves it, or the local model files without a registry."""
+    engine = os.getenv("INFERENCE_ENGINE", "lightgbm")
+    registry = ModelRegistry(os.getenv("MODEL_REGISTRY_DIR", "model_registry"))
+    version = registry.latest_version()
+    if version is None:
+        return ModelBundle('local', state['metadata'], state['model_files'], engine, state['compiled_dirs'])
+    return ModelBundle.from_registry(registry, version, engine)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cost-optimal coal grade/source allocation for forecast demand")
+    parser.add_argument('--horizon', type=int, default=12, help="months after the latest PLF observation")
+    parser.add_argument('--import-limit', type=float, default=None, help="fleet import tonnes per month")
+    parser.add_argument('--out', default='coal_allocation.csv')
+    args = parser.parse_args()
+
+    plants, calibration = load_price_table()
+    state = load_startup_state(os.getenv("ARTIFACT_DIR", "artifacts"))
+    lag_store = state['lag_store']
+    fleet = fleet_arrays(state['plant_records'])
+    models = load_models(state).bind_fleet(fleet)
+
+    keys = [key for key in plants.index if key in lag_store.index]
+    keys = [key for key, ok in zip(keys, models.has_averages[lag_store.rows_for(keys)]) if ok]
+    plants = plants.loc[keys]
+    start = int(lag_store.last_period.max()) + 1
+    periods = np.arange(start, start + args.horizon)
+    rows = lag_store.rows_for(keys)
+    coal = fleet_coal_matrix(models, fleet, lag_store, np.array(keys, dtype=object), periods)
+    energy = coal * fleet['gcv'][rows, None] / 1000
+
+    options = grade_options()
+    allocation = allocate_plants(plants, calibration, energy, options, args.import_limit)
+    frame = allocation_frame(keys, periods, options, allocation)
+    frame.to_csv(args.out, index=False)
+
+    current = (energy * 1000 * plants['INR/Mcal'].to_numpy()[:, None]).sum()
+    optimal = allocation['cost'].sum()
+    print(f"{len(keys)} plants x {len(periods)} months ({format_period(int(periods[0]))}.."
+          f"{format_period(int(periods[-1]))}): {allocation['variables']:,} variables, "
+          f"{allocation['constraints']:,} constraints, solved in {allocation['solve_seconds']:.3f}s")
+    print(f"Delivered cost INR {optimal / 1e7:,.0f} crore vs INR {current / 1e7:,.0f} crore at current INR/Mcal "
+          f"({optimal / current - 1:+.1%}); fleet import share {frame.loc[frame['source'] == 'Import', 'tonnes'].sum() / frame['tonnes'].sum():.2%}")
+    by_option = pd.Series(allocation['tonnes'].sum(axis=(0, 1)) / 1e6, index=options['source'] + ' ' + options['grade'])
+    print(f"Million tonnes by source and grade:\n{by_option[by_option > 0].round(2).to_string()}")
+    if 'import_limit_value' in allocation:
+        print(f"Value of one more tonne of import allowance (INR/t): {np.round(allocation['import_limit_value'], 1).tolist()}")
+    print(f"Wrote {len(frame)} rows to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
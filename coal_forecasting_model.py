@@ -1,17 +1,38 @@
-import pandas as pd
 import numpy as np
-from datetime import datetime
 import calendar
 
-print("Loading dataset...")
-df = pd.read_csv('FINAL_MERGED_DATA.csv')
-print(f"Loaded {len(df):,} rows")
+from plant_forecast import days_in_month
+
+REFERENCE_DATA = 'FINAL_MERGED_DATA.csv'
+_reference_data = None
+
+def load_reference_data(path=REFERENCE_DATA):
+    """Read the plant reference table; the physics helpers below need only NumPy and never load it."""
+    global _reference_data, _plant_table
+    import pandas as pd
+    print("Loading dataset...")
+    _reference_data = pd.read_csv(path)
+    _plant_table = None
+    print(f"Loaded {len(_reference_data):,} rows")
+    return _reference_data
+
+def get_reference_data():
+    return _reference_data if _reference_data is not None else load_reference_data()
+
+def __getattr__(name):
+    # ``df`` used to be read at import time; it is now loaded on first access
+    if name == 'df':
+        return get_reference_data()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def is_missing(value):
+    return value is None or value != value
 
 def get_days_in_month(year, month):
     return calendar.monthrange(year, month)[1]
 
 def calculate_electricity_generation(capacity_mw, plf, days_in_month):
-    if pd.isna(capacity_mw) or pd.isna(plf):
+    if is_missing(capacity_mw) or is_missing(plf):
         return None
     
     if plf > 1:
@@ -21,7 +42,7 @@ def calculate_electricity_generation(capacity_mw, plf, days_in_month):
     return electricity_kwh
 
 def calculate_coal_requirement(electricity_kwh, heat_rate_kcal_kwh, gcv_kcal_kg, aux_consumption_pct):
-    if pd.isna(electricity_kwh) or pd.isna(heat_rate_kcal_kwh) or pd.isna(gcv_kcal_kg):
+    if is_missing(electricity_kwh) or is_missing(heat_rate_kcal_kwh) or is_missing(gcv_kcal_kg):
         return None
     
     if aux_consumption_pct > 1:
@@ -41,6 +62,7 @@ def forecast_coal_demand(plant_key, year, month, target_plf=None, target_energy_
     if target_plf is not None and target_energy_mwh is not None:
         raise ValueError("Provide only one: target_plf OR target_energy_mwh")
     
+    df = get_reference_data()
     plant_data = df[df['plant_key'] == plant_key].iloc[0]
     
     capacity_mw = plant_data['Capacity']
@@ -82,7 +104,105 @@ def forecast_coal_demand(plant_key, year, month, target_plf=None, target_energy_
     return result
 
 
+PLANT_ATTRIBUTE_DEFAULTS = {
+    'Name of TPS': None,
+    'Actual SHR': 2750,
+    'Auxiliary consumption (%)': 8.0,
+}
+_plant_table = None
+
+def get_plant_table():
+    """One row per plant with the attributes ``forecast_coal_demand`` reads (its first reference row)."""
+    global _plant_table
+    if _plant_table is None:
+        plants = get_reference_data().drop_duplicates('plant_key', keep='first').set_index('plant_key')
+        for column, default in PLANT_ATTRIBUTE_DEFAULTS.items():
+            if column not in plants.columns:
+                plants[column] = plants.index if column == 'Name of TPS' else default
+        _plant_table = plants
+    return _plant_table
+
+def plf_grid(start=0.50, stop=0.95, step=0.05):
+    return np.round(np.arange(start, stop + step / 2, step), 10)
+
+def forecast_scenarios(plant_keys, years, months, target_plf=None, target_energy_mwh=None, tidy=True):
+    """Coal demand for every plant x month x scenario in one broadcast pass.
+
+    ``years``/``months`` give the M forecast months and ``target_plf`` or
+    ``target_energy_mwh`` the S scenarios, either as a 1-D array (the same
+    grid for every plant-month) or as anything broadcastable to (P, M, S).
+    Returns a tidy DataFrame, or with ``tidy=False`` a cube dict of
+    ``coords`` and (P, M, S) ``data`` arrays.
+    """
+    if target_plf is None and target_energy_mwh is None:
+        raise ValueError("Either target_plf or target_energy_mwh must be provided")
+    if target_plf is not None and target_energy_mwh is not None:
+        raise ValueError("Provide only one: target_plf OR target_energy_mwh")
+
+    plant_keys = np.asarray(plant_keys, dtype=object)
+    plants = get_plant_table()
+    unknown = ~np.isin(plant_keys, plants.index)
+    if unknown.any():
+        raise KeyError(f"Unknown plants: {', '.join(map(str, plant_keys[unknown][:5]))}")
+    plants = plants.loc[plant_keys]
+
+    years = np.asarray(years)
+    months = np.asarray(months)
+    capacity = plants['Capacity'].to_numpy(dtype=float)[:, None, None]
+    heat_rate = plants['Actual SHR'].to_numpy(dtype=float)[:, None, None]
+    gcv = plants['Estimated_GCV_kcal_per_kg'].to_numpy(dtype=float)[:, None, None]
+    aux = plants['Auxiliary consumption (%)'].to_numpy(dtype=float)[:, None, None]
+    aux = np.where(aux > 1, aux / 100, aux)
+    full_load_kwh = capacity * 24 * days_in_month(years, months)[None, :, None] * 1000
+
+    scenarios = np.asarray(target_plf if target_plf is not None else target_energy_mwh, dtype=float)
+    if scenarios.ndim <= 1:
+        scenarios = np.atleast_1d(scenarios)[None, None, :]
+    shape = np.broadcast_shapes((len(plant_keys), len(months), 1), scenarios.shape)
+
+    if target_plf is not None:
+        plf = np.broadcast_to(np.where(scenarios > 1, scenarios / 100, scenarios), shape)
+        electricity_kwh = full_load_kwh * plf
+    else:
+        electricity_kwh = np.broadcast_to(scenarios * 1000, shape)
+        plf = electricity_kwh / full_load_kwh
+    coal_required = electricity_kwh * heat_rate / (gcv * (1 - aux)) / 1000
+
+    coords = {
+        'plant_key': plant_keys,
+        'year': years,
+        'month': months,
+        'scenario': np.arange(shape[2]),
+    }
+    data = {
+        'target_plf': plf,
+        'electricity_generated_mwh': electricity_kwh / 1000,
+        'coal_required_tonnes': coal_required,
+    }
+    if not tidy:
+        return {'coords': coords, 'data': data}
+
+    import pandas as pd
+    n_plants, n_months, n_scenarios = shape
+    plant_index = np.repeat(np.arange(n_plants), n_months * n_scenarios)
+    month_index = np.tile(np.repeat(np.arange(n_months), n_scenarios), n_plants)
+    frame = pd.DataFrame({
+        'plant_key': plant_keys[plant_index],
+        'plant_name': plants['Name of TPS'].to_numpy()[plant_index],
+        'year': years[month_index],
+        'month': months[month_index],
+        'scenario': np.tile(np.arange(n_scenarios), n_plants * n_months),
+        'capacity_mw': capacity.ravel()[plant_index],
+        'coal_grade': plants['Coal_Grade'].to_numpy()[plant_index],
+    })
+    for name, values in data.items():
+        frame[name] = values.ravel()
+    return frame
+
+
 if __name__ == "__main__":
+    import pandas as pd
+
     print("\n" + "="*80)
     print("COAL DEMAND FORECASTING MODEL - DEMO")
     print("="*80)
@@ -132,23 +252,31 @@ if __name__ == "__main__":
     
     plants_to_forecast = ['DADRI_NCTPP', 'RIHAND_STPS', 'VINDHYACHAL_STPS']
     target_plf = 0.80
-    
-    batch_results = []
+
+    known_plants = get_plant_table().index
     for plant in plants_to_forecast:
-        try:
-            result = forecast_coal_demand(plant, 2024, 8, target_plf=target_plf)
-            batch_results.append(result)
-        except Exception as e:
-            print(f"  Error forecasting {plant}: {e}")
-    
-    batch_df = pd.DataFrame(batch_results)
-    
+        if plant not in known_plants:
+            print(f"  Error forecasting {plant}: plant not found in reference data")
+    plants_to_forecast = [plant for plant in plants_to_forecast if plant in known_plants]
+
+    batch_df = forecast_scenarios(plants_to_forecast, [2024], [8], target_plf=target_plf)
+
     print(f"\nForecasted {len(batch_df)} plants for August 2024 at {target_plf*100:.0f}% PLF:")
     print(batch_df[['plant_key', 'capacity_mw', 'electricity_generated_mwh', 
                     'coal_grade', 'coal_required_tonnes']].to_string(index=False))
     
     print(f"\nTotal coal required: {batch_df['coal_required_tonnes'].sum():,.0f} tonnes")
     
+    print("\n[Example 4] PLF Scenario Grid")
+    print("-" * 80)
+
+    grid = plf_grid()
+    cube = forecast_scenarios(plants_to_forecast, [2024] * 12, list(range(1, 13)), target_plf=grid, tidy=False)
+    annual_coal = cube['data']['coal_required_tonnes'].sum(axis=1)
+
+    print("\nAnnual coal required (tonnes) for 2024 by PLF scenario:")
+    print(pd.DataFrame(annual_coal, index=plants_to_forecast, columns=[f"{p:.0%}" for p in grid]).round(0).to_string())
+
     print("\n" + "="*80)
     print("[SUCCESS] Forecasting model ready!")
     print("="*80)
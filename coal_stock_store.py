@@ -0,0 +1,362 @@
+import json
+import os
+import re
+import shutil
+import sys
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+
+from plant_forecast import days_in_month
+from startup_artifact import file_fingerprint
+
+STORE_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+STATE_FILE = 'state.npz'
+CHUNK_ROWS = 50_000
+WINDOW = 12
+
+# Receipts by source, consumption and stocks are in thousand tonnes
+SOURCE_COLUMNS = ['CIL', 'SCCL', 'SSCL', 'Captive', 'E-Auction', 'Import', 'Others']
+NUMERIC_COLUMNS = ['Installed Capacity (MW)'] + SOURCE_COLUMNS + ['Total', 'Total Consumption', 'Closing Stocks']
+REQUIRED_COLUMNS = ['Name of TPS', 'Year', 'Month', 'CIL', 'Captive', 'E-Auction', 'Import',
+                    'Total Consumption', 'Closing Stocks']
+STATE_COLUMNS = ['Total Consumption', 'Closing Stocks'] + SOURCE_COLUMNS
+# Region subtotal and grand total lines in the CEA reports (not plants such as "SOUTHERN REPL. TPS")
+NON_PLANT_NAMES = r'^(total|grand total|(northern|southern|eastern|western|central|north eastern) region)\b'
+
+
+def column_file(column):
+    return re.sub(r'\W+', '_', column.lower()).strip('_') + '.npy'
+
+
+def normalize_columns(columns):
+    return [unicodedata.normalize('NFKC', str(c)).replace('\n', ' ').replace('\xa0', ' ').strip() for c in columns]
+
+
+def standardize_plant_names(names):
+    """``plant_key`` for each TPS name, matching ``cleaning_pipeline.ipynb``."""
+    return (names.astype(str).str.lower().str.strip()
+            .str.replace('&', 'and', regex=False)
+            .str.replace('-', ' ', regex=False)
+            .str.replace(',', '', regex=False))
+
+
+def validate_chunk(chunk):
+    """Clean one ``read_csv`` chunk; returns the rows to store and the count of rows dropped.
+
+    Region/total lines, blank names and months without consumption are
+    dropped, as in the notebook. Anything else malformed raises ValueError.
+    """
+    import pandas as pd
+    chunk.columns = normalize_columns(chunk.columns)
+    missing = [c for c in REQUIRED_COLUMNS if c not in chunk.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {missing}")
+
+    names = chunk['Name of TPS']
+    keep = names.notna() & (names.astype(str).str.strip() != '')
+    keep &= ~names.astype(str).str.strip().str.lower().str.match(NON_PLANT_NAMES)
+    chunk = chunk[keep]
+
+    out = pd.DataFrame({'plant_key': standardize_plant_names(chunk['Name of TPS']),
+                        'Name of TPS': chunk['Name of TPS'].astype(str).str.strip()})
+    for column in ['Year', 'Month']:
+        values = pd.to_numeric(chunk[column], errors='coerce')
+        invalid = values.isna() | (values % 1 != 0)
+        if invalid.any():
+            raise ValueError(f"Non-integer {column} values: {chunk.loc[invalid, column].unique()[:5].tolist()}")
+        out[column] = values.astype(np.int64)
+    if not out['Month'].between(1, 12).all():
+        raise ValueError(f"Month outside 1-12: {out.loc[~out['Month'].between(1, 12), 'Month'].unique()[:5]}")
+
+    for column in NUMERIC_COLUMNS:
+        out[column] = pd.to_numeric(chunk[column], errors='coerce').to_numpy(float) if column in chunk.columns else np.nan
+        if (out[column] < 0).any():
+            raise ValueError(f"Negative values in {column}")
+
+    stored = out['Total Consumption'] > 0
+    return out[stored].reset_index(drop=True), int(len(keep) - stored.sum())
+
+
+class CoalStockState:
+    """Per-plant rolling window of the last ``window`` months of receipts, consumption and stocks.
+
+    Month ``p`` (``Year * 12 + Month - 1``) lives in slot ``p % window``, so a
+    new month overwrites the month that fell out of the window and plants that
+    skip a month need no special handling.
+    """
+
+    def __init__(self, plant_keys=(), values=None, slot_period=None, segments=0, window=WINDOW):
+        self.plant_keys = list(plant_keys)
+        self.index = {key: i for i, key in enumerate(self.plant_keys)}
+        self.window = window
+        self.values = values if values is not None else np.full((0, window, len(STATE_COLUMNS)), np.nan)
+        self.slot_period = slot_period if slot_period is not None else np.full((0, window), -1, dtype=np.int64)
+        self.last_period = self.slot_period.max(axis=1, initial=-1)
+        self.segments = segments
+        self._aggregates = None
+
+    def copy(self):
+        return CoalStockState(self.plant_keys, self.values.copy(), self.slot_period.copy(), self.segments, self.window)
+
+    def _rows_for(self, plant_keys):
+        new_keys = [key for key in dict.fromkeys(plant_keys) if key not in self.index]
+        if new_keys:
+            self.index.update({key: len(self.plant_keys) + i for i, key in enumerate(new_keys)})
+            self.plant_keys += new_keys
+            self.values = np.concatenate([self.values, np.full((len(new_keys),) + self.values.shape[1:], np.nan)])
+            self.slot_period = np.concatenate([self.slot_period, np.full((len(new_keys), self.window), -1)])
+            self.last_period = np.concatenate([self.last_period, np.full(len(new_keys), -1)])
+        return np.array([self.index[key] for key in plant_keys], dtype=np.int64)
+
+    def update(self, frame):
+        """Fold validated rows (any months, any order) into the window; older rows never overwrite newer ones."""
+        frame = frame.sort_values(['Year', 'Month'], kind='stable')
+        periods = (frame['Year'] * 12 + frame['Month'] - 1).to_numpy()
+        rows = self._rows_for(frame['plant_key'].to_numpy())
+        slots = periods % self.window
+        newer = periods >= self.slot_period[rows, slots]
+        rows, slots, periods = rows[newer], slots[newer], periods[newer]
+        self.values[rows, slots] = frame[STATE_COLUMNS].to_numpy(dtype=np.float64)[newer]
+        self.slot_period[rows, slots] = periods
+        np.maximum.at(self.last_period, rows, periods)
+        self._aggregates = None
+
+    def _window_sum(self, column, months, skip=0):
+        upper = (self.last_period - skip)[:, None]
+        mask = (self.slot_period <= upper) & (self.slot_period > upper - months)
+        values = self.values[:, :, STATE_COLUMNS.index(column)]
+        present = mask & ~np.isnan(values)
+        return np.where(present, values, 0).sum(axis=1), present.sum(axis=1), mask
+
+    def aggregates(self):
+        """Fleet arrays as of each plant's latest month, computed once per update."""
+        if self._aggregates is None:
+            self._aggregates = self._compute_aggregates()
+        return self._aggregates
+
+    def _compute_aggregates(self):
+        consumption_3m, n_3m, mask_3m = self._window_sum('Total Consumption', 3)
+        previous_3m, n_prev, _ = self._window_sum('Total Consumption', 3, skip=3)
+        consumption_12m, n_12m, _ = self._window_sum('Total Consumption', self.window)
+        periods = np.maximum(self.slot_period, 0)
+        days_3m = np.where(mask_3m, days_in_month(periods // 12, periods % 12 + 1), 0).sum(axis=1)
+
+        latest = np.argmax(self.slot_period, axis=1)
+        rows = np.arange(len(self.plant_keys))
+        closing_stock = self.values[rows, latest, STATE_COLUMNS.index('Closing Stocks')]
+        daily = np.divide(consumption_3m, days_3m, out=np.full(len(rows), np.nan), where=days_3m > 0)
+        avg_3m = np.divide(consumption_3m, n_3m, out=np.full(len(rows), np.nan), where=n_3m > 0)
+        avg_prev = np.divide(previous_3m, n_prev, out=np.full(len(rows), np.nan), where=n_prev > 0)
+
+        receipts = np.column_stack([self._window_sum(c, self.window)[0] for c in SOURCE_COLUMNS])
+        total_receipts = receipts.sum(axis=1, keepdims=True)
+        return {
+            'plant_key': np.array(self.plant_keys, dtype=object),
+            'last_period': self.last_period,
+            'closing_stock': closing_stock,
+            'consumption_3m_avg': avg_3m,
+            'consumption_12m_avg': np.divide(consumption_12m, n_12m, out=np.full(len(rows), np.nan), where=n_12m > 0),
+            'consumption_trend_3m': np.divide(avg_3m, avg_prev, out=np.full(len(rows), np.nan), where=avg_prev > 0) - 1,
+            'daily_consumption_3m': daily,
+            'stock_days': np.divide(closing_stock, daily, out=np.full(len(rows), np.nan), where=daily > 0),
+            'months_in_window': n_12m,
+            'receipts_12m': receipts,
+            'source_share_12m': np.divide(receipts, total_receipts, out=np.full(receipts.shape, np.nan),
+                                          where=total_receipts > 0),
+        }
+
+    def match(self, plant_keys):
+        """Row of each key in the state after ``plant_key`` normalization, -1 when absent."""
+        import pandas as pd
+        normalized = standardize_plant_names(pd.Series(list(plant_keys), dtype=object))
+        return np.array([self.index.get(key, -1) for key in normalized], dtype=np.int64)
+
+    def plant_summary(self, plant_key):
+        row = self.index.get(plant_key)
+        if row is None:
+            return None
+        aggregates = self.aggregates()
+        period = int(aggregates['last_period'][row])
+        as_float = lambda value: float(value) if np.isfinite(value) else None
+        return {
+            'plant_key': plant_key,
+            'latest_year': period // 12,
+            'latest_month': period % 12 + 1,
+            **{name: as_float(aggregates[name][row]) for name in [
+                'closing_stock', 'consumption_3m_avg', 'consumption_12m_avg', 'consumption_trend_3m',
+                'daily_consumption_3m', 'stock_days',
+            ]},
+            'months_in_window': int(aggregates['months_in_window'][row]),
+            'receipts_12m': {c: as_float(v) for c, v in zip(SOURCE_COLUMNS, aggregates['receipts_12m'][row])},
+            'source_share_12m': {c: as_float(v) for c, v in zip(SOURCE_COLUMNS, aggregates['source_share_12m'][row])},
+        }
+
+    def save(self, path):
+        tmp_path = Path(path).with_name(f'.{Path(path).name}.tmp-{os.getpid()}.npz')
+        np.savez(tmp_path, plant_keys=np.array(self.plant_keys, dtype=str), values=self.values,
+                 slot_period=self.slot_period, segments=self.segments, window=self.window)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as f:
+            return cls(f['plant_keys'].tolist(), f['values'], f['slot_period'], int(f['segments']), int(f['window']))
+
+
+class CoalStockStore:
+    """Append-only columnar store: one directory of ``.npy`` columns per ingested chunk.
+
+    ``manifest.json`` lists the segments in order and is replaced after they
+    are written, so a reader never sees a half-written month. ``state.npz``
+    holds the rolling aggregates as of the segment count it records and is
+    saved after the manifest; segments after it are replayed on load. A
+    single writer is assumed.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def manifest(self):
+        try:
+            with open(self.root / MANIFEST_FILE, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'version': STORE_VERSION, 'segments': [], 'last_period': -1}
+
+    def _write_manifest(self, manifest):
+        tmp_path = self.root / f'.{MANIFEST_FILE}.tmp-{os.getpid()}'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.root / MANIFEST_FILE)
+
+    def read_segment(self, name, columns=None):
+        import pandas as pd
+        directory = self.root / name
+        columns = columns or ['plant_key', 'Name of TPS', 'Year', 'Month'] + NUMERIC_COLUMNS
+        return pd.DataFrame({
+            c: np.load(directory / column_file(c), allow_pickle=False) for c in columns
+        })
+
+    def read(self, columns=None):
+        import pandas as pd
+        segments = self.manifest()['segments']
+        if not segments:
+            return pd.DataFrame(columns=columns or ['plant_key', 'Name of TPS', 'Year', 'Month'] + NUMERIC_COLUMNS)
+        return pd.concat([self.read_segment(s['name'], columns) for s in segments], ignore_index=True)
+
+    def _write_segment(self, frame, index):
+        name = f'seg-{index:06d}'
+        tmp_dir = self.root / f'.{name}.tmp-{os.getpid()}'
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+        for column in frame.columns:
+            values = frame[column].to_numpy()
+            np.save(tmp_dir / column_file(column), values.astype(str) if values.dtype == object else values)
+        # a directory under an uncommitted name is left over from an interrupted ingest
+        shutil.rmtree(self.root / name, ignore_errors=True)
+        os.rename(tmp_dir, self.root / name)
+        return name
+
+    def load_state(self):
+        """Rolling aggregates for every committed segment."""
+        manifest = self.manifest()
+        state_path = self.root / STATE_FILE
+        state = CoalStockState.load(state_path) if state_path.exists() else CoalStockState()
+        return self.refresh(state, manifest)
+
+    def refresh(self, state, manifest=None):
+        """A copy of ``state`` brought up to date with segments committed since it was saved."""
+        segments = (manifest or self.manifest())['segments']
+        if state.segments == len(segments):
+            return state
+        # a state ahead of the manifest counts segments that were never committed, so it is rebuilt
+        state = state.copy() if state.segments < len(segments) else CoalStockState()
+        for segment in segments[state.segments:]:
+            state.update(self.read_segment(segment['name'], ['plant_key', 'Year', 'Month'] + STATE_COLUMNS))
+        state.segments = len(segments)
+        return state
+
+    def ingest(self, path, chunk_rows=CHUNK_ROWS):
+        """Append every month in ``path`` that is newer than the store's latest month.
+
+        The CSV is read in chunks and each validated chunk becomes a segment,
+        while the rolling aggregates are updated from the new rows only.
+        """
+        import pandas as pd
+        self.root.mkdir(parents=True, exist_ok=True)
+        manifest = self.manifest()
+        sha256 = file_fingerprint(path)['sha256']
+        if any(s.get('sha256') == sha256 for s in manifest['segments']):
+            return {'segments': 0, 'rows': 0, 'dropped': 0, 'skipped': 'already ingested'}
+
+        header = normalize_columns(pd.read_csv(path, nrows=0).columns)
+        missing = [c for c in REQUIRED_COLUMNS if c not in header]
+        if missing:
+            raise ValueError(f"{path}: missing required columns {missing}")
+
+        state = self.load_state()
+        store_last = manifest['last_period']
+        committed = len(manifest['segments'])
+        stats = {'segments': 0, 'rows': 0, 'dropped': 0, 'periods': set()}
+        try:
+            for chunk in pd.read_csv(path, chunksize=chunk_rows, dtype={'Name of TPS': str}):
+                frame, dropped = validate_chunk(chunk)
+                stats['dropped'] += dropped
+                if frame.empty:
+                    continue
+                periods = frame['Year'] * 12 + frame['Month'] - 1
+                if periods.min() <= store_last:
+                    raise ValueError(f"{path}: {format_period(periods.min())} is not newer than the store's latest "
+                                     f"month {format_period(store_last)}; the store is append-only")
+
+                name = self._write_segment(frame, len(manifest['segments']))
+                state.update(frame)
+                state.segments += 1
+                manifest['segments'].append({
+                    'name': name, 'rows': len(frame), 'source': Path(path).name, 'sha256': sha256,
+                    'first_period': int(periods.min()), 'last_period': int(periods.max()),
+                })
+                stats['segments'] += 1
+                stats['rows'] += len(frame)
+                stats['periods'].update(periods.unique().tolist())
+        except Exception:
+            for segment in manifest['segments'][committed:]:
+                shutil.rmtree(self.root / segment['name'], ignore_errors=True)
+            raise
+
+        if stats['segments']:
+            manifest['last_period'] = max(s['last_period'] for s in manifest['segments'])
+            # the manifest commits the segments; a state cache that is not saved is caught up on load
+            self._write_manifest(manifest)
+            state.save(self.root / STATE_FILE)
+        stats['periods'] = sorted(stats['periods'])
+        return stats
+
+
+def format_period(period):
+    return f"{period // 12}-{period % 12 + 1:02d}" if period >= 0 else None
+
+
+if __name__ == "__main__":
+    store = CoalStockStore(os.getenv("COAL_STORE_DIR", "coal_store"))
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    if command == "ingest" and len(sys.argv) > 2:
+        for path in sys.argv[2:]:
+            stats = store.ingest(path)
+            if 'skipped' in stats:
+                print(f"{path}: skipped, {stats['skipped']}")
+                continue
+            months = ', '.join(format_period(p) for p in stats['periods'])
+            print(f"{path}: {stats['rows']} rows in {stats['segments']} segments ({months}), "
+                  f"{stats['dropped']} rows dropped")
+    elif command == "status":
+        manifest = store.manifest()
+        state = store.load_state()
+        print(f"{store.root}: {len(manifest['segments'])} segments, {sum(s['rows'] for s in manifest['segments'])} rows, "
+              f"{len(state.plant_keys)} plants, latest month {format_period(manifest['last_period'])}")
+    else:
+        print("Usage: python coal_stock_store.py [status | ingest <csv> ...]")
+        sys.exit(1)
@@ -0,0 +1,141 @@
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from lag_state import LAG_FEATURES
+
+FEATURE_PIPELINE_VERSION = 1
+
+TECH_MAP = {'Subcritical': 0, 'Supercritical': 1, 'Ultra Supercritical': 2}
+BAND_MAP = {'Small': 0, 'Medium': 1, 'Large': 2}
+
+BASE_FEATURES = [
+    'technology_encoded',
+    'capacity_normalized',
+    'capacity_band_encoded',
+    'Month', 'quarter', 'month_sin', 'month_cos',
+    'is_summer', 'is_monsoon', 'is_winter',
+    'avg_plf_tech_month',
+    'avg_plf_band_month',
+]
+ENHANCED_FEATURES = BASE_FEATURES + LAG_FEATURES
+
+SOURCE_COLUMNS = ['plant_key', 'Year', 'Month', 'Capacity', 'Technology', 'PLF']
+CACHE_FILE = 'plant_features.pkl'
+MANIFEST_FILE = 'manifest.json'
+
+
+def capacity_band(capacity):
+    return np.where(capacity < 500, 'Small', np.where(capacity < 1500, 'Medium', 'Large'))
+
+
+def load_training_frame(path):
+    df = pd.read_csv(path)
+    if 'Actual avg PLF' in df.columns:
+        df['PLF'] = df['Actual avg PLF']
+        if df['PLF'].max() > 1:
+            df['PLF'] = df['PLF'] / 100
+    df = df[df['Capacity'].notna()]
+    return df.sort_values(['plant_key', 'Year', 'Month'], kind='stable').reset_index(drop=True)
+
+
+def plant_hashes(df):
+    columns = df[SOURCE_COLUMNS[1:]].astype({'Technology': 'category'})
+    row_hashes = pd.util.hash_pandas_object(columns, index=False).to_numpy()
+    codes, plant_keys = pd.factorize(df['plant_key'])
+    sums = np.zeros(len(plant_keys), dtype=np.uint64)
+    np.add.at(sums, codes, row_hashes)
+    return dict(zip(plant_keys, sums.astype(str)))
+
+
+def plant_local_features(df):
+    """Features that depend only on a plant's own rows; ``df`` is sorted by plant and period."""
+    out = df[SOURCE_COLUMNS].reset_index(drop=True)
+    month = out['Month'].to_numpy()
+    out['date'] = pd.to_datetime(out[['Year', 'Month']].assign(day=1))
+    out['technology_encoded'] = out['Technology'].map(TECH_MAP).fillna(0)
+    out['capacity_band'] = capacity_band(out['Capacity'].to_numpy())
+    out['capacity_band_encoded'] = out['capacity_band'].map(BAND_MAP)
+    out['month_sin'] = np.sin(2 * np.pi * month / 12)
+    out['month_cos'] = np.cos(2 * np.pi * month / 12)
+    out['quarter'] = (month - 1) // 3 + 1
+    out['is_summer'] = np.isin(month, [4, 5, 6]).astype(int)
+    out['is_monsoon'] = np.isin(month, [7, 8, 9]).astype(int)
+    out['is_winter'] = np.isin(month, [11, 12, 1, 2]).astype(int)
+
+    by_plant = out.groupby('plant_key', sort=False)['PLF']
+    recent = np.column_stack([by_plant.shift(k).to_numpy() for k in (1, 2, 3)])
+    counts = (~np.isnan(recent)).sum(axis=1)
+    out['PLF_lag1'] = recent[:, 0]
+    out['PLF_lag3'] = recent[:, 2]
+    out['PLF_rolling_mean_3'] = np.divide(
+        np.nansum(recent, axis=1), counts, out=np.full(len(out), np.nan), where=counts > 0
+    )
+    return out
+
+
+def _load_cache(cache_dir):
+    try:
+        with open(cache_dir / MANIFEST_FILE, 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != FEATURE_PIPELINE_VERSION:
+            return None, {}
+        return pd.read_pickle(cache_dir / CACHE_FILE), manifest['plants']
+    except (FileNotFoundError, ValueError, KeyError):
+        return None, {}
+
+
+def _save_cache(cache_dir, local, hashes):
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp_suffix = f'.tmp-{os.getpid()}'
+    local.to_pickle(cache_dir / (CACHE_FILE + tmp_suffix))
+    with open(cache_dir / (MANIFEST_FILE + tmp_suffix), 'w') as f:
+        json.dump({'version': FEATURE_PIPELINE_VERSION, 'plants': hashes}, f)
+    os.replace(cache_dir / (CACHE_FILE + tmp_suffix), cache_dir / CACHE_FILE)
+    os.replace(cache_dir / (MANIFEST_FILE + tmp_suffix), cache_dir / MANIFEST_FILE)
+
+
+def cached_plant_features(df, cache_dir=None):
+    """Plant-local features, recomputing only plants whose source rows changed since the last run."""
+    hashes = plant_hashes(df)
+    if not cache_dir:
+        return plant_local_features(df), {'plants_recomputed': len(hashes), 'plants_cached': 0}
+
+    cache_dir = Path(cache_dir)
+    cached, cached_hashes = _load_cache(cache_dir)
+    unchanged = {key for key, digest in hashes.items() if cached_hashes.get(key) == digest}
+
+    if len(unchanged) == len(hashes) == len(cached_hashes):
+        return cached, {'plants_recomputed': 0, 'plants_cached': len(unchanged)}
+
+    fresh = plant_local_features(df[~df['plant_key'].isin(unchanged)])
+    if unchanged:
+        local = pd.concat([cached[cached['plant_key'].isin(unchanged)], fresh], ignore_index=True)
+        local = local.sort_values(['plant_key', 'Year', 'Month'], kind='stable').reset_index(drop=True)
+    else:
+        local = fresh
+
+    _save_cache(cache_dir, local, hashes)
+    return local, {'plants_recomputed': len(hashes) - len(unchanged), 'plants_cached': len(unchanged)}
+
+
+def add_fleet_features(local):
+    """Features aggregated over the whole fleet; cheap group means, so always recomputed."""
+    df = local.copy()
+    capacity_stats = {'mean': float(df['Capacity'].mean()), 'std': float(df['Capacity'].std())}
+    df['capacity_normalized'] = (df['Capacity'] - capacity_stats['mean']) / capacity_stats['std']
+    df['avg_plf_tech_month'] = df.groupby(['Technology', 'Month'])['PLF'].transform('mean')
+    df['avg_plf_band_month'] = df.groupby(['capacity_band', 'Month'])['PLF'].transform('mean')
+
+    tech_month_avg = df.groupby(['Technology', 'Month'])['PLF'].mean().reset_index()
+    tech_month_avg.columns = ['Technology', 'Month', 'avg_plf_tech_month']
+    band_month_avg = df.groupby(['capacity_band', 'Month'])['PLF'].mean().reset_index()
+    band_month_avg.columns = ['capacity_band', 'Month', 'avg_plf_band_month']
+    return df, {
+        'tech_month_avg': tech_month_avg,
+        'band_month_avg': band_month_avg,
+        'capacity_stats': capacity_stats,
+    }
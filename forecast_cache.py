@@ -0,0 +1,137 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class MemoryBackend:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, now):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None, False
+            value, expires_at = entry
+            if expires_at <= now:
+                del self.entries[key]
+                return None, True
+            self.entries.move_to_end(key)
+            return value, False
+
+    def set(self, key, value, expires_at):
+        with self.lock:
+            self.entries[key] = (value, expires_at)
+            self.entries.move_to_end(key)
+            evicted = 0
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class SQLiteBackend:
+    def __init__(self, path, max_entries):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS forecast_cache ("
+            "key TEXT PRIMARY KEY, value TEXT, expires_at REAL, last_access REAL)"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS forecast_cache_last_access ON forecast_cache (last_access)"
+        )
+        self.conn.commit()
+
+    def get(self, key, now):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value, expires_at FROM forecast_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None, False
+            if row[1] <= now:
+                self.conn.execute("DELETE FROM forecast_cache WHERE key = ?", (key,))
+                self.conn.commit()
+                return None, True
+            self.conn.execute("UPDATE forecast_cache SET last_access = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+            return json.loads(row[0]), False
+
+    def set(self, key, value, expires_at):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO forecast_cache VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), expires_at, time.time()),
+            )
+            evicted = self.conn.execute(
+                "DELETE FROM forecast_cache WHERE key IN ("
+                "SELECT key FROM forecast_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+            self.conn.commit()
+            return evicted
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM forecast_cache")
+            self.conn.commit()
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM forecast_cache").fetchone()[0]
+
+
+class ForecastCache:
+    def __init__(self, backend, ttl_seconds, fingerprint):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.fingerprint = fingerprint
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def key(self, request, model_version=None):
+        if request.is_new_plant:
+            fields = ['new', request.year, request.month, request.capacity, request.technology]
+        else:
+            fields = ['existing', request.year, request.month, request.plant_key]
+        return json.dumps([self.fingerprint, model_version, request.uncertainty] + fields)
+
+    def get(self, key):
+        value, expired = self.backend.get(key, time.time())
+        if expired:
+            self.expirations += 1
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self.evictions += self.backend.set(key, value, time.time() + self.ttl_seconds)
+
+    def stats(self):
+        return {
+            'backend': type(self.backend).__name__,
+            'entries': len(self.backend),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'fingerprint': self.fingerprint,
+        }
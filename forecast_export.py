@@ -0,0 +1,110 @@
+import csv
+import io
+import json
+import zlib
+
+EXPORT_COLUMNS = [
+    'plant_key', 'plant_name', 'year', 'month', 'capacity_mw', 'plf_percentage', 'electricity_mwh',
+    'coal_required_tonnes', 'coal_grade', 'gcv_kcal_kg',
+]
+EXPORT_FORMATS = ['csv', 'ndjson', 'parquet']
+
+
+class CsvEncoder:
+    media_type = 'text/csv'
+    extension = 'csv'
+
+    def __init__(self):
+        self.header = True
+
+    def write(self, columns):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        if self.header:
+            writer.writerow(EXPORT_COLUMNS)
+            self.header = False
+        writer.writerows(zip(*(columns[name].tolist() for name in EXPORT_COLUMNS)))
+        return buffer.getvalue().encode()
+
+    def close(self):
+        # an export without rows still gets its header
+        return (','.join(EXPORT_COLUMNS) + '\n').encode() if self.header else b''
+
+
+class NdjsonEncoder:
+    media_type = 'application/x-ndjson'
+    extension = 'ndjson'
+
+    def write(self, columns):
+        rows = zip(*(columns[name].tolist() for name in EXPORT_COLUMNS))
+        return ''.join(json.dumps(dict(zip(EXPORT_COLUMNS, row))) + '\n' for row in rows).encode()
+
+    def close(self):
+        return b''
+
+
+class ParquetEncoder:
+    """One row group per chunk; the footer is written by ``close``.
+
+    ``compression`` is Parquet's own column codec, so the file stays readable
+    by any Parquet reader instead of being wrapped in gzip.
+    """
+    media_type = 'application/vnd.apache.parquet'
+    extension = 'parquet'
+
+    def __init__(self, compression='snappy'):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Parquet export needs pyarrow; install it or use csv or ndjson")
+        self.pa = pa
+        self.schema = pa.schema([
+            ('plant_key', pa.string()), ('plant_name', pa.string()), ('year', pa.int32()), ('month', pa.int8()),
+            ('capacity_mw', pa.float64()), ('plf_percentage', pa.float64()), ('electricity_mwh', pa.float64()),
+            ('coal_required_tonnes', pa.float64()), ('coal_grade', pa.string()), ('gcv_kcal_kg', pa.float64()),
+        ])
+        self.sink = io.BytesIO()
+        self.writer = pq.ParquetWriter(self.sink, self.schema, compression=compression)
+
+    def drain(self):
+        data = self.sink.getvalue()
+        self.sink.seek(0)
+        self.sink.truncate()
+        return data
+
+    def write(self, columns):
+        self.writer.write_table(self.pa.Table.from_pydict(
+            {name: columns[name] for name in EXPORT_COLUMNS}, schema=self.schema
+        ))
+        return self.drain()
+
+    def close(self):
+        self.writer.close()
+        return self.drain()
+
+
+class GzipEncoder:
+    """Gzip framing around another encoder's byte stream."""
+
+    def __init__(self, encoder):
+        self.encoder = encoder
+        self.media_type = 'application/gzip'
+        self.extension = encoder.extension + '.gz'
+        self.compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def write(self, columns):
+        return self.compressor.compress(self.encoder.write(columns))
+
+    def close(self):
+        return self.compressor.compress(self.encoder.close()) + self.compressor.flush()
+
+
+def make_encoder(format, gzip=False):
+    """The encoder for an export ``format``; ``write`` and ``close`` return the next bytes of the body."""
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    if format == 'parquet':
+        return ParquetEncoder('gzip' if gzip else 'snappy')
+    encoder = CsvEncoder() if format == 'csv' else NdjsonEncoder()
+    return GzipEncoder(encoder) if gzip else encoder
@@ -0,0 +1,147 @@
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from startup_artifact import _source_matches, file_fingerprint
+
+GEM_UNIT_FILES = ['gem_predicted_supercritical.csv', 'gem_predicted_subcritical.xlsx']
+CACHE_VERSION = 1
+CACHE_FILE = 'units.npz'
+
+# Predicted_HR is the operating heat rate in MJ/kWh; Heat rate (Btu per kWh) is GEM's design figure
+KCAL_PER_MJ = 238.845897
+KCAL_PER_BTU = 0.251995761
+TECHNOLOGY_NAMES = {
+    'subcritical': 'Subcritical',
+    'supercritical': 'Supercritical',
+    'ultra-supercritical': 'Ultra Supercritical',
+}
+TEXT_COLUMNS = ['plant', 'unit', 'technology']
+NUMERIC_COLUMNS = ['capacity_mw', 'heat_rate', 'design_heat_rate']
+
+
+def read_unit_tables(paths):
+    """Operating GEM units from the CSV/xlsx tables, as column arrays with heat rates in kcal/kWh."""
+    import pandas as pd
+
+    frames = [pd.read_excel(path) if str(path).endswith('.xlsx') else pd.read_csv(path) for path in paths]
+    units = pd.concat(frames, ignore_index=True)
+    if 'Status' in units.columns:
+        units = units[units['Status'].fillna('operating').str.lower() == 'operating']
+
+    technology = units['Combustion technology'].str.lower().map(TECHNOLOGY_NAMES)
+    unknown = sorted(units.loc[technology.isna(), 'Combustion technology'].astype(str).unique())
+    if unknown:
+        raise ValueError(f"Unknown combustion technology in GEM units: {', '.join(unknown)}")
+    design = units['Heat rate (Btu per kWh)'].to_numpy(dtype=float) * KCAL_PER_BTU
+    operating = units['Predicted_HR'].to_numpy(dtype=float) * KCAL_PER_MJ
+    heat_rate = np.where(np.isnan(operating), design, operating)
+    capacity = units['Capacity (MW)'].to_numpy(dtype=float)
+
+    keep = np.isfinite(heat_rate) & (capacity > 0)
+    return {
+        'plant': units['Plant'].astype(str).to_numpy()[keep].astype(str),
+        'unit': units['Unit'].astype(str).to_numpy()[keep].astype(str),
+        'technology': technology.to_numpy()[keep].astype(str),
+        'capacity_mw': capacity[keep],
+        'heat_rate': heat_rate[keep],
+        'design_heat_rate': design[keep],
+    }
+
+
+class UnitIndex:
+    """GEM units sorted by plant; plant ``i`` owns the unit slice ``offsets[i]:offsets[i + 1]``."""
+
+    def __init__(self, columns):
+        order = np.argsort(columns['plant'], kind='stable')
+        self.columns = {name: np.asarray(values)[order] for name, values in columns.items()}
+        self.plants, starts = np.unique(self.columns['plant'], return_index=True)
+        self.offsets = np.append(starts, len(order)).astype(np.int64)
+        self.index = {plant: i for i, plant in enumerate(self.plants)}
+        capacity = self.columns['capacity_mw']
+        self.plant_capacity = self.reduce(capacity)
+        self.plant_heat_rate = self.reduce(capacity * self.columns['heat_rate']) / self.plant_capacity
+        self.plant_design_heat_rate = self.reduce(capacity * self.columns['design_heat_rate']) / self.plant_capacity
+
+    def __len__(self):
+        return len(self.columns['plant'])
+
+    def reduce(self, values, offsets=None):
+        """Per-plant sums of unit ``values`` (units on axis 0) over contiguous slices."""
+        offsets = self.offsets if offsets is None else offsets
+        return np.add.reduceat(values, offsets[:-1], axis=0)
+
+    def slices(self, plant_rows):
+        """Unit rows of ``plant_rows`` in order, and the offsets of each plant's slice within them."""
+        plant_rows = np.asarray(plant_rows, dtype=np.int64)
+        sizes = self.offsets[plant_rows + 1] - self.offsets[plant_rows]
+        offsets = np.append(0, np.cumsum(sizes))
+        rows = np.arange(offsets[-1]) + np.repeat(self.offsets[plant_rows] - offsets[:-1], sizes)
+        return rows, offsets
+
+    def save(self, path):
+        np.savez(path, **{name: self.columns[name] for name in TEXT_COLUMNS + NUMERIC_COLUMNS})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls({name: data[name] for name in TEXT_COLUMNS + NUMERIC_COLUMNS})
+
+
+def cache_status(cache_dir, paths):
+    manifest_path = Path(cache_dir) / 'manifest.json'
+    if not manifest_path.exists():
+        return 'missing'
+    with open(manifest_path, 'r') as f:
+        manifest = json.load(f)
+    if manifest.get('version') != CACHE_VERSION or set(manifest['sources']) != {str(p) for p in paths}:
+        return 'stale'
+    if any(not _source_matches(path, manifest['sources'][str(path)]) for path in paths):
+        return 'stale'
+    return 'fresh'
+
+
+def build_cache(cache_dir, paths):
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    index = UnitIndex(read_unit_tables(paths))
+    tmp_suffix = f'.tmp-{os.getpid()}'
+    index.save(cache_dir / (CACHE_FILE + tmp_suffix + '.npz'))
+    with open(cache_dir / ('manifest.json' + tmp_suffix), 'w') as f:
+        json.dump({'version': CACHE_VERSION, 'sources': {str(p): file_fingerprint(p) for p in paths}}, f)
+    os.replace(cache_dir / (CACHE_FILE + tmp_suffix + '.npz'), cache_dir / CACHE_FILE)
+    os.replace(cache_dir / ('manifest.json' + tmp_suffix), cache_dir / 'manifest.json')
+    return index
+
+
+def load_unit_index(cache_dir, source_dir='.'):
+    """The GEM unit index, from the binary cache in ``cache_dir`` when it matches the source tables.
+
+    Parsing the xlsx takes most of a second; the cache loads in milliseconds.
+    An empty ``cache_dir`` always reads the source tables.
+    """
+    start = time.perf_counter()
+    paths = [Path(source_dir) / name for name in GEM_UNIT_FILES]
+    if not cache_dir:
+        index, source = UnitIndex(read_unit_tables(paths)), 'source tables'
+    else:
+        status = cache_status(cache_dir, paths)
+        if status != 'fresh':
+            # fail before importing pandas when there is nothing to rebuild from
+            missing = [str(path) for path in paths if not path.exists()]
+            if missing:
+                raise FileNotFoundError(f"GEM unit tables not found: {', '.join(missing)}")
+            print(f"GEM unit cache {status}, rebuilding {cache_dir} from source tables...")
+            build_cache(cache_dir, paths)
+        index, source = UnitIndex.load(Path(cache_dir) / CACHE_FILE), f'cache {cache_dir}'
+    return index, source, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    cache_dir = sys.argv[1] if len(sys.argv) > 1 else os.getenv("GEM_CACHE_DIR", "gem_cache")
+    index = build_cache(cache_dir, GEM_UNIT_FILES)
+    print(f"Cached {len(index)} GEM units of {len(index.plants)} plants in {cache_dir}")
@@ -0,0 +1,20 @@
+import gc
+import os
+
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+preload_app = True
+
+
+def when_ready(server):
+    # Load data and models once in the master; each worker's lifespan then finds them loaded
+    import app
+    app.initialize()
+
+
+def pre_fork(server, worker):
+    gc.freeze()
@@ -0,0 +1,199 @@
+import bisect
+import cProfile
+import os
+import random
+import threading
+import time
+
+# Seconds; spans a cached /forecast hit (~100 us) to a fleet-wide stock plan
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                   2.5, 5.0, 10.0)
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def label_text(names, values, extra=''):
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self.lock:
+            values = sorted(self.values.items())
+        lines += [f'{self.name}{label_text(self.labels, key)} {format_value(v)}' for key, v in values]
+        return lines
+
+
+class Histogram:
+    """Fixed-bucket histogram; each label set keeps per-bucket counts, a sum and a count."""
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = self.series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self.lock:
+            series = sorted((key, list(counts), total) for key, (counts, total) in self.series.items())
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = f'le="{format_value(bound)}"'
+                lines.append(f'{self.name}_bucket{label_text(self.labels, key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{label_text(self.labels, key)} {format_value(total)}')
+            lines.append(f'{self.name}_count{label_text(self.labels, key)} {cumulative}')
+        return lines
+
+
+class Gauge:
+    """Read at scrape time: ``collect`` returns ``[(label_values, value), ...]``."""
+
+    def __init__(self, name, help, labels, collect):
+        self.name, self.help, self.labels, self.collect = name, help, tuple(labels), collect
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} gauge']
+        lines += [f'{self.name}{label_text(self.labels, key)} {format_value(v)}' for key, v in self.collect()]
+        return lines
+
+
+class NullMetric:
+    def inc(self, *label_values, amount=1):
+        pass
+
+    def observe(self, value, *label_values):
+        pass
+
+
+class StageTimer:
+    """Monotonic split timer: ``mark(stage)`` records the time since the previous mark."""
+
+    __slots__ = ('histogram', 'mode', 'start', 'last')
+
+    def __init__(self, histogram, mode):
+        self.histogram, self.mode = histogram, mode
+        self.start = self.last = time.perf_counter()
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.histogram.observe(now - self.last, stage, self.mode)
+        self.last = now
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+
+class NullTimer:
+    __slots__ = ()
+
+    def mark(self, stage):
+        pass
+
+    def elapsed(self):
+        return 0.0
+
+
+NULL_TIMER = NullTimer()
+
+
+class MetricsRegistry:
+    """Process-local metrics in the Prometheus text format.
+
+    When disabled every metric is a shared no-op and ``timer`` returns
+    ``NULL_TIMER``, so instrumented code pays one method call per site.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.metrics = []
+
+    def add(self, metric):
+        if not self.enabled:
+            return NullMetric()
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self.add(Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self.add(Histogram(name, help, labels, buckets))
+
+    def gauge(self, name, help, labels, collect):
+        return self.add(Gauge(name, help, labels, collect))
+
+    def timer(self, histogram, mode):
+        return StageTimer(histogram, mode) if self.enabled else NULL_TIMER
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines += metric.render()
+        return '\n'.join(lines) + '\n'
+
+
+class RequestProfiler:
+    """Opt-in cProfile hook for scoring calls.
+
+    Off unless ``directory`` is set. Then a call is profiled when the client
+    asks for it (``X-Profile: 1``) or, at ``sample_rate``, at random. Each
+    profile is dumped to its own ``.prof`` file (``python -m pstats``).
+    """
+
+    def __init__(self, directory=None, sample_rate=0.0):
+        self.directory = directory or None
+        self.sample_rate = sample_rate
+        self.sequence = 0
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def should_profile(self, requested=False):
+        if self.directory is None:
+            return False
+        return requested in ('1', 'true') or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    def wrap(self, fn, name):
+        """``fn`` wrapped to run under cProfile, and the path its profile will be dumped to."""
+        self.sequence += 1
+        path = os.path.join(self.directory, f"{name}-{os.getpid()}-{int(time.time() * 1000)}-{self.sequence}.prof")
+
+        def profiled(*args, **kwargs):
+            profile = cProfile.Profile()
+            result = profile.runcall(fn, *args, **kwargs)
+            profile.dump_stats(path)
+            return result
+
+        return profiled, path
@@ -0,0 +1,89 @@
+import numpy as np
+
+LAG_FEATURES = ['PLF_lag1', 'PLF_lag3', 'PLF_rolling_mean_3']
+
+
+class LagStateStore:
+    def __init__(self, plant_keys, values, head, last_period):
+        self.plant_keys = list(plant_keys)
+        self.index = {key: i for i, key in enumerate(self.plant_keys)}
+        self.values = values
+        self.head = head
+        self.last_period = last_period
+        self.size = values.shape[1]
+
+    @classmethod
+    def from_reference(cls, df_reference, plant_keys, size=3):
+        plant_keys = list(plant_keys)
+        index = {key: i for i, key in enumerate(plant_keys)}
+        values = np.full((len(plant_keys), size), np.nan)
+        head = np.full(len(plant_keys), size - 1, dtype=np.int64)
+        last_period = np.full(len(plant_keys), -1, dtype=np.int64)
+
+        df = df_reference[df_reference['plant_key'].isin(index)].sort_values(['plant_key', 'Year', 'Month'])
+        if len(df) == 0:
+            return cls(plant_keys, values, head, last_period)
+
+        plf = df['Actual avg PLF'] if 'Actual avg PLF' in df.columns else np.nan * df['Capacity']
+        if plf.max() > 1:
+            plf = plf / 100
+
+        latest = df.groupby('plant_key').tail(size)
+        age = latest.groupby('plant_key').cumcount(ascending=False).to_numpy()
+        rows = latest['plant_key'].map(index).to_numpy()
+        values[rows, size - 1 - age] = plf.loc[latest.index].to_numpy()
+
+        last = df.groupby('plant_key')[['Year', 'Month']].last()
+        last_period[last.index.map(index).to_numpy()] = (last['Year'] * 12 + last['Month'] - 1).to_numpy()
+        return cls(plant_keys, values, head, last_period)
+
+    def copy(self, rows=None):
+        """A private copy of the ring buffers, of every plant or only of ``rows`` (renumbered from 0)."""
+        if rows is None:
+            return LagStateStore(self.plant_keys, self.values.copy(), self.head.copy(), self.last_period.copy())
+        return LagStateStore([self.plant_keys[r] for r in rows], self.values[rows], self.head[rows],
+                             self.last_period[rows])
+
+    def rows_for(self, plant_keys):
+        return np.array([self.index[key] for key in plant_keys], dtype=np.int64)
+
+    def lag(self, rows, k):
+        return self.values[rows, (self.head[rows] - (k - 1)) % self.size]
+
+    def lag_features(self, rows):
+        recent = np.column_stack([self.lag(rows, k) for k in (1, 2, 3)])
+        counts = (~np.isnan(recent)).sum(axis=1)
+        sums = np.nansum(recent, axis=1)
+        rolling_mean = np.divide(sums, counts, out=np.full(len(rows), np.nan), where=counts > 0)
+        return np.column_stack([recent[:, 0], recent[:, 2], rolling_mean])
+
+    def push(self, rows, plf):
+        self.head[rows] = (self.head[rows] + 1) % self.size
+        self.values[rows, self.head[rows]] = plf
+        self.last_period[rows] += 1
+
+    def rollout(self, rows, steps, score_step):
+        """Score each (plant row, months ahead) pair by rolling the lag state forward.
+
+        ``score_step(rows, periods, lags)`` returns the PLF for the next month of
+        every row; predictions are pushed back into a private copy of the ring
+        buffers so later steps use them as lags. Returns the predictions and
+        whether each was scored with a full set of lag features.
+        """
+        unique_rows, inverse = np.unique(rows, return_inverse=True)
+        max_steps = np.zeros(len(unique_rows), dtype=np.int64)
+        np.maximum.at(max_steps, inverse, steps)
+
+        # only the plants being rolled out are copied; state row i is fleet row unique_rows[i]
+        state = self.copy(unique_rows)
+        predictions = np.full((len(unique_rows), max(int(max_steps.max()), 1)), np.nan)
+        full_lags = np.zeros(predictions.shape, dtype=bool)
+        for step in range(1, int(max_steps.max()) + 1):
+            active = np.flatnonzero(max_steps >= step)
+            lags = state.lag_features(active)
+            plf = score_step(unique_rows[active], state.last_period[active] + 1, lags)
+            predictions[active, step - 1] = plf
+            full_lags[active, step - 1] = ~np.isnan(lags).any(axis=1)
+            state.push(active, plf)
+
+        return predictions[inverse, steps - 1], full_lags[inverse, steps - 1]
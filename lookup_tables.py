@@ -0,0 +1,104 @@
+from collections import namedtuple
+import numpy as np
+
+PLANT_ATTRIBUTE_DEFAULTS = {
+    'Actual SHR': 2750,
+    'Auxiliary consumption (%)': 8.0,
+}
+
+PlantRecord = namedtuple('PlantRecord', [
+    'plant_name', 'capacity', 'technology', 'heat_rate', 'gcv', 'coal_grade', 'aux_consumption',
+])
+TEXT_COLUMNS = ('plant_name', 'technology', 'coal_grade')
+
+
+class MonthlyAverageTable:
+    def __init__(self, records, key_column, value_column):
+        keys = sorted({r[key_column] for r in records})
+        self.index = {key: i for i, key in enumerate(keys)}
+        self.values = np.full((len(keys), 13), np.nan)
+        for r in records:
+            self.values[self.index[r[key_column]], int(r['Month'])] = r[value_column]
+
+    def lookup(self, key, month):
+        if not 1 <= month <= 12:
+            raise ValueError("month must be between 1 and 12")
+        row = self.index.get(key)
+        value = np.nan if row is None else self.values[row, month]
+        if np.isnan(value):
+            raise KeyError(f"No monthly PLF average for {key} in month {month}")
+        return value
+
+    def covers_all_months(self, keys):
+        rows = np.array([self.index.get(key, -1) for key in keys])
+        covered = np.zeros(len(rows), dtype=bool)
+        known = rows >= 0
+        covered[known] = ~np.isnan(self.values[rows[known], 1:]).any(axis=1)
+        return covered
+
+    def lookup_batch(self, keys, months):
+        months = np.broadcast_to(months, len(keys))
+        if ((months < 1) | (months > 12)).any():
+            raise ValueError("month must be between 1 and 12")
+        rows = np.array([self.index.get(key, -1) for key in keys])
+        values = np.full(len(rows), np.nan)
+        known = rows >= 0
+        values[known] = self.values[rows[known], months[known]]
+        return values
+
+
+class PlantTable:
+    """Plant attributes as columns with a key -> row index.
+
+    The columns may be read-only memory maps of the startup artifact; ``get``
+    builds a ``PlantRecord`` for one row on demand instead of holding one per plant.
+    """
+
+    def __init__(self, plant_keys, columns):
+        self.plant_keys = list(plant_keys)
+        self.index = {key: i for i, key in enumerate(self.plant_keys)}
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.plant_keys)
+
+    def __iter__(self):
+        return iter(self.plant_keys)
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def get(self, key, default=None):
+        row = self.index.get(key)
+        if row is None:
+            return default
+        values = [self.columns[field][row] for field in PlantRecord._fields]
+        return PlantRecord(*(v.item() if isinstance(v, np.generic) else v for v in values))
+
+
+def build_plant_records(df_reference):
+    df = df_reference.copy()
+    for column, default in PLANT_ATTRIBUTE_DEFAULTS.items():
+        if column not in df.columns:
+            df[column] = default
+    if 'Name of TPS' not in df.columns:
+        df['Name of TPS'] = df['plant_key']
+
+    latest = df.groupby('plant_key', sort=True).last()
+    sources = {
+        'plant_name': 'Name of TPS', 'capacity': 'Capacity', 'technology': 'Technology', 'heat_rate': 'Actual SHR',
+        'gcv': 'Estimated_GCV_kcal_per_kg', 'coal_grade': 'Coal_Grade', 'aux_consumption': 'Auxiliary consumption (%)',
+    }
+    columns = {}
+    for field in PlantRecord._fields:
+        values = latest[sources[field]]
+        if field in TEXT_COLUMNS:
+            columns[field] = values.astype(object).where(values.notna(), None).to_numpy()
+        else:
+            columns[field] = values.to_numpy(dtype=float)
+    return PlantTable(latest.index, columns)
+
+
+def plant_record_arrays(plant_records):
+    """The table's columns; the arrays are shared, not copied."""
+    return dict(plant_records.columns)
@@ -0,0 +1,217 @@
+import json
+import os
+import pickle
+import re
+import shutil
+import sys
+from datetime import datetime, timezone
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+
+from lookup_tables import MonthlyAverageTable
+from startup_artifact import METADATA_FILE, MODEL_FILES, QUANTILE_ALPHAS, QUANTILE_MODEL_FILES, available_model_files, file_fingerprint
+from tree_engine import CompiledEnsemble
+from uncertainty import ResidualDistribution
+
+LATEST_FILE = 'LATEST'
+METRICS_FILE = 'metrics.json'
+# published versions are 'v' plus a timestamp; nothing else may name a directory under the registry root
+VERSION_PATTERN = re.compile(r'v[\w.-]+')
+
+
+class ModelRegistry:
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def path(self, version):
+        if not VERSION_PATTERN.fullmatch(version):
+            raise ValueError(f"Invalid model version: {version!r}")
+        return self.root / version
+
+    def versions(self):
+        if not self.root.is_dir():
+            return []
+        return sorted(p.name for p in self.root.iterdir()
+                      if VERSION_PATTERN.fullmatch(p.name) and (p / METRICS_FILE).exists())
+
+    def latest_version(self):
+        try:
+            with open(self.root / LATEST_FILE, 'r') as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return None
+        if not VERSION_PATTERN.fullmatch(version):
+            return None
+        return version if (self.path(version) / METRICS_FILE).exists() else None
+
+    def metrics(self, version):
+        with open(self.path(version) / METRICS_FILE, 'r') as f:
+            return json.load(f)
+
+    def model_files(self, version):
+        path = self.path(version)
+        return {name: str(path / file) for name, file in available_model_files(path).items()}
+
+    def load_metadata(self, version):
+        if not (self.path(version) / METRICS_FILE).exists():
+            raise ValueError(f"Unknown model version: {version}")
+        with open(self.path(version) / METADATA_FILE, 'rb') as f:
+            return pickle.load(f)
+
+    def set_latest(self, version):
+        if not (self.path(version) / METRICS_FILE).exists():
+            raise ValueError(f"Unknown model version: {version}")
+        tmp_path = self.root / f'{LATEST_FILE}.tmp-{os.getpid()}'
+        with open(tmp_path, 'w') as f:
+            f.write(version)
+        os.replace(tmp_path, self.root / LATEST_FILE)
+
+    def publish(self, source_dir='.', metrics=None, make_latest=True, extra_files=()):
+        source_dir = Path(source_dir)
+        self.root.mkdir(parents=True, exist_ok=True)
+        version = datetime.now(timezone.utc).strftime('v%Y%m%d-%H%M%S')
+        suffix = 1
+        while self.path(version).exists():
+            version = f"{version.split('.')[0]}.{suffix}"
+            suffix += 1
+
+        if metrics is None:
+            with open(source_dir / METADATA_FILE, 'rb') as f:
+                metadata = pickle.load(f)
+            metrics = {name: metadata.get(f'{name}_metrics') for name in MODEL_FILES}
+
+        tmp_dir = self.root / f'.{version}.tmp-{os.getpid()}'
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir()
+        files = [METADATA_FILE] + list(available_model_files(source_dir).values())
+        for name in files + list(extra_files):
+            shutil.copyfile(source_dir / name, tmp_dir / name)
+        with open(tmp_dir / METRICS_FILE, 'w') as f:
+            json.dump({
+                'version': version,
+                'published_at': datetime.now(timezone.utc).isoformat(),
+                'metrics': metrics,
+                'files': {name: file_fingerprint(tmp_dir / name)['sha256'] for name in files},
+            }, f, indent=2)
+        os.rename(tmp_dir, self.path(version))
+
+        if make_latest:
+            self.set_latest(version)
+        return version
+
+
+def load_booster(model_file):
+    import lightgbm as lgb
+    return lgb.Booster(model_file=model_file)
+
+
+class BoosterStack:
+    """Boosters over the same features, scored together into one column each."""
+
+    def __init__(self, boosters):
+        self.boosters = boosters
+
+    def predict(self, X):
+        return np.column_stack([booster.predict(X) for booster in self.boosters])
+
+
+class ModelBundle:
+    """Everything that changes together when a new model version is trained.
+
+    Request handlers read the active bundle once and use it for the whole
+    request, so a reload only has to rebind one module-level reference.
+    The lightgbm engine loads its Boosters when the bundle is built; the
+    native engine reads the compiled arrays and never imports LightGBM.
+    """
+
+    def __init__(self, version, metadata, model_files, engine='lightgbm', compiled_dirs=None):
+        self.version = version
+        self.metadata = metadata
+        self.model_files = model_files
+        self.quantile_names = [name for name in QUANTILE_MODEL_FILES if name in model_files]
+        if engine == 'native':
+            if compiled_dirs:
+                self.base_scorer = CompiledEnsemble.load(compiled_dirs['base'])
+                self.enhanced_scorer = CompiledEnsemble.load(compiled_dirs['enhanced'])
+            else:
+                self.base_scorer = CompiledEnsemble.from_model_file(model_files['base'])
+                self.enhanced_scorer = CompiledEnsemble.from_model_file(model_files['enhanced'])
+        elif engine == 'lightgbm':
+            self.base_scorer = self.base_model
+            self.enhanced_scorer = self.enhanced_model
+        else:
+            raise ValueError(f"Unknown INFERENCE_ENGINE: {engine}")
+
+        self.quantile_scorer = None
+        if self.quantile_names and engine == 'native':
+            self.quantile_scorer = CompiledEnsemble.stack([
+                CompiledEnsemble.load(compiled_dirs[name]) if compiled_dirs
+                else CompiledEnsemble.from_model_file(model_files[name])
+                for name in self.quantile_names
+            ])
+        elif self.quantile_names:
+            self.quantile_scorer = BoosterStack([self.quantile_models[name] for name in self.quantile_names])
+
+        self.tech_month_table = MonthlyAverageTable(metadata['tech_month_avg'], 'Technology', 'avg_plf_tech_month')
+        self.band_month_table = MonthlyAverageTable(metadata['band_month_avg'], 'capacity_band', 'avg_plf_band_month')
+
+    @cached_property
+    def base_model(self):
+        return load_booster(self.model_files['base'])
+
+    @cached_property
+    def enhanced_model(self):
+        return load_booster(self.model_files['enhanced'])
+
+    @cached_property
+    def quantile_models(self):
+        return {name: load_booster(self.model_files[name]) for name in self.quantile_names}
+
+    @cached_property
+    def enhanced_quantile_offsets(self):
+        """Enhanced-model residual quantiles at the quantile models' alphas, shifted so the median is zero."""
+        residuals = ResidualDistribution(self.metadata.get('enhanced_residuals'),
+                                         self.metadata['enhanced_metrics']['rmse'])
+        return residuals.quantiles(QUANTILE_ALPHAS) - residuals.quantiles([0.5])[0]
+
+    @classmethod
+    def from_registry(cls, registry, version, engine='lightgbm'):
+        return cls(version, registry.load_metadata(version), registry.model_files(version), engine)
+
+    def check_features(self):
+        scorers = [('base', self.base_scorer), ('enhanced', self.enhanced_scorer)]
+        if isinstance(self.quantile_scorer, BoosterStack):
+            scorers += list(zip(self.quantile_names, self.quantile_scorer.boosters))
+        elif self.quantile_scorer is not None:
+            scorers.append(('quantile', self.quantile_scorer))
+        for name, scorer in scorers:
+            expected = self.metadata['enhanced_features' if name == 'enhanced' else 'base_features']
+            features = scorer.feature_name() if hasattr(scorer, 'feature_name') else scorer.feature_names
+            if features != expected:
+                raise ValueError(f"{name} model features {features} do not match metadata {expected}")
+
+    def bind_fleet(self, fleet):
+        self.tech_encoded = np.array([self.metadata['tech_map'].get(t, 0) for t in fleet['technology']])
+        self.band_encoded = np.array([self.metadata['band_map'][b] for b in fleet['band']])
+        self.has_averages = (self.tech_month_table.covers_all_months(fleet['technology']) &
+                             self.band_month_table.covers_all_months(fleet['band']))
+        return self
+
+
+if __name__ == "__main__":
+    registry = ModelRegistry(os.getenv("MODEL_REGISTRY_DIR", "model_registry"))
+    command = sys.argv[1] if len(sys.argv) > 1 else "list"
+    if command == "publish":
+        print(f"Published model version {registry.publish()} to {registry.root}")
+    elif command == "promote" and len(sys.argv) > 2:
+        registry.set_latest(sys.argv[2])
+        print(f"Promoted model version {sys.argv[2]}")
+    elif command == "list":
+        latest = registry.latest_version()
+        for version in registry.versions():
+            print(f"{'*' if version == latest else ' '} {version}  {json.dumps(registry.metrics(version)['metrics'])}")
+    else:
+        print("Usage: python model_registry.py [list | publish | promote <version>]")
+        sys.exit(1)
@@ -0,0 +1,427 @@
+import glob
+import os
+from collections import Counter
+from pathlib import Path
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+
+from feature_pipeline import BAND_MAP, TECH_MAP
+from lag_state import LAG_FEATURES
+from startup_artifact import QUANTILE_ALPHAS
+from train_generalized_model import interval_metrics, point_metrics
+
+# Peak bytes per row while a CSV chunk is parsed, sorted and featurized, and while a
+# feature batch is built for LightGBM; measured with bench_out_of_core.py
+CHUNK_ROW_BYTES = 800
+BATCH_ROW_BYTES = 700
+MIN_CHUNK_ROWS = 10_000
+
+STORE_COLUMNS = {
+    'period': np.int32,
+    'Month': np.int8,
+    'tech': np.int16,
+    'technology_encoded': np.int8,
+    'capacity_band_encoded': np.int8,
+    'Capacity': np.float64,
+    'PLF': np.float64,
+    **{name: np.float64 for name in LAG_FEATURES},
+}
+LAGS = (1, 2, 3)
+DATASET_PARAMS = {'verbose': -1}
+
+
+def partition_paths(source):
+    """CSV partitions of ``source``: a file, a directory of ``*.csv``/``*.csv.gz`` or a glob, in name order."""
+    source = str(source)
+    if os.path.isdir(source):
+        paths = sorted(glob.glob(os.path.join(source, '*.csv')) + glob.glob(os.path.join(source, '*.csv.gz')))
+    elif glob.has_magic(source):
+        paths = sorted(glob.glob(source))
+    else:
+        paths = [source]
+    if not paths:
+        raise ValueError(f"No CSV partitions found at {source}")
+    return paths
+
+
+def memory_plan(budget_mb):
+    budget = budget_mb * 2**20
+    return {
+        'chunk_rows': max(MIN_CHUNK_ROWS, budget // CHUNK_ROW_BYTES),
+        'batch_rows': max(MIN_CHUNK_ROWS, budget // BATCH_ROW_BYTES),
+    }
+
+
+class ColumnStore:
+    """One raw binary file per column, appended chunk by chunk and read back by row range."""
+
+    def __init__(self, directory, columns=STORE_COLUMNS):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.columns = {name: np.dtype(dtype) for name, dtype in columns.items()}
+        self.rows = 0
+        for name in self.columns:
+            open(self.path(name), 'wb').close()
+
+    def path(self, name):
+        return self.directory / f'{name}.bin'
+
+    def append(self, values):
+        for name, dtype in self.columns.items():
+            with open(self.path(name), 'ab') as f:
+                np.ascontiguousarray(values[name], dtype=dtype).tofile(f)
+        self.rows += len(values['period'])
+
+    def read(self, names, start, stop):
+        return {
+            name: np.fromfile(self.path(name), dtype=self.columns[name], count=stop - start,
+                              offset=start * self.columns[name].itemsize)
+            for name in names
+        }
+
+    def take(self, names, rows, max_span):
+        """Columns at sorted ``rows``, reading contiguous spans of at most ``max_span`` rows."""
+        parts = {name: [] for name in names}
+        i = 0
+        while i < len(rows):
+            j = max(int(np.searchsorted(rows, rows[i] + max_span)), i + 1)
+            block = self.read(names, int(rows[i]), int(rows[j - 1]) + 1)
+            for name in names:
+                parts[name].append(block[name][rows[i:j] - rows[i]])
+            i = j
+        return {name: np.concatenate(values) if values else np.empty(0, self.columns[name])
+                for name, values in parts.items()}
+
+
+class LagCarry:
+    """The last three PLF values and period of every series, carried from one chunk to the next.
+
+    Chunks may split a series anywhere, but each chunk must only hold rows
+    at or after the series' rows in earlier chunks.
+    """
+
+    def __init__(self):
+        self.index = {}
+        self.history = np.full((0, len(LAGS)), np.nan)
+        self.last_period = np.zeros(0, dtype=np.int64)
+
+    def series_ids(self, keys):
+        codes, uniques = pd.factorize(keys, sort=True)
+        ids = np.array([self.index.setdefault(key, len(self.index)) for key in uniques], dtype=np.int64)
+        grow = len(self.index) - len(self.last_period)
+        if grow:
+            self.history = np.vstack([self.history, np.full((grow, len(LAGS)), np.nan)])
+            self.last_period = np.concatenate([self.last_period, np.full(grow, np.iinfo(np.int64).min)])
+        return codes, ids
+
+    def lag_features(self, series, period, plf):
+        """Lag features for rows sorted by series then period; ``series`` are ids from ``series_ids``."""
+        n = len(series)
+        starts = np.flatnonzero(np.r_[True, series[1:] != series[:-1]])
+        sizes = np.diff(np.r_[starts, n])
+        ids = series[starts]
+        late = period[starts] < self.last_period[ids]
+        if late.any():
+            raise ValueError(f"{int(late.sum())} series have rows earlier than rows already read; "
+                             f"partitions must be in time order")
+
+        row = np.arange(n)
+        position = row - np.repeat(starts, sizes)
+        recent = np.column_stack([
+            np.where(position >= k, plf[np.maximum(row - k, 0)],
+                     self.history[series, np.clip(k - position - 1, 0, len(LAGS) - 1)])
+            for k in LAGS
+        ])
+
+        ends = starts + sizes - 1
+        self.history[ids] = np.column_stack([
+            np.where(sizes > j, plf[np.maximum(ends - j, 0)],
+                     self.history[ids, np.clip(j - sizes, 0, len(LAGS) - 1)])
+            for j in range(len(LAGS))
+        ])
+        self.last_period[ids] = period[ends]
+
+        counts = (~np.isnan(recent)).sum(axis=1)
+        rolling_mean = np.divide(np.nansum(recent, axis=1), counts, out=np.full(n, np.nan), where=counts > 0)
+        return {'PLF_lag1': recent[:, 0], 'PLF_lag3': recent[:, 2], 'PLF_rolling_mean_3': rolling_mean}
+
+
+class FleetStats:
+    """Technology/band-month PLF sums, capacity moments and split-date histograms, merged chunk by chunk."""
+
+    def __init__(self):
+        self.technologies = {}
+        self.tech_sums = np.zeros((0, 3, 12))
+        self.band_sums = np.zeros((len(BAND_MAP), 3, 12))
+        self.capacity = (0, 0.0, 0.0)
+        self.periods = {'base': Counter(), 'enhanced': Counter()}
+
+    def tech_codes(self, technology):
+        codes, uniques = pd.factorize(technology)
+        ids = np.array([self.technologies.setdefault(t, len(self.technologies)) for t in uniques], dtype=np.int16)
+        grow = len(self.technologies) - len(self.tech_sums)
+        if grow:
+            self.tech_sums = np.concatenate([self.tech_sums, np.zeros((grow, 3, 12))])
+        return np.where(codes >= 0, ids[codes], -1).astype(np.int16)
+
+    @staticmethod
+    def _accumulate(sums, group, month, plf):
+        # rows present, PLF count and PLF sum per group-month, as groupby().mean() sees them
+        np.add.at(sums[:, 0], (group, month - 1), 1)
+        has_plf = ~np.isnan(plf)
+        np.add.at(sums[:, 1], (group[has_plf], month[has_plf] - 1), 1)
+        np.add.at(sums[:, 2], (group[has_plf], month[has_plf] - 1), plf[has_plf])
+
+    def update(self, values):
+        month, plf = values['Month'].astype(np.int64), values['PLF']
+        known = values['tech'] >= 0
+        self._accumulate(self.tech_sums, values['tech'][known].astype(np.int64), month[known], plf[known])
+        self._accumulate(self.band_sums, values['capacity_band_encoded'].astype(np.int64), month, plf)
+
+        # Chan et al. pairwise merge of count, mean and sum of squared deviations
+        capacity = values['Capacity']
+        n, mean, m2 = self.capacity
+        n_b, mean_b = len(capacity), float(capacity.mean())
+        m2_b = float(((capacity - mean_b) ** 2).sum())
+        delta = mean_b - mean
+        total = n + n_b
+        self.capacity = (total, mean + delta * n_b / total, m2 + m2_b + delta ** 2 * n * n_b / total)
+
+        base = known & ~np.isnan(plf)
+        enhanced = base & ~np.isnan(values['PLF_lag1']) & ~np.isnan(values['PLF_lag3'])
+        for name, mask in (('base', base), ('enhanced', enhanced)):
+            self.periods[name].update(dict(zip(*np.unique(values['period'][mask], return_counts=True))))
+
+    def capacity_stats(self):
+        n, mean, m2 = self.capacity
+        return {'mean': float(mean), 'std': float(np.sqrt(m2 / (n - 1))) if n > 1 else float('nan')}
+
+    @staticmethod
+    def _means(sums):
+        return np.divide(sums[:, 2], sums[:, 1], out=np.full(sums[:, 2].shape, np.nan), where=sums[:, 1] > 0)
+
+    def tables(self):
+        """(technology, month) and (band, month) average PLF arrays used to build feature rows."""
+        return {'tech': self._means(self.tech_sums), 'band': self._means(self.band_sums)}
+
+    def average_frames(self):
+        """The ``tech_month_avg``/``band_month_avg`` metadata frames, as ``add_fleet_features`` builds them."""
+        frames = {}
+        for name, labels, sums, column, value in [
+            ('tech_month_avg', list(self.technologies), self.tech_sums, 'Technology', 'avg_plf_tech_month'),
+            ('band_month_avg', list(BAND_MAP), self.band_sums, 'capacity_band', 'avg_plf_band_month'),
+        ]:
+            group, month = np.nonzero(sums[:, 0] > 0)
+            frame = pd.DataFrame({column: np.array(labels, dtype=object)[group], 'Month': month + 1,
+                                  value: self._means(sums)[group, month]})
+            frames[name] = frame.sort_values([column, 'Month']).reset_index(drop=True)
+        return frames
+
+    def split_period(self, name, q=0.8):
+        """``np.quantile`` of the model's row periods, from the histogram instead of the rows."""
+        values = np.array(sorted(self.periods[name]), dtype=np.int64)
+        counts = np.array([self.periods[name][v] for v in values], dtype=np.int64)
+        if not len(values):
+            raise ValueError(f"No complete rows for the {name} model")
+        position = (counts.sum() - 1) * q
+        cumulative = np.cumsum(counts)
+        lower = values[np.searchsorted(cumulative, np.floor(position), side='right')]
+        upper = values[np.searchsorted(cumulative, np.ceil(position), side='right')]
+        return lower + (position - np.floor(position)) * (upper - lower)
+
+
+def chunk_values(chunk, carry, stats, series_key, plf_scale):
+    """Store columns for one CSV chunk, sorted by series then period."""
+    chunk = chunk[chunk['Capacity'].notna()]
+    if 'Day' in chunk.columns:
+        dates = pd.to_datetime(pd.DataFrame({'year': chunk['Year'], 'month': chunk['Month'], 'day': chunk['Day']}))
+        period = dates.to_numpy().astype('datetime64[D]').astype(np.int64)
+    else:
+        period = (chunk['Year'] * 12 + chunk['Month'] - 1).to_numpy(np.int64)
+    plf = chunk['Actual avg PLF' if 'Actual avg PLF' in chunk.columns else 'PLF'].to_numpy(float) / plf_scale
+
+    codes, ids = carry.series_ids(chunk[series_key].astype(str).to_numpy())
+    order = np.lexsort((period, codes))
+    series = ids[codes][order]
+    period, plf = period[order], plf[order]
+    month = chunk['Month'].to_numpy(np.int64)[order]
+    capacity = chunk['Capacity'].to_numpy(float)[order]
+    technology = chunk['Technology'].to_numpy(object)[order]
+
+    values = {
+        'period': period,
+        'Month': month,
+        'tech': stats.tech_codes(technology),
+        'technology_encoded': np.array([TECH_MAP.get(t, 0) for t in technology]),
+        'capacity_band_encoded': np.where(capacity < 500, 0, np.where(capacity < 1500, 1, 2)),
+        'Capacity': capacity,
+        'PLF': plf,
+        **carry.lag_features(series, period, plf),
+    }
+    stats.update(values)
+    return values
+
+
+def build_column_store(paths, directory, chunk_rows, series_key='plant_key'):
+    """One pass over the partitions: lag features, fleet sums and a binary column store.
+
+    PLF is read from ``Actual avg PLF`` (percent, as in FINAL_MERGED_DATA.csv)
+    or ``PLF``; a ``Day`` column switches the time index from months to days.
+    """
+    store, carry, stats = ColumnStore(directory), LagCarry(), FleetStats()
+    plf_scale = None
+    for path in paths:
+        for chunk in pd.read_csv(path, chunksize=chunk_rows, dtype={series_key: str}):
+            missing = [c for c in [series_key, 'Year', 'Month', 'Capacity', 'Technology'] if c not in chunk.columns]
+            if missing or not {'Actual avg PLF', 'PLF'} & set(chunk.columns):
+                raise ValueError(f"{path}: missing required columns {missing or ['Actual avg PLF or PLF']}")
+            plf_column = 'Actual avg PLF' if 'Actual avg PLF' in chunk.columns else 'PLF'
+            peak = chunk[plf_column].max()
+            if plf_scale is None and pd.notna(peak):
+                plf_scale = 100 if peak > 1 else 1
+            elif plf_scale == 1 and peak > 1:
+                raise ValueError(f"{path}: PLF values above 1 after earlier chunks were read as fractions")
+            store.append(chunk_values(chunk, carry, stats, series_key, plf_scale or 1))
+    return store, stats, len(carry.index)
+
+
+class FeatureSequence(lgb.Sequence):
+    """Feature rows for a sorted subset of the column store, built batch by batch for ``lgb.Dataset``."""
+
+    def __init__(self, store, rows, features, stats, batch_size):
+        self.store, self.rows, self.features = store, rows, features
+        self.tables = stats.tables()
+        self.capacity_stats = stats.capacity_stats()
+        self.batch_size = batch_size
+        self.cached_block, self.cached = None, None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, (slice, list)):
+            return self.build(self.rows[idx])
+        # LightGBM samples single rows in increasing order; serve them from one batch at a time
+        block = idx // self.batch_size
+        if block != self.cached_block:
+            self.cached_block = block
+            self.cached = self.build(self.rows[block * self.batch_size:(block + 1) * self.batch_size])
+        return self.cached[idx - block * self.batch_size]
+
+    def build(self, rows):
+        values = self.store.take(list(STORE_COLUMNS), rows, self.batch_size)
+        month = values['Month'].astype(np.int64)
+        tech = values['tech'].astype(np.int64)
+        avg_tech = self.tables['tech'][np.maximum(tech, 0), month - 1] if len(self.tables['tech']) else \
+            np.full(len(rows), np.nan)
+        columns = {
+            **values,
+            'capacity_normalized': (values['Capacity'] - self.capacity_stats['mean']) / self.capacity_stats['std'],
+            'Month': month,
+            'quarter': (month - 1) // 3 + 1,
+            'month_sin': np.sin(2 * np.pi * month / 12),
+            'month_cos': np.cos(2 * np.pi * month / 12),
+            'is_summer': np.isin(month, [4, 5, 6]).astype(int),
+            'is_monsoon': np.isin(month, [7, 8, 9]).astype(int),
+            'is_winter': np.isin(month, [11, 12, 1, 2]).astype(int),
+            'avg_plf_tech_month': np.where(tech >= 0, avg_tech, np.nan),
+            'avg_plf_band_month': self.tables['band'][values['capacity_band_encoded'].astype(np.int64), month - 1],
+        }
+        return np.column_stack([columns[name] for name in self.features]).astype(float)
+
+
+def split_rows(store, stats, name, chunk_rows):
+    """Store rows of the model's complete rows before and from its 80th-percentile split period."""
+    split = stats.split_period(name)
+    dtype = np.int32 if store.rows < 2**31 else np.int64
+    train, test = [], []
+    for start in range(0, store.rows, chunk_rows):
+        values = store.read(['period', 'tech', 'PLF', 'PLF_lag1', 'PLF_lag3'], start, min(start + chunk_rows, store.rows))
+        keep = (values['tech'] >= 0) & ~np.isnan(values['PLF'])
+        if name == 'enhanced':
+            keep &= ~np.isnan(values['PLF_lag1']) & ~np.isnan(values['PLF_lag3'])
+        rows = np.flatnonzero(keep).astype(dtype) + dtype(start)
+        before = values['period'][keep] < split
+        train.append(rows[before])
+        test.append(rows[~before])
+    return np.concatenate(train), np.concatenate(test)
+
+
+def labels(store, rows, chunk_rows, dtype=np.float32):
+    return np.concatenate([
+        store.take(['PLF'], rows[i:i + chunk_rows], 4 * chunk_rows)['PLF'].astype(dtype)
+        for i in range(0, len(rows), chunk_rows)
+    ]) if len(rows) else np.empty(0, dtype=dtype)
+
+
+def write_datasets(store, stats, name, features, directory, plan):
+    """Bin the model's train/test rows into LightGBM binary Datasets without materializing the features.
+
+    Returns the split as ``fit_model`` and ``fit_quantile_models`` take it.
+    """
+    train_rows, test_rows = split_rows(store, stats, name, plan['chunk_rows'])
+    paths = {split: str(Path(directory) / f'{name}_{split}.bin') for split in ('train', 'test')}
+    train = lgb.Dataset(FeatureSequence(store, train_rows, features, stats, plan['batch_rows']),
+                        label=labels(store, train_rows, plan['chunk_rows']), feature_name=features,
+                        params=DATASET_PARAMS)
+    train.construct().save_binary(paths['train'])
+    lgb.Dataset(FeatureSequence(store, test_rows, features, stats, plan['batch_rows']),
+                label=labels(store, test_rows, plan['chunk_rows']), feature_name=features, reference=train,
+                params=DATASET_PARAMS).construct().save_binary(paths['test'])
+    return {'paths': paths, 'features': features, 'test_rows': test_rows, 'n_train': len(train_rows)}
+
+
+def load_datasets(split):
+    train = lgb.Dataset(split['paths']['train'], params=DATASET_PARAMS).construct()
+    return train, lgb.Dataset(split['paths']['test'], reference=train, params=DATASET_PARAMS).construct()
+
+
+def predict_rows(models, store, rows, features, stats, batch_rows):
+    """Raw predictions of each model on the store rows, one feature batch at a time."""
+    sequence = FeatureSequence(store, rows, features, stats, batch_rows)
+    out = np.empty((len(rows), len(models)))
+    for start in range(0, len(rows), batch_rows):
+        X = sequence[start:start + batch_rows]
+        for k, model in enumerate(models):
+            out[start:start + len(X), k] = model.predict(X)
+    return out
+
+
+def fit_model(store, stats, split, params, plan, num_boost_round=500):
+    """``train_generalized_model.fit_model`` on a split from ``write_datasets``; same return values."""
+    train_data, valid_data = load_datasets(split)
+    model = lgb.train(
+        params,
+        train_data,
+        num_boost_round=num_boost_round,
+        valid_sets=[train_data, valid_data],
+        callbacks=[lgb.early_stopping(50, verbose=False)]
+    )
+    del train_data, valid_data
+
+    rows, features = split['test_rows'], split['features']
+    raw = predict_rows([model], store, rows, features, stats, plan['batch_rows'])[:, 0]
+    metrics, residuals = point_metrics(labels(store, rows, plan['chunk_rows'], np.float64), raw)
+    shape = (split['n_train'] + len(rows), len(features) + 2)
+    return model, metrics, residuals, shape, split['n_train'], len(rows)
+
+
+def fit_quantile_models(store, stats, split, params, plan, alphas=QUANTILE_ALPHAS, num_boost_round=500):
+    """``train_generalized_model.fit_quantile_models`` on a split from ``write_datasets``."""
+    train_data, valid_data = load_datasets(split)
+    models = []
+    for alpha in alphas:
+        models.append(lgb.train(
+            {**params, 'objective': 'quantile', 'alpha': alpha, 'metric': 'quantile'},
+            train_data,
+            num_boost_round=num_boost_round,
+            valid_sets=[valid_data],
+            callbacks=[lgb.early_stopping(50, verbose=False)]
+        ))
+    del train_data, valid_data
+
+    rows = split['test_rows']
+    raw = predict_rows(models, store, rows, split['features'], stats, plan['batch_rows'])
+    return models, interval_metrics(labels(store, rows, plan['chunk_rows'], np.float64), raw, models, alphas)
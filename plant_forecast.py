@@ -0,0 +1,107 @@
+import os
+
+import numpy as np
+
+from lookup_tables import plant_record_arrays
+
+# the enhanced model's lags are rolled forward at most this many months past a plant's last observation
+MAX_ROLLOUT_MONTHS = int(os.getenv("MAX_ROLLOUT_MONTHS", "144"))
+
+
+def days_in_month(year, month):
+    months = (np.asarray(year) - 1970) * 12 + np.asarray(month) - 1
+    start = months.astype('datetime64[M]')
+    return ((start + 1).astype('datetime64[D]') - start.astype('datetime64[D]')).astype(int)
+
+def calculate_electricity_generation_batch(capacity_mw, plf, year, month):
+    return capacity_mw * plf * 24 * days_in_month(year, month) * 1000
+
+def calculate_coal_requirement_batch(electricity_kwh, heat_rate, gcv, aux_consumption):
+    aux = np.where(aux_consumption > 1, aux_consumption / 100, aux_consumption)
+    coal_kg = (electricity_kwh * heat_rate) / (gcv * (1 - aux))
+    return coal_kg / 1000
+
+def get_capacity_band_batch(capacity):
+    return np.where(capacity < 500, 'Small', np.where(capacity < 1500, 'Medium', 'Large'))
+
+def fleet_arrays(plant_records):
+    """Plant columns the forecasts index by lag-store row, with the capacity band the models encode."""
+    fleet = plant_record_arrays(plant_records)
+    fleet['band'] = get_capacity_band_batch(fleet['capacity'])
+    return fleet
+
+def build_base_features(metadata, tech_encoded, capacity, band_encoded, month, avg_tech, avg_band):
+    month = np.asarray(month)
+    columns = {
+        'technology_encoded': tech_encoded,
+        'capacity_normalized': (capacity - metadata['capacity_stats']['mean']) / metadata['capacity_stats']['std'],
+        'capacity_band_encoded': band_encoded,
+        'Month': month,
+        'quarter': (month - 1) // 3 + 1,
+        'month_sin': np.sin(2 * np.pi * month / 12),
+        'month_cos': np.cos(2 * np.pi * month / 12),
+        'is_summer': np.isin(month, [4, 5, 6]).astype(int),
+        'is_monsoon': np.isin(month, [7, 8, 9]).astype(int),
+        'is_winter': np.isin(month, [11, 12, 1, 2]).astype(int),
+        'avg_plf_tech_month': avg_tech,
+        'avg_plf_band_month': avg_band,
+    }
+    return np.column_stack([columns[name] for name in metadata['base_features']]).astype(float)
+
+def fleet_base_features(models, fleet, rows, month):
+    technology = fleet['technology'][rows]
+    band = fleet['band'][rows]
+    return build_base_features(
+        models.metadata, models.tech_encoded[rows], fleet['capacity'][rows], models.band_encoded[rows], month,
+        models.tech_month_table.lookup_batch(technology, month), models.band_month_table.lookup_batch(band, month),
+    )
+
+def score_existing_step(models, fleet, rows, periods, lags):
+    base_features = fleet_base_features(models, fleet, rows, periods % 12 + 1)
+    plf = np.empty(len(rows))
+    has_lags = ~np.isnan(lags).any(axis=1)
+    if has_lags.any():
+        plf[has_lags] = models.enhanced_scorer.predict(np.column_stack([base_features[has_lags], lags[has_lags]]))
+    if not has_lags.all():
+        plf[~has_lags] = models.base_scorer.predict(base_features[~has_lags])
+    return np.clip(plf, 0, 1)
+
+def predict_existing_plf(models, fleet, lag_store, plant_keys, year, month):
+    """PLF of existing plants, and whether the enhanced model (rather than the base model) scored each row.
+
+    Months up to ``MAX_ROLLOUT_MONTHS`` after a plant's last observation are
+    rolled out with the enhanced model; earlier and later months are scored
+    by the base model, so a far-future request costs one pass.
+    """
+    rows = lag_store.rows_for(plant_keys)
+    steps = np.asarray(year) * 12 + np.asarray(month) - 1 - lag_store.last_period[rows]
+    plf = np.empty(len(rows))
+    enhanced = np.zeros(len(rows), dtype=bool)
+
+    ahead = (steps > 0) & (steps <= MAX_ROLLOUT_MONTHS) & (lag_store.last_period[rows] >= 0)
+    if ahead.any():
+        plf[ahead], enhanced[ahead] = lag_store.rollout(
+            rows[ahead], steps[ahead], lambda *step: score_existing_step(models, fleet, *step)
+        )
+    if not ahead.all():
+        features = fleet_base_features(models, fleet, rows[~ahead], np.asarray(month)[~ahead])
+        plf[~ahead] = np.clip(models.base_scorer.predict(features), 0, 1)
+    return plf, enhanced
+
+def fleet_forecast(models, fleet, lag_store, plant_keys, periods):
+    """Forecasts of existing plants over consecutive periods, as flat plant-major columns."""
+    rows = lag_store.rows_for(plant_keys)
+    year = np.tile(periods // 12, len(rows))
+    month = np.tile(periods % 12 + 1, len(rows))
+    plf, enhanced = predict_existing_plf(models, fleet, lag_store, np.repeat(plant_keys, len(periods)), year, month)
+    flat = np.repeat(rows, len(periods))
+    electricity_kwh = calculate_electricity_generation_batch(fleet['capacity'][flat], plf, year, month)
+    coal = calculate_coal_requirement_batch(
+        electricity_kwh, fleet['heat_rate'][flat], fleet['gcv'][flat], fleet['aux_consumption'][flat]
+    )
+    return {'rows': flat, 'year': year, 'month': month, 'plf': plf, 'enhanced': enhanced,
+            'electricity_kwh': electricity_kwh, 'coal': coal}
+
+def fleet_coal_matrix(models, fleet, lag_store, plant_keys, periods):
+    """Forecast coal tonnes for existing plants (rows) over consecutive periods (columns)."""
+    return fleet_forecast(models, fleet, lag_store, plant_keys, periods)['coal'].reshape(len(plant_keys), len(periods))
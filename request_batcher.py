@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+
+class RequestBatcher:
+    """Coalesces concurrent requests into one ``score_batch`` call.
+
+    A request that arrives while nothing is queued or being scored is
+    dispatched at once, so a lone caller never waits for the window. Under
+    load, requests queue until ``window`` seconds after the first of them or
+    until ``max_items`` are waiting. ``run(score_batch, requests)`` scores a
+    batch and returns one result per request, in order. ``on_flush(size,
+    waits)`` is called for every batch with each request's queueing delay.
+    """
+
+    def __init__(self, score_batch, run, window, max_items, on_flush=None):
+        self.score_batch, self.run = score_batch, run
+        self.window, self.max_items = window, max_items
+        self.on_flush = on_flush
+        self.pending = []
+        self.in_flight = 0
+        self.tasks = set()
+        self.timer = None
+
+    async def submit(self, request):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((request, future, time.perf_counter()))
+        if len(self.pending) >= self.max_items or (len(self.pending) == 1 and not self.in_flight):
+            self.flush()
+        elif self.timer is None:
+            self.timer = loop.call_later(self.window, self.flush)
+        return await future
+
+    def flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.pending = self.pending, []
+        if batch:
+            self.in_flight += 1
+            task = asyncio.get_running_loop().create_task(self.score(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def score(self, batch):
+        if self.on_flush is not None:
+            now = time.perf_counter()
+            self.on_flush(len(batch), [now - queued for _, _, queued in batch])
+        try:
+            results = await self.run(self.score_batch, [request for request, _, _ in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+        finally:
+            # released before the callers resume, so the next request of an idle client is not held back
+            self.in_flight -= 1
+        # a caller that disconnected has a cancelled future; the others still get their result
+        for (_, future, _), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
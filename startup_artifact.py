@@ -0,0 +1,212 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from lag_state import LagStateStore
+from lookup_tables import PlantRecord, PlantTable, build_plant_records, plant_record_arrays
+from tree_engine import CompiledEnsemble
+
+ARTIFACT_VERSION = 1
+
+REFERENCE_FILE = 'FINAL_MERGED_DATA.csv'
+METADATA_FILE = 'generalized_model_metadata.pkl'
+MODEL_FILES = {
+    'base': 'plf_base_model.txt',
+    'enhanced': 'plf_enhanced_model.txt',
+}
+QUANTILE_ALPHAS = (0.1, 0.5, 0.9)
+QUANTILE_MODEL_FILES = {
+    f'quantile_p{round(alpha * 100)}': f'plf_quantile_p{round(alpha * 100)}.txt' for alpha in QUANTILE_ALPHAS
+}
+SOURCE_FILES = [REFERENCE_FILE, METADATA_FILE] + list(MODEL_FILES.values())
+
+TEXT_FIELDS = ['plant_key', 'plant_name', 'technology', 'coal_grade']
+LAG_FIELDS = ['values', 'head', 'last_period']
+
+
+def available_model_files(source_dir='.'):
+    """The required models plus the quantile models, when all of them exist in ``source_dir``."""
+    if all((Path(source_dir) / path).exists() for path in QUANTILE_MODEL_FILES.values()):
+        return {**MODEL_FILES, **QUANTILE_MODEL_FILES}
+    return dict(MODEL_FILES)
+
+
+def source_files(source_dir='.'):
+    return [REFERENCE_FILE, METADATA_FILE] + list(available_model_files(source_dir).values())
+
+
+def file_fingerprint(path):
+    stat = os.stat(path)
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest.hexdigest()}
+
+
+def sources_fingerprint(fingerprints):
+    digest = hashlib.sha256()
+    for name in sorted(fingerprints):
+        digest.update(f"{name}:{fingerprints[name]['sha256']};".encode())
+    return digest.hexdigest()[:16]
+
+
+def _source_matches(path, recorded):
+    stat = os.stat(path)
+    if stat.st_size == recorded['size'] and stat.st_mtime_ns == recorded['mtime_ns']:
+        return True
+    return file_fingerprint(path)['sha256'] == recorded['sha256']
+
+
+def artifact_status(artifact_dir, source_dir='.'):
+    manifest_path = Path(artifact_dir) / 'manifest.json'
+    if not manifest_path.exists():
+        return 'missing'
+    with open(manifest_path, 'r') as f:
+        manifest = json.load(f)
+    if manifest.get('version') != ARTIFACT_VERSION:
+        return 'stale'
+    names = source_files(source_dir)
+    if any((Path(source_dir) / name).exists() for name in SOURCE_FILES) and set(names) != set(manifest['sources']):
+        return 'stale'
+    for name in names:
+        path = Path(source_dir) / name
+        if path.exists() and not _source_matches(path, manifest['sources'][name]):
+            return 'stale'
+    return 'fresh'
+
+
+def load_sources(source_dir='.'):
+    import pandas as pd
+
+    source_dir = Path(source_dir)
+    with open(source_dir / METADATA_FILE, 'rb') as f:
+        metadata = pickle.load(f)
+    df_reference = pd.read_csv(source_dir / REFERENCE_FILE)
+    df_reference = df_reference[df_reference['Capacity'].notna()]
+
+    plant_records = build_plant_records(df_reference)
+    return {
+        'metadata': metadata,
+        'plant_records': plant_records,
+        'lag_store': LagStateStore.from_reference(df_reference, plant_records),
+        'model_files': {name: str(source_dir / path) for name, path in available_model_files(source_dir).items()},
+        'compiled_dirs': {},
+        'fingerprint': sources_fingerprint({name: file_fingerprint(source_dir / name)
+                                            for name in source_files(source_dir)}),
+    }
+
+
+def _to_jsonable(value):
+    if isinstance(value, dict):
+        return {k: _to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_jsonable(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def build_artifact(artifact_dir, source_dir='.'):
+    start = time.perf_counter()
+    artifact_dir = Path(artifact_dir)
+    source_dir = Path(source_dir)
+    fingerprints = {name: file_fingerprint(source_dir / name) for name in source_files(source_dir)}
+    state = load_sources(source_dir)
+
+    tmp_dir = artifact_dir.with_name(f'{artifact_dir.name}.tmp-{os.getpid()}')
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    arrays = plant_record_arrays(state['plant_records'])
+    arrays['plant_key'] = np.array(state['plant_records'].plant_keys, dtype=object)
+    for field, values in arrays.items():
+        if field in TEXT_FIELDS:
+            is_null = np.array([v is None or v != v for v in values])
+            np.save(tmp_dir / f'fleet_{field}.npy', np.where(is_null, '', values).astype(str))
+            np.save(tmp_dir / f'fleet_{field}_isnull.npy', is_null)
+        else:
+            np.save(tmp_dir / f'fleet_{field}.npy', values.astype(np.float64))
+
+    for field in LAG_FIELDS:
+        np.save(tmp_dir / f'lag_{field}.npy', getattr(state['lag_store'], field))
+
+    for name, path in available_model_files(source_dir).items():
+        shutil.copyfile(source_dir / path, tmp_dir / path)
+        CompiledEnsemble.from_model_file(source_dir / path).save(tmp_dir / f'compiled_{name}')
+
+    with open(tmp_dir / 'manifest.json', 'w') as f:
+        json.dump({
+            'version': ARTIFACT_VERSION,
+            'sources': fingerprints,
+            'metadata': _to_jsonable(state['metadata']),
+        }, f)
+
+    old_dir = artifact_dir.with_name(f'{artifact_dir.name}.old-{os.getpid()}')
+    if artifact_dir.exists():
+        os.rename(artifact_dir, old_dir)
+    try:
+        os.rename(tmp_dir, artifact_dir)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return time.perf_counter() - start
+
+
+def load_artifact(artifact_dir):
+    artifact_dir = Path(artifact_dir)
+    with open(artifact_dir / 'manifest.json', 'r') as f:
+        manifest = json.load(f)
+
+    # fleet and lag columns stay read-only memory maps, so forked workers share their pages
+    columns = {}
+    for field in PlantRecord._fields + ('plant_key',):
+        values = np.load(artifact_dir / f'fleet_{field}.npy', mmap_mode='r')
+        if field in TEXT_FIELDS:
+            is_null = np.load(artifact_dir / f'fleet_{field}_isnull.npy')
+            if is_null.any():
+                values = values.astype(object)
+                values[is_null] = None
+        columns[field] = values
+
+    plant_records = PlantTable(columns.pop('plant_key').tolist(), columns)
+    lag_arrays = [np.load(artifact_dir / f'lag_{field}.npy', mmap_mode='r') for field in LAG_FIELDS]
+    model_files = available_model_files(artifact_dir)
+
+    return {
+        'metadata': manifest['metadata'],
+        'plant_records': plant_records,
+        'lag_store': LagStateStore(plant_records.plant_keys, *lag_arrays),
+        'model_files': {name: str(artifact_dir / path) for name, path in model_files.items()},
+        'compiled_dirs': {name: str(artifact_dir / f'compiled_{name}') for name in model_files},
+        'fingerprint': sources_fingerprint(manifest['sources']),
+    }
+
+
+def load_startup_state(artifact_dir, source_dir='.'):
+    start = time.perf_counter()
+    if not artifact_dir:
+        state = load_sources(source_dir)
+        state['source'] = 'source files'
+    else:
+        status = artifact_status(artifact_dir, source_dir)
+        if status != 'fresh':
+            print(f"Startup artifact {status}, rebuilding {artifact_dir} from source files...")
+            build_artifact(artifact_dir, source_dir)
+        state = load_artifact(artifact_dir)
+        state['source'] = f'artifact {artifact_dir}'
+    state['seconds'] = time.perf_counter() - start
+    return state
+
+
+if __name__ == "__main__":
+    artifact_dir = sys.argv[1] if len(sys.argv) > 1 else os.getenv("ARTIFACT_DIR", "artifacts")
+    seconds = build_artifact(artifact_dir)
+    print(f"Built startup artifact in {artifact_dir} ({seconds:.2f}s)")
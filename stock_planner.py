@@ -0,0 +1,73 @@
+import numpy as np
+
+# CEA normative stock for non-pithead stations starts at 20 days of consumption
+DEFAULT_TARGET_DAYS = 20
+# Plants whose latest closing stock is older than this are left out of the plan
+MAX_STALE_MONTHS = 3
+
+
+def plan_stock(opening_stock, consumption, receipts, days, target_days=DEFAULT_TARGET_DAYS, report_from=0,
+               source_share=None):
+    """Stock trajectory and procurement gap for every plant and month in one cumulative pass.
+
+    ``opening_stock`` is (plants,), ``consumption`` (plants, months),
+    ``receipts`` the planned receipts by source (plants, months, sources) and
+    ``days`` the days in each month. Flows are spread evenly within a month.
+    The gap is the extra coal each month that keeps closing stock at or above
+    ``target_days`` of that month's consumption. It is split over sources by
+    ``source_share`` (plants, sources) where that is known, otherwise in
+    proportion to the planned receipts, otherwise evenly.
+
+    Months before ``report_from`` only carry stale opening stocks forward:
+    they are simulated but not reported, and any gap they build up is
+    reported in the first reported month.
+    """
+    opening_stock = np.asarray(opening_stock, dtype=float)
+    consumption = np.asarray(consumption, dtype=float)
+    receipts = np.asarray(receipts, dtype=float)
+    days = np.broadcast_to(np.asarray(days, dtype=float), consumption.shape)
+    daily = consumption / days
+
+    planned = receipts.sum(axis=2)
+    stock = opening_stock[:, None] + np.cumsum(planned - consumption, axis=1)
+    shortfall = np.maximum.accumulate(np.maximum(target_days * daily - stock, 0), axis=1)
+
+    rows = np.arange(len(opening_stock))
+    out = stock <= 0
+    runs_out = out.any(axis=1)
+    first = np.argmax(out, axis=1)
+    before = np.where(first > 0, stock[rows, np.maximum(first - 1, 0)], opening_stock)
+    draw = (consumption - planned)[rows, first] / days[rows, first]
+    elapsed = np.cumsum(days, axis=1) - days
+    days_to_stockout = np.where(
+        runs_out,
+        elapsed[rows, first] - elapsed[:, report_from]
+        + np.divide(np.maximum(before, 0), draw, out=np.zeros(len(rows)), where=draw > 0),
+        np.inf,
+    )
+
+    reported = slice(report_from, None)
+    stock, daily, planned, receipts = stock[:, reported], daily[:, reported], planned[:, reported], receipts[:, reported]
+    gap = np.diff(shortfall[:, reported], axis=1, prepend=0)
+    total = receipts.sum(axis=(1, 2))
+    share = np.where(total[:, None] > 0, receipts.sum(axis=1) / np.where(total > 0, total, 1)[:, None],
+                     1 / receipts.shape[2])
+    if source_share is not None:
+        source_share = np.asarray(source_share, dtype=float)
+        share = np.where(np.isfinite(source_share).all(axis=1, keepdims=True), source_share, share)
+    cover = np.divide(np.maximum(stock, 0), daily, out=np.full(stock.shape, np.inf), where=daily > 0)
+    return {
+        'stock': stock,
+        'days_of_cover': cover,
+        'below_target': stock < target_days * daily,
+        'gap': gap,
+        'gap_by_source': gap[:, :, None] * share[:, None, :],
+        'days_to_stockout': np.maximum(days_to_stockout, 0),
+        'min_days_of_cover': cover.min(axis=1),
+        'total_gap': shortfall[:, -1],
+    }
+
+
+def criticality_order(plan):
+    """Plants that run out soonest first, then the thinnest cover, then the largest gap."""
+    return np.lexsort((-plan['total_gap'], plan['min_days_of_cover'], plan['days_to_stockout']))
@@ -0,0 +1,83 @@
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'benchmarks'))
+
+from synthetic import prepare_workdir
+
+FLEET_PLANTS = 1000
+ADMIN_TOKEN = 'test-token'
+
+
+@pytest.fixture(scope='session')
+def api():
+    """The ``app`` module, initialized on a synthetic fleet in a scratch working directory."""
+    cwd = os.getcwd()
+    prepare_workdir(FLEET_PLANTS)
+    os.environ.update({'ARTIFACT_DIR': '', 'FORECAST_CACHE_SIZE': '0', 'GEM_CACHE_DIR': '',
+                       'MODEL_WATCH_INTERVAL': '0', 'COAL_STORE_WATCH_INTERVAL': '0', 'MODEL_REGISTRY_DIR': '',
+                       'FORECAST_BATCH_WINDOW_MS': '0'})
+    import app
+    app.initialize()
+    yield app
+    os.chdir(cwd)
+
+
+@pytest.fixture
+def registry(api, tmp_path, monkeypatch):
+    """An empty model registry behind the admin endpoints; the active models are restored afterwards."""
+    from model_registry import ModelRegistry
+
+    registry = ModelRegistry(tmp_path / 'registry')
+    monkeypatch.setattr(api, 'model_registry', registry)
+    monkeypatch.setattr(api, 'active_models', api.active_models)
+    monkeypatch.setattr(api, 'rejected_versions', set())
+    monkeypatch.setattr(api, 'ADMIN_TOKEN', ADMIN_TOKEN)
+    return registry
+
+
+async def asgi_post(app, path, body, on_chunk=None, headers=()):
+    """POST through the ASGI app, handing each body chunk to ``on_chunk`` instead of keeping it."""
+    payload = json.dumps(body).encode()
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'POST', 'scheme': 'http',
+        'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(payload)).encode())] +
+                   [(name.encode(), value.encode()) for name, value in headers],
+        'server': ('test', 80), 'client': ('test', 1),
+    }
+    received = False
+    result = {'status': None, 'headers': {}}
+
+    async def receive():
+        nonlocal received
+        if received:
+            await asyncio.Event().wait()
+        received = True
+        return {'type': 'http.request', 'body': payload, 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            result['status'] = message['status']
+            result['headers'] = {k.decode(): v.decode() for k, v in message['headers']}
+        elif message.get('body') and on_chunk is not None:
+            on_chunk(message['body'])
+
+    await app(scope, receive, send)
+    return result
+
+
+def stream_post(app, path, body, on_chunk=None):
+    return asyncio.run(asgi_post(app, path, body, on_chunk))
+
+
+def post_json(app, path, body, headers=()):
+    """POST through the ASGI app and return the status and the decoded JSON body."""
+    chunks = []
+    result = asyncio.run(asgi_post(app, path, body, chunks.append, headers))
+    return result['status'], json.loads(b''.join(chunks))
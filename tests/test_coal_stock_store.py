@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from coal_stock_store import STATE_FILE, CoalStockState, CoalStockStore
+from synthetic import make_coal_frame
+
+
+@pytest.fixture
+def monthly_files(tmp_path):
+    """Two consecutive CSVs of monthly coal data, 12 months each."""
+    frame = make_coal_frame(n_plants=20, n_months=24)
+    paths = []
+    for i, year in enumerate(sorted(frame['Year'].unique())):
+        path = tmp_path / f'coal_{i}.csv'
+        frame[frame['Year'] == year].to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def assert_same_state(actual, expected):
+    assert actual.plant_keys == expected.plant_keys
+    assert actual.segments == expected.segments
+    np.testing.assert_array_equal(actual.slot_period, expected.slot_period)
+    np.testing.assert_array_equal(actual.values, expected.values)
+
+
+def test_crash_before_saving_state_is_replayed_on_load(tmp_path, monthly_files, monkeypatch):
+    reference = CoalStockStore(tmp_path / 'reference')
+    for path in monthly_files:
+        reference.ingest(path)
+
+    store = CoalStockStore(tmp_path / 'store')
+    store.ingest(monthly_files[0])
+
+    def crash(self, path):
+        raise KeyboardInterrupt
+
+    with monkeypatch.context() as patch:
+        patch.setattr(CoalStockState, 'save', crash)
+        with pytest.raises(KeyboardInterrupt):
+            store.ingest(monthly_files[1])
+
+    assert_same_state(store.load_state(), reference.load_state())
+    assert store.ingest(monthly_files[1])['skipped'] == 'already ingested'
+    assert len(store.read()) == len(reference.read())
+
+
+def test_state_ahead_of_the_manifest_is_rebuilt(tmp_path, monthly_files):
+    store = CoalStockStore(tmp_path / 'store')
+    store.ingest(monthly_files[0])
+    expected = store.load_state()
+
+    # a state cache saved for segments whose manifest was never written
+    ahead = CoalStockStore(tmp_path / 'ahead')
+    for path in monthly_files:
+        ahead.ingest(path)
+    ahead.load_state().save(store.root / STATE_FILE)
+
+    assert_same_state(store.load_state(), expected)
@@ -0,0 +1,53 @@
+import io
+import tracemalloc
+import zlib
+
+import pyarrow.parquet as pq
+import pytest
+
+from conftest import FLEET_PLANTS, stream_post
+
+HORIZON_MONTHS = 100
+# exports peak at 3-20 MB here; the JSON fleet batch for the same 100k plant-months peaks near 95 MB
+EXPORT_PEAK_MB = 32
+
+
+class LineCounter:
+    """Counts rows of a CSV or NDJSON body, inflating gzip as it streams."""
+
+    def __init__(self, gzip):
+        self.inflate = zlib.decompressobj(16 + zlib.MAX_WBITS) if gzip else None
+        self.lines = 0
+
+    def __call__(self, chunk):
+        self.lines += (self.inflate.decompress(chunk) if self.inflate else chunk).count(b'\n')
+
+
+@pytest.mark.parametrize('format, gzip', [('csv', False), ('csv', True), ('ndjson', True), ('parquet', False)])
+def test_export_of_100k_plant_months_keeps_heap_peak_bounded(api, format, gzip):
+    counter = LineCounter(gzip)
+    on_chunk = counter if format != 'parquet' else None
+    body = {'start_year': 2025, 'start_month': 1, 'horizon_months': HORIZON_MONTHS, 'format': format, 'gzip': gzip}
+
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        result = stream_post(api.app, '/forecast/export', body, on_chunk)
+        peak_mb = (tracemalloc.get_traced_memory()[1] - baseline) / 1e6
+    finally:
+        tracemalloc.stop()
+
+    assert result['status'] == 200
+    assert peak_mb < EXPORT_PEAK_MB
+    if format == 'csv':
+        assert counter.lines == FLEET_PLANTS * HORIZON_MONTHS + 1
+    elif format == 'ndjson':
+        assert counter.lines == FLEET_PLANTS * HORIZON_MONTHS
+
+
+def test_parquet_export_has_one_row_per_plant_month(api):
+    chunks = []
+    body = {'start_year': 2025, 'start_month': 1, 'horizon_months': 12, 'format': 'parquet'}
+    assert stream_post(api.app, '/forecast/export', body, chunks.append)['status'] == 200
+    table = pq.read_table(io.BytesIO(b''.join(chunks)))
+    assert table.num_rows == FLEET_PLANTS * 12
@@ -0,0 +1,62 @@
+import time
+
+import pytest
+
+import plant_forecast
+from conftest import stream_post
+
+
+@pytest.fixture
+def rolled_steps(api, monkeypatch):
+    """The longest rollout of every ``LagStateStore.rollout`` call made during the test."""
+    rollout = api.lag_store.rollout
+    steps_rolled = []
+
+    def counting_rollout(rows, steps, score_step):
+        steps_rolled.append(int(steps.max()))
+        return rollout(rows, steps, score_step)
+
+    monkeypatch.setattr(api.lag_store, 'rollout', counting_rollout)
+    return steps_rolled
+
+
+def test_far_future_forecasts_skip_the_rollout(api, rolled_steps):
+    items = [{'plant_key': key, 'year': 2200, 'month': 1} for key in api.plant_records]
+
+    start = time.perf_counter()
+    single = stream_post(api.app, '/forecast', {'is_new_plant': False, 'plant_key': 'PLANT_00000',
+                                                 'year': 2500, 'month': 1})
+    batch = stream_post(api.app, '/forecast/batch', {'items': items})
+    seconds = time.perf_counter() - start
+
+    assert single['status'] == batch['status'] == 200
+    assert rolled_steps == []
+    assert seconds < 2
+
+
+def test_rollout_stops_at_max_rollout_months(api, rolled_steps):
+    last = int(api.lag_store.last_period[0])
+    periods = [last + 1, last + plant_forecast.MAX_ROLLOUT_MONTHS, last + 10 * plant_forecast.MAX_ROLLOUT_MONTHS]
+    plf, enhanced = api.predict_existing_plf(api.active_models, ['PLANT_00000'] * 3,
+                                             [p // 12 for p in periods], [p % 12 + 1 for p in periods])
+
+    assert rolled_steps == [plant_forecast.MAX_ROLLOUT_MONTHS]
+    assert enhanced.tolist() == [True, True, False]
+
+
+def test_horizon_requests_reject_starts_past_the_rollout(api):
+    latest = int(api.lag_store.last_period.max())
+    last_start = latest + plant_forecast.MAX_ROLLOUT_MONTHS
+    too_late = last_start + 1
+    bodies = [
+        ('/forecast/export', {'start_year': too_late // 12, 'start_month': too_late % 12 + 1}),
+        ('/forecast/batch', {'fleet': True, 'start_year': too_late // 12, 'start_month': too_late % 12 + 1}),
+        ('/forecast/export', {'start_year': 2026, 'start_month': 13}),
+        ('/forecast/batch', {'fleet': True, 'start_year': 2026, 'start_month': 0}),
+    ]
+    for path, body in bodies:
+        assert stream_post(api.app, path, body)['status'] == 422, body
+
+    body = {'start_year': last_start // 12, 'start_month': last_start % 12 + 1, 'horizon_months': 1,
+            'plant_keys': ['PLANT_00000']}
+    assert stream_post(api.app, '/forecast/export', body)['status'] == 200
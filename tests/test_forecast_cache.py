@@ -0,0 +1,94 @@
+import pytest
+
+import forecast_cache
+from conftest import ADMIN_TOKEN, post_json
+from forecast_cache import ForecastCache, MemoryBackend, SQLiteBackend
+
+TTL_SECONDS = 60
+EXISTING = {'is_new_plant': False, 'plant_key': 'PLANT_00000', 'year': 2026, 'month': 3}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+class Request:
+    def __init__(self, **fields):
+        self.__dict__.update({'is_new_plant': False, 'uncertainty': False, 'year': 2026, 'month': 1, **fields})
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(forecast_cache, 'time', clock)
+    return clock
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def make_backend(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryBackend
+    return lambda max_entries: SQLiteBackend(str(tmp_path / 'forecast_cache.sqlite'), max_entries)
+
+
+def test_least_recently_used_entry_is_evicted(make_backend, clock):
+    cache = ForecastCache(make_backend(2), TTL_SECONDS, 'fp')
+    for name in 'ab':
+        cache.set(name, {'plant': name})
+        clock.now += 1
+    assert cache.get('a') == {'plant': 'a'}
+    clock.now += 1
+    cache.set('c', {'plant': 'c'})
+
+    assert cache.get('b') is None
+    assert cache.get('a') == {'plant': 'a'}
+    assert cache.get('c') == {'plant': 'c'}
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['entries'] == 2
+
+
+def test_entries_expire_after_the_ttl(make_backend, clock):
+    cache = ForecastCache(make_backend(8), TTL_SECONDS, 'fp')
+    cache.set('a', {'plant': 'a'})
+    clock.now += TTL_SECONDS - 1
+    assert cache.get('a') == {'plant': 'a'}
+    clock.now += 1
+
+    assert cache.get('a') is None
+    assert cache.stats()['expirations'] == 1
+    assert cache.stats()['entries'] == 0
+
+
+def test_model_version_and_fingerprint_change_the_key(make_backend, clock):
+    backend = make_backend(8)
+    cache = ForecastCache(backend, TTL_SECONDS, 'fp-1')
+    request = Request(plant_key='PLANT_00000')
+    cache.set(cache.key(request, 'v1'), {'plant': 'PLANT_00000'})
+
+    assert cache.get(cache.key(request, 'v1')) == {'plant': 'PLANT_00000'}
+    assert cache.get(cache.key(request, 'v2')) is None
+    rebuilt = ForecastCache(backend, TTL_SECONDS, 'fp-2')
+    assert rebuilt.get(rebuilt.key(request, 'v1')) is None
+    assert cache.key(Request(plant_key='PLANT_00000', uncertainty=True), 'v1') != cache.key(request, 'v1')
+
+
+def test_model_reload_misses_the_previous_versions_entries(api, registry, monkeypatch):
+    cache = ForecastCache(MemoryBackend(8), TTL_SECONDS, api.startup['fingerprint'])
+    monkeypatch.setattr(api, 'forecast_cache', cache)
+    key = cache.key(api.ForecastRequest(**EXISTING), api.active_models.version)
+    assert post_json(api.app, '/forecast', EXISTING)[0] == 200
+    assert post_json(api.app, '/forecast', EXISTING)[0] == 200
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    version = registry.publish()
+    status, body = post_json(api.app, '/admin/models/reload', {}, [('x-admin-token', ADMIN_TOKEN)])
+    assert (status, body['model_version']) == (200, version)
+    status, body = post_json(api.app, '/forecast', EXISTING)
+
+    assert (status, body['model_version']) == (200, version)
+    assert cache.key(api.ForecastRequest(**EXISTING), version) != key
+    assert (cache.hits, cache.misses) == (1, 2)
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from lag_state import LAG_FEATURES, LagStateStore
+
+# (plant, months of history); the PLF of every fourth month is missing
+HISTORY = [('A', 1), ('B', 2), ('C', 3), ('D', 7)]
+PLANT_KEYS = ['D', 'C', 'B', 'A', 'NO_HISTORY']
+
+
+def reference_frame():
+    rng = np.random.default_rng(0)
+    rows = []
+    for plant, months in HISTORY:
+        for i, period in enumerate(range(2023 * 12 + 10 - months, 2023 * 12 + 10)):
+            plf = np.nan if i % 4 == 3 else rng.uniform(0.3, 0.9)
+            rows.append({'plant_key': plant, 'Year': period // 12, 'Month': period % 12 + 1,
+                         'Capacity': 500.0, 'Actual avg PLF': plf})
+    return pd.DataFrame(rows).sample(frac=1, random_state=0)
+
+
+def pipeline_lags(df):
+    """The lag features as train_generalized_model first defined them, row by row of ``df``."""
+    df = df.sort_values(['plant_key', 'Year', 'Month'])
+    by_plant = df.groupby('plant_key')['Actual avg PLF']
+    return pd.DataFrame({
+        'PLF_lag1': by_plant.shift(1),
+        'PLF_lag3': by_plant.shift(3),
+        'PLF_rolling_mean_3': by_plant.transform(lambda x: x.rolling(window=3, min_periods=1).mean().shift(1)),
+    }, index=df.index).join(df[['plant_key', 'Year', 'Month']])
+
+
+def next_month_lags(df):
+    """Pipeline lag features of the month after each plant's last row, keyed by plant."""
+    last = df.sort_values(['Year', 'Month']).groupby('plant_key').tail(1)
+    period = last['Year'] * 12 + last['Month']
+    upcoming = last.assign(Year=period // 12, Month=period % 12 + 1, **{'Actual avg PLF': np.nan})
+    lags = pipeline_lags(pd.concat([df, upcoming], ignore_index=True))
+    return lags.sort_values(['Year', 'Month']).groupby('plant_key').tail(1).set_index('plant_key')[LAG_FEATURES]
+
+
+@pytest.fixture
+def store():
+    return LagStateStore.from_reference(reference_frame(), PLANT_KEYS)
+
+
+def test_lag_features_match_the_training_pipeline(store):
+    expected = next_month_lags(reference_frame()).reindex(PLANT_KEYS).to_numpy()
+    np.testing.assert_allclose(store.lag_features(np.arange(len(PLANT_KEYS))), expected, rtol=0, atol=1e-15)
+    assert store.last_period.tolist() == [2023 * 12 + 9] * len(HISTORY) + [-1]
+
+
+def test_rollout_feeds_predictions_back_as_lags(store):
+    rows = store.rows_for([plant for plant, _ in HISTORY])
+    seen = []
+
+    def score_step(step_rows, periods, lags):
+        seen.append((step_rows.copy(), periods.copy(), lags.copy()))
+        return 0.5 + 0.01 * step_rows + 0.001 * (periods % 12)
+
+    steps = np.array([2, 3, 4, 5])
+    predictions, full_lags = store.rollout(rows, steps, score_step)
+
+    # replay the rollout through the pipeline: each scored month joins the history the next month's lags come from
+    frame = reference_frame()
+    for step_rows, periods, lags in seen:
+        keys = [store.plant_keys[r] for r in step_rows]
+        expected = next_month_lags(frame).loc[keys].to_numpy()
+        np.testing.assert_allclose(lags, expected, rtol=0, atol=1e-15)
+        frame = pd.concat([frame, pd.DataFrame({
+            'plant_key': keys, 'Year': periods // 12, 'Month': periods % 12 + 1, 'Capacity': 500.0,
+            'Actual avg PLF': 0.5 + 0.01 * step_rows + 0.001 * (periods % 12),
+        })], ignore_index=True)
+
+    assert [len(step_rows) for step_rows, _, _ in seen] == [4, 4, 3, 2, 1]
+    periods = store.last_period[rows] + steps
+    np.testing.assert_allclose(predictions, 0.5 + 0.01 * rows + 0.001 * (periods % 12), rtol=0, atol=1e-15)
+    # plant A has one month of history, so its lag3 two months out is still missing
+    assert full_lags.tolist() == [False, True, True, True]
+    # the store's own buffers are untouched
+    np.testing.assert_allclose(store.lag_features(rows), next_month_lags(reference_frame()).loc[
+        [plant for plant, _ in HISTORY]].to_numpy(), rtol=0, atol=1e-15)
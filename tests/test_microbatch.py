@@ -0,0 +1,50 @@
+import asyncio
+import json
+
+from conftest import asgi_post
+
+REQUESTS = [
+    {'is_new_plant': False, 'plant_key': 'PLANT_00000', 'year': 2026, 'month': 3},
+    {'is_new_plant': True, 'capacity': 800, 'technology': 'Supercritical', 'year': 2026, 'month': 7},
+    {'is_new_plant': True, 'capacity': 500, 'technology': 'Bogus', 'year': 2026, 'month': 1},
+    {'is_new_plant': True, 'technology': 'Subcritical', 'year': 2026, 'month': 1},
+    {'is_new_plant': True, 'capacity': 500, 'year': 2026, 'month': 1},
+    {'is_new_plant': True, 'capacity': 500, 'technology': 'Subcritical', 'year': 2026, 'month': 0},
+    {'is_new_plant': False, 'plant_key': 'NO_SUCH_PLANT', 'year': 2026, 'month': 1},
+    {'is_new_plant': False, 'plant_key': 'PLANT_00001', 'year': 2026, 'month': 13},
+    {'is_new_plant': False, 'plant_key': 'PLANT_00002', 'year': 2026, 'month': 5},
+]
+
+
+async def post_all(app, bodies):
+    async def post(body):
+        chunks = []
+        result = await asgi_post(app, '/forecast', body, chunks.append)
+        return result['status'], json.loads(b''.join(chunks))
+
+    return await asyncio.gather(*[post(body) for body in bodies])
+
+
+def test_coalesced_forecasts_answer_like_single_ones(api, monkeypatch):
+    # PLANT_00002 stands in for a plant whose technology has no monthly averages
+    has_averages = api.active_models.has_averages.copy()
+    has_averages[api.lag_store.index['PLANT_00002']] = False
+    monkeypatch.setattr(api.active_models, 'has_averages', has_averages)
+    monkeypatch.setattr(api, 'scoring_limiter', None)
+
+    async def compare():
+        monkeypatch.setattr(api, 'forecast_batcher', None)
+        single = await post_all(api.app, REQUESTS)
+        batches = []
+        monkeypatch.setattr(api, 'forecast_batcher', api.RequestBatcher(
+            api.forecast_coalesced, api.run_scoring, 0.005, 64, lambda size, waits: batches.append(size)
+        ))
+        coalesced = await post_all(api.app, REQUESTS)
+        return single, coalesced, batches
+
+    single, coalesced, batches = asyncio.run(compare())
+    assert max(batches) > 1
+    for body, expected, actual in zip(REQUESTS, single, coalesced):
+        assert actual[0] == expected[0], body
+        assert actual[1] == expected[1], body
+    assert [status for status, _ in single] == [200, 200, 400, 400, 400, 400, 404, 400, 400]
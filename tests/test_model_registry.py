@@ -0,0 +1,86 @@
+import threading
+
+import pytest
+
+from conftest import ADMIN_TOKEN, post_json
+from model_registry import LATEST_FILE, ModelRegistry
+
+ADMIN = [('x-admin-token', ADMIN_TOKEN)]
+
+
+def break_feature_order(path):
+    """Swap the first two feature names of a model file, so it loads but no longer matches the metadata."""
+    lines = path.read_text().splitlines(keepends=True)
+    for i, line in enumerate(lines):
+        if line.startswith('feature_names='):
+            names = line[len('feature_names='):].split()
+            names[0], names[1] = names[1], names[0]
+            lines[i] = 'feature_names=' + ' '.join(names) + '\n'
+    path.write_text(''.join(lines))
+
+
+def test_reload_rejects_a_broken_model_and_keeps_the_active_one(api, registry):
+    good = registry.publish()
+    status, body = post_json(api.app, '/admin/models/reload', {}, ADMIN)
+    assert (status, body['model_version']) == (200, good)
+    active = api.active_models
+
+    broken = registry.publish(make_latest=False)
+    break_feature_order(registry.path(broken) / 'plf_enhanced_model.txt')
+    status, body = post_json(api.app, '/admin/models/reload', {'version': broken}, ADMIN)
+
+    assert status == 400
+    assert body['error'].startswith(f"Model reload failed, keeping {good}: enhanced model features")
+    assert api.active_models is active
+    assert registry.latest_version() == good
+    status, body = post_json(api.app, '/forecast', {'is_new_plant': False, 'plant_key': 'PLANT_00000',
+                                                    'year': 2026, 'month': 3})
+    assert (status, body['model_version']) == (200, good)
+
+
+@pytest.mark.parametrize('version', ['../outside', 'v1/../../outside', 'latest', ''])
+def test_versions_outside_the_registry_are_refused(api, registry, version):
+    with pytest.raises(ValueError, match='Invalid model version'):
+        registry.path(version)
+    status, body = post_json(api.app, '/admin/models/reload', {'version': version}, ADMIN)
+    assert status == 400
+    assert 'Invalid model version' in body['error']
+
+    registry.root.mkdir()
+    (registry.root / LATEST_FILE).write_text(version)
+    assert registry.latest_version() is None
+
+
+def test_latest_swaps_atomically(tmp_path, monkeypatch):
+    registry = ModelRegistry(tmp_path)
+    versions = ['v20250101-000000', 'v20250102-000000.1']
+    for version in versions:
+        (tmp_path / version).mkdir()
+        (tmp_path / version / 'metrics.json').write_text('{}')
+    registry.set_latest(versions[0])
+
+    seen, done = set(), threading.Event()
+
+    def read():
+        while not done.is_set():
+            seen.add(registry.latest_version())
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    try:
+        for i in range(2000):
+            registry.set_latest(versions[i % 2])
+    finally:
+        done.set()
+        reader.join()
+    assert seen <= set(versions)
+    assert sorted(p.name for p in tmp_path.iterdir()) == [LATEST_FILE] + versions
+
+    # a swap that fails before the rename leaves the previous version in place
+    def interrupted(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr('model_registry.os.replace', interrupted)
+    with pytest.raises(OSError):
+        registry.set_latest(versions[0])
+    assert registry.latest_version() == versions[1]
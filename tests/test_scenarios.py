@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import coal_forecasting_model
+from synthetic import make_reference_frame
+
+# 2024-01 through 2025-02 covers a leap and a common February
+YEARS = np.repeat([2024, 2025], [12, 2])
+MONTHS = np.r_[1:13, 1:3]
+FIELDS = ['target_plf', 'electricity_generated_mwh', 'coal_required_tonnes']
+
+
+@pytest.fixture
+def cfm(tmp_path, monkeypatch):
+    """``coal_forecasting_model`` on a 12-plant reference table; one plant has no heat rate."""
+    frame = make_reference_frame(12, n_months=3)
+    frame.loc[frame['plant_key'] == 'PLANT_00003', 'Actual SHR'] = np.nan
+    frame.to_csv(tmp_path / 'reference.csv', index=False)
+    monkeypatch.setattr(coal_forecasting_model, '_reference_data', pd.read_csv(tmp_path / 'reference.csv'))
+    monkeypatch.setattr(coal_forecasting_model, '_plant_table', None)
+    return coal_forecasting_model
+
+
+def loop_cube(cfm, plant_keys, scenarios, target):
+    """Every cell of a scenario cube from one ``forecast_coal_demand`` call, missing results as NaN."""
+    cube = {name: np.empty((len(plant_keys), len(MONTHS), len(scenarios))) for name in FIELDS}
+    for p, key in enumerate(plant_keys):
+        for m, (year, month) in enumerate(zip(YEARS, MONTHS)):
+            for s, value in enumerate(scenarios):
+                result = cfm.forecast_coal_demand(key, int(year), int(month), **{target: float(value)})
+                for name in FIELDS:
+                    cube[name][p, m, s] = np.nan if result[name] is None else result[name]
+    return cube
+
+
+@pytest.mark.parametrize('target, scenarios', [
+    ('target_plf', np.r_[coal_forecasting_model.plf_grid(), 60.0, 100.0]),
+    ('target_energy_mwh', [1e5, 2e5, 3e5]),
+])
+def test_scenario_cube_matches_forecast_coal_demand(cfm, target, scenarios):
+    plant_keys = cfm.get_reference_data()['plant_key'].unique()[::-1]
+    cube = cfm.forecast_scenarios(plant_keys, YEARS, MONTHS, **{target: scenarios}, tidy=False)
+    expected = loop_cube(cfm, plant_keys, scenarios, target)
+
+    assert np.isnan(expected['coal_required_tonnes'][plant_keys == 'PLANT_00003']).all()
+    for name in FIELDS:
+        np.testing.assert_allclose(cube['data'][name], expected[name], rtol=1e-12, atol=0)
+
+    frame = cfm.forecast_scenarios(plant_keys, YEARS, MONTHS, **{target: scenarios})
+    np.testing.assert_array_equal(frame['coal_required_tonnes'], cube['data']['coal_required_tonnes'].ravel())
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from bench_stock_planner import loop_plan
+from plant_forecast import days_in_month
+from stock_planner import plan_stock
+
+N_PLANTS, N_MONTHS = 300, 24
+# the cumulative pass sums in a different order than the loop; tonnes agree to well under a gram
+TOLERANCE = {'rtol': 1e-9, 'atol': 1e-6}
+
+
+@pytest.fixture
+def fleet():
+    """Opening stocks, consumption and receipts wide enough that some plants run out and some never do."""
+    rng = np.random.default_rng(0)
+    opening = rng.uniform(0, 600_000, N_PLANTS)
+    consumption = rng.uniform(100_000, 500_000, (N_PLANTS, N_MONTHS))
+    receipts = rng.dirichlet([4, 1, 1, 1, 1, 1, 1], (N_PLANTS, N_MONTHS)) * \
+        rng.uniform(80_000, 550_000, (N_PLANTS, N_MONTHS))[:, :, None]
+    # a plant with no receipts at all, and one that receives exactly what it burns
+    receipts[0] = 0
+    receipts[1] = consumption[1, :, None] / receipts.shape[2]
+    periods = 2023 * 12 + 10 + np.arange(N_MONTHS)
+    days = days_in_month(periods // 12, periods % 12 + 1)
+    return opening, consumption, receipts, days
+
+
+@pytest.mark.parametrize('target_days', [0, 20, 45])
+def test_plan_stock_matches_the_per_plant_loop(fleet, target_days):
+    plan = plan_stock(*fleet, target_days)
+    reference = loop_plan(*fleet, target_days)
+
+    runs_out = np.isfinite(reference['days_to_stockout'])
+    assert 0 < runs_out.sum() < N_PLANTS
+    for name in ['stock', 'gap', 'days_to_stockout']:
+        np.testing.assert_allclose(plan[name], reference[name], **TOLERANCE, err_msg=name)
+    np.testing.assert_allclose(plan['total_gap'], reference['gap'].sum(axis=1), **TOLERANCE)
+
+
+def test_months_before_report_from_carry_their_gap_forward(fleet):
+    report_from = 4
+    plan = plan_stock(*fleet, 20, report_from)
+    reference = loop_plan(*fleet, 20)
+    days = fleet[3]
+
+    np.testing.assert_allclose(plan['stock'], reference['stock'][:, report_from:], **TOLERANCE)
+    gap = reference['gap'][:, report_from:].copy()
+    gap[:, 0] += reference['gap'][:, :report_from].sum(axis=1)
+    np.testing.assert_allclose(plan['gap'], gap, **TOLERANCE)
+    np.testing.assert_allclose(
+        plan['days_to_stockout'], np.maximum(reference['days_to_stockout'] - days[:report_from].sum(), 0), **TOLERANCE
+    )
@@ -0,0 +1,69 @@
+import pickle
+from pathlib import Path
+
+import lightgbm as lgb
+import numpy as np
+import pytest
+
+from tree_engine import CompiledEnsemble
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+TOLERANCE = 1e-12
+
+
+@pytest.fixture(scope='module')
+def metadata():
+    with open(REPO_ROOT / 'generalized_model_metadata.pkl', 'rb') as f:
+        return pickle.load(f)
+
+
+def feature_rows(booster, n_rows=5000, seed=0):
+    """Rows at, just beside and between the booster's split thresholds, with NaNs and zeros mixed in."""
+    rng = np.random.default_rng(seed)
+    splits = booster.trees_to_dataframe().dropna(subset=['split_feature'])
+    X = np.empty((n_rows, booster.num_feature()))
+    for j, name in enumerate(booster.feature_name()):
+        thresholds = splits.loc[splits['split_feature'] == name, 'threshold'].to_numpy(dtype=float)
+        if len(thresholds) == 0:
+            thresholds = np.zeros(1)
+        at = rng.choice(thresholds, n_rows)
+        beside = np.nextafter(at, np.where(rng.random(n_rows) < 0.5, -np.inf, np.inf))
+        between = rng.uniform(thresholds.min() - 1, thresholds.max() + 1, n_rows)
+        X[:, j] = np.select([rng.random(n_rows) < 0.3, rng.random(n_rows) < 0.3], [at, beside], between)
+    X[rng.random(X.shape) < 0.05] = np.nan
+    X[rng.random(X.shape) < 0.02] = 0.0
+    return X
+
+
+def assert_matches(booster, compiled, X):
+    np.testing.assert_allclose(compiled.predict(X), booster.predict(X), rtol=0, atol=TOLERANCE)
+
+
+@pytest.mark.parametrize('name', ['plf_base_model.txt', 'plf_enhanced_model.txt'])
+def test_compiled_point_models_match_lightgbm(name):
+    booster = lgb.Booster(model_file=str(REPO_ROOT / name))
+    assert_matches(booster, CompiledEnsemble.from_model_file(REPO_ROOT / name), feature_rows(booster))
+
+
+def test_compiled_quantile_stack_matches_lightgbm(metadata, tmp_path):
+    from startup_artifact import QUANTILE_ALPHAS
+
+    # the quantile models are written by retraining, so small ones are fitted on the base features here
+    rng = np.random.default_rng(1)
+    X_train = rng.uniform(-2, 2, (5000, len(metadata['base_features'])))
+    X_train[rng.random(X_train.shape) < 0.05] = np.nan
+    y = np.nan_to_num(X_train[:, 0]) * 0.1 + rng.normal(0.6, 0.1, len(X_train))
+    boosters, ensembles = [], []
+    for alpha in QUANTILE_ALPHAS:
+        booster = lgb.train({'objective': 'quantile', 'alpha': alpha, 'num_leaves': 15, 'verbose': -1},
+                            lgb.Dataset(X_train, y, feature_name=metadata['base_features']), num_boost_round=50)
+        path = tmp_path / f'quantile_{alpha}.txt'
+        booster.save_model(str(path))
+        boosters.append(booster)
+        ensembles.append(CompiledEnsemble.from_model_file(path))
+
+    X = feature_rows(boosters[1], seed=3)
+    for booster, compiled in zip(boosters, ensembles):
+        assert_matches(booster, compiled, X)
+    expected = np.column_stack([booster.predict(X) for booster in boosters])
+    np.testing.assert_allclose(CompiledEnsemble.stack(ensembles).predict(X), expected, rtol=0, atol=TOLERANCE)
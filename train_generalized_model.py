@@ -1,109 +1,30 @@
-import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 import lightgbm as lgb
+import argparse
+import os
 import pickle
+import tempfile
+import time
 import warnings
-warnings.filterwarnings('ignore')
-
-print("="*80)
-print("GENERALIZED PLF PREDICTION MODEL")
-print("="*80)
-
-df = pd.read_csv('FINAL_MERGED_DATA.csv')
-print(f"\nDataset: {df.shape}")
-
-if 'Actual avg PLF' in df.columns:
-    df['PLF'] = df['Actual avg PLF']
-    if df['PLF'].max() > 1:
-        df['PLF'] = df['PLF'] / 100
-
-df = df[df['Capacity'].notna()]
-print(f"After filtering (with Capacity): {df.shape}")
-
-df = df.sort_values(['plant_key', 'Year', 'Month'])
-df['date'] = pd.to_datetime(df[['Year', 'Month']].assign(day=1))
-
-print("\n[1] Creating Technology Features...")
-tech_map = {'Subcritical': 0, 'Supercritical': 1, 'Ultra Supercritical': 2}
-df['technology_encoded'] = df['Technology'].map(tech_map).fillna(0)
-
-def get_capacity_band(capacity):
-    if capacity < 500:
-        return 'Small'
-    elif capacity < 1500:
-        return 'Medium'
-    else:
-        return 'Large'
-
-df['capacity_band'] = df['Capacity'].apply(get_capacity_band)
-band_map = {'Small': 0, 'Medium': 1, 'Large': 2}
-df['capacity_band_encoded'] = df['capacity_band'].map(band_map)
-
-df['capacity_normalized'] = (df['Capacity'] - df['Capacity'].mean()) / df['Capacity'].std()
-
-print("\n[2] Creating Seasonality Features...")
-df['month_sin'] = np.sin(2 * np.pi * df['Month'] / 12)
-df['month_cos'] = np.cos(2 * np.pi * df['Month'] / 12)
-df['quarter'] = df['Month'].apply(lambda x: (x-1)//3 + 1)
-df['is_summer'] = df['Month'].isin([4, 5, 6]).astype(int)
-df['is_monsoon'] = df['Month'].isin([7, 8, 9]).astype(int)
-df['is_winter'] = df['Month'].isin([11, 12, 1, 2]).astype(int)
-
-print("\n[3] Creating Technology-Month Averages...")
-tech_month_avg = df.groupby(['Technology', 'Month'])['PLF'].mean().reset_index()
-tech_month_avg.columns = ['Technology', 'Month', 'avg_plf_tech_month']
-df = df.merge(tech_month_avg, on=['Technology', 'Month'], how='left')
-
-band_month_avg = df.groupby(['capacity_band', 'Month'])['PLF'].mean().reset_index()
-band_month_avg.columns = ['capacity_band', 'Month', 'avg_plf_band_month']
-df = df.merge(band_month_avg, on=['capacity_band', 'Month'], how='left')
-
-print("\n[4] Creating Optional Historical Features (for existing plants)...")
-df['PLF_lag1'] = df.groupby('plant_key')['PLF'].shift(1)
-df['PLF_lag3'] = df.groupby('plant_key')['PLF'].shift(3)
-df['PLF_rolling_mean_3'] = df.groupby('plant_key')['PLF'].transform(
-    lambda x: x.rolling(window=3, min_periods=1).mean().shift(1)
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from feature_pipeline import (
+    BAND_MAP, BASE_FEATURES, ENHANCED_FEATURES, TECH_MAP,
+    add_fleet_features, cached_plant_features, load_training_frame,
 )
+from model_registry import ModelRegistry
+from startup_artifact import QUANTILE_ALPHAS, QUANTILE_MODEL_FILES
+warnings.filterwarnings('ignore')
 
-print(f"\nFinal dataset shape: {df.shape}")
-
-base_features = [
-    'technology_encoded',
-    'capacity_normalized',
-    'capacity_band_encoded',
-    'Month', 'quarter', 'month_sin', 'month_cos',
-    'is_summer', 'is_monsoon', 'is_winter',
-    'avg_plf_tech_month',
-    'avg_plf_band_month',
-]
-
-enhanced_features = base_features + [
-    'PLF_lag1',
-    'PLF_lag3',
-    'PLF_rolling_mean_3',
-]
-
-print("\n" + "="*80)
-print("TRAINING BASE MODEL (for new plants)")
-print("="*80)
-
-df_base = df[base_features + ['PLF', 'date']].dropna()
-print(f"Base model training data: {df_base.shape}")
-
-split_date = df_base['date'].quantile(0.8)
-train_base = df_base[df_base['date'] < split_date]
-test_base = df_base[df_base['date'] >= split_date]
-
-X_train_base = train_base[base_features]
-y_train_base = train_base['PLF']
-X_test_base = test_base[base_features]
-y_test_base = test_base['PLF']
-
-print(f"Train: {len(train_base)}, Test: {len(test_base)}")
+TRAIN_DATA = os.getenv("TRAIN_DATA", "FINAL_MERGED_DATA.csv")
+FEATURE_CACHE_DIR = os.getenv("FEATURE_CACHE_DIR", "feature_cache")
+TRAIN_NUM_THREADS = int(os.getenv("TRAIN_NUM_THREADS", os.cpu_count() or 1))
+TRAIN_MEMORY_BUDGET_MB = int(os.getenv("TRAIN_MEMORY_BUDGET_MB", "512"))
+TRAIN_WORK_DIR = os.getenv("TRAIN_WORK_DIR", "")
+LEADERBOARD_FILE = 'tuning_leaderboard.csv'
+MAX_STORED_RESIDUALS = 5000
 
-params = {
+DEFAULT_PARAMS = {
     'objective': 'regression',
     'metric': 'rmse',
     'boosting_type': 'gbdt',
@@ -113,97 +34,320 @@ params = {
     'verbose': -1,
 }
 
-train_data_base = lgb.Dataset(X_train_base, label=y_train_base)
-valid_data_base = lgb.Dataset(X_test_base, label=y_test_base, reference=train_data_base)
-
-base_model = lgb.train(
-    params,
-    train_data_base,
-    num_boost_round=500,
-    valid_sets=[train_data_base, valid_data_base],
-    callbacks=[lgb.early_stopping(50), lgb.log_evaluation(100)]
-)
-
-y_pred_base = np.clip(base_model.predict(X_test_base), 0, 1)
-rmse_base = np.sqrt(mean_squared_error(y_test_base, y_pred_base))
-mae_base = mean_absolute_error(y_test_base, y_pred_base)
-r2_base = r2_score(y_test_base, y_pred_base)
-
-print(f"\n[BASE MODEL RESULTS]")
-print(f"RMSE: {rmse_base:.4f} ({rmse_base*100:.2f}% error)")
-print(f"MAE: {mae_base:.4f}")
-print(f"R²: {r2_base:.4f}")
-
-print("\n" + "="*80)
-print("TRAINING ENHANCED MODEL (for existing plants)")
-print("="*80)
-
-df_enhanced = df[enhanced_features + ['PLF', 'date']].dropna()
-print(f"Enhanced model training data: {df_enhanced.shape}")
-
-split_date_enh = df_enhanced['date'].quantile(0.8)
-train_enh = df_enhanced[df_enhanced['date'] < split_date_enh]
-test_enh = df_enhanced[df_enhanced['date'] >= split_date_enh]
-
-X_train_enh = train_enh[enhanced_features]
-y_train_enh = train_enh['PLF']
-X_test_enh = test_enh[enhanced_features]
-y_test_enh = test_enh['PLF']
-
-print(f"Train: {len(train_enh)}, Test: {len(test_enh)}")
-
-train_data_enh = lgb.Dataset(X_train_enh, label=y_train_enh)
-valid_data_enh = lgb.Dataset(X_test_enh, label=y_test_enh, reference=train_data_enh)
-
-enhanced_model = lgb.train(
-    params,
-    train_data_enh,
-    num_boost_round=500,
-    valid_sets=[train_data_enh, valid_data_enh],
-    callbacks=[lgb.early_stopping(50), lgb.log_evaluation(100)]
-)
-
-y_pred_enh = np.clip(enhanced_model.predict(X_test_enh), 0, 1)
-rmse_enh = np.sqrt(mean_squared_error(y_test_enh, y_pred_enh))
-mae_enh = mean_absolute_error(y_test_enh, y_pred_enh)
-r2_enh = r2_score(y_test_enh, y_pred_enh)
-
-print(f"\n[ENHANCED MODEL RESULTS]")
-print(f"RMSE: {rmse_enh:.4f} ({rmse_enh*100:.2f}% error)")
-print(f"MAE: {mae_enh:.4f}")
-print(f"R²: {r2_enh:.4f}")
-
-print("\n" + "="*80)
-print("SAVING MODELS")
-print("="*80)
-
-base_model.save_model('plf_base_model.txt')
-enhanced_model.save_model('plf_enhanced_model.txt')
-
-metadata = {
-    'base_features': base_features,
-    'enhanced_features': enhanced_features,
-    'base_metrics': {'rmse': rmse_base, 'mae': mae_base, 'r2': r2_base},
-    'enhanced_metrics': {'rmse': rmse_enh, 'mae': mae_enh, 'r2': r2_enh},
-    'tech_month_avg': tech_month_avg.to_dict('records'),
-    'band_month_avg': band_month_avg.to_dict('records'),
-    'capacity_stats': {
-        'mean': float(df['Capacity'].mean()),
-        'std': float(df['Capacity'].std())
-    },
-    'tech_map': tech_map,
-    'band_map': band_map,
-}
-
-with open('generalized_model_metadata.pkl', 'wb') as f:
-    pickle.dump(metadata, f)
-
-print("✓ Saved: plf_base_model.txt")
-print("✓ Saved: plf_enhanced_model.txt")
-print("✓ Saved: generalized_model_metadata.pkl")
-
-print("\n" + "="*80)
-print("[SUCCESS] Models ready for forecasting!")
-print("="*80)
-print(f"\nBase Model (new plants): RMSE = {rmse_base:.4f}")
-print(f"Enhanced Model (existing plants): RMSE = {rmse_enh:.4f}")
+stage_seconds = {}
+
+@contextmanager
+def timed(stage):
+    start = time.perf_counter()
+    yield
+    stage_seconds[stage] = time.perf_counter() - start
+
+def regression_metrics(y_true, y_pred):
+    """RMSE, MAE and R^2 as scikit-learn defines them."""
+    y_true = np.asarray(y_true, dtype=float)
+    squared_error = np.sum((y_true - y_pred) ** 2)
+    total = np.sum((y_true - y_true.mean()) ** 2)
+    return {
+        'rmse': float(np.sqrt(squared_error / len(y_true))),
+        'mae': float(np.mean(np.abs(y_true - y_pred))),
+        'r2': float(1 - squared_error / total) if total > 0 else float(squared_error == 0),
+    }
+
+def point_metrics(y, raw):
+    """Test-set metrics of clipped point predictions and a sample of their residuals."""
+    y_pred = np.clip(raw, 0, 1)
+    metrics = regression_metrics(y, y_pred)
+    residuals = (y - y_pred).astype(np.float32)
+    if len(residuals) > MAX_STORED_RESIDUALS:
+        residuals = np.random.default_rng(0).choice(residuals, MAX_STORED_RESIDUALS, replace=False)
+    return metrics, residuals
+
+def interval_metrics(y, raw, models, alphas=QUANTILE_ALPHAS):
+    """Calibration of quantile predictions ``raw`` (one column per alpha) on the test set."""
+    pred = np.clip(np.sort(raw, axis=1), 0, 1)
+    lower, upper = pred[:, 0], pred[:, -1]
+    return {
+        'alphas': list(alphas),
+        'nominal_coverage': alphas[-1] - alphas[0],
+        'coverage': float(np.mean((y >= lower) & (y <= upper))),
+        'below_lower': float(np.mean(y < lower)),
+        'above_upper': float(np.mean(y > upper)),
+        'mean_width': float(np.mean(upper - lower)),
+        'crossing_rate': float(np.mean((np.diff(raw, axis=1) < 0).any(axis=1))),
+        'pinball_loss': {
+            str(alpha): float(np.mean(np.maximum(alpha * (y - pred[:, k]), (alpha - 1) * (y - pred[:, k]))))
+            for k, alpha in enumerate(alphas)
+        },
+        'observed_below': {str(alpha): float(np.mean(y < pred[:, k])) for k, alpha in enumerate(alphas)},
+        'best_iterations': [model.best_iteration for model in models],
+    }
+
+def fit_model(df, name, features, params, num_boost_round=500):
+    start = time.perf_counter()
+    data = df[features + ['PLF', 'date']].dropna()
+
+    split_date = data['date'].quantile(0.8)
+    train = data[data['date'] < split_date]
+    test = data[data['date'] >= split_date]
+
+    train_data = lgb.Dataset(train[features], label=train['PLF'])
+    valid_data = lgb.Dataset(test[features], label=test['PLF'], reference=train_data)
+
+    model = lgb.train(
+        params,
+        train_data,
+        num_boost_round=num_boost_round,
+        valid_sets=[train_data, valid_data],
+        callbacks=[lgb.early_stopping(50, verbose=False)]
+    )
+
+    metrics, residuals = point_metrics(test['PLF'].to_numpy(), model.predict(test[features]))
+    stage_seconds[f'fit_{name}'] = time.perf_counter() - start
+    return model, metrics, residuals, data.shape, len(train), len(test)
+
+def fit_quantile_models(df, features, params, alphas=QUANTILE_ALPHAS, num_boost_round=500):
+    """One quantile booster per alpha on the same time split as ``fit_model``.
+
+    The training and validation Datasets are constructed once and every alpha
+    trains on the same bins. Returns the models and their test-set calibration.
+    """
+    start = time.perf_counter()
+    data = df[features + ['PLF', 'date']].dropna()
+    split_date = data['date'].quantile(0.8)
+    train = data[data['date'] < split_date]
+    test = data[data['date'] >= split_date]
+
+    train_data = lgb.Dataset(train[features], label=train['PLF'], free_raw_data=False).construct()
+    valid_data = lgb.Dataset(test[features], label=test['PLF'], reference=train_data).construct()
+
+    models = []
+    for alpha in alphas:
+        models.append(lgb.train(
+            {**params, 'objective': 'quantile', 'alpha': alpha, 'metric': 'quantile'},
+            train_data,
+            num_boost_round=num_boost_round,
+            valid_sets=[valid_data],
+            callbacks=[lgb.early_stopping(50, verbose=False)]
+        ))
+
+    raw = np.column_stack([model.predict(test[features]) for model in models])
+    metrics = interval_metrics(test['PLF'].to_numpy(), raw, models, alphas)
+    stage_seconds['fit_quantiles'] = time.perf_counter() - start
+    return models, metrics
+
+def train_in_memory(args):
+    with timed('load'):
+        df = load_training_frame(TRAIN_DATA)
+    print(f"\nDataset (with Capacity): {df.shape}")
+
+    print("\n[1] Creating Plant Features (technology, capacity band, seasonality, PLF lags)...")
+    with timed('plant_features'):
+        df, cache_stats = cached_plant_features(df, FEATURE_CACHE_DIR)
+    print(f"Recomputed {cache_stats['plants_recomputed']} plants, reused {cache_stats['plants_cached']} from {FEATURE_CACHE_DIR or 'no cache'}")
+
+    print("\n[2] Creating Capacity Normalization and Technology/Band-Month Averages...")
+    with timed('fleet_features'):
+        df, fleet_stats = add_fleet_features(df)
+
+    print(f"\nFinal dataset shape: {df.shape}")
+
+    feature_sets = {'base': BASE_FEATURES, 'enhanced': ENHANCED_FEATURES}
+    model_params = {name: {**DEFAULT_PARAMS, 'num_threads': max(1, TRAIN_NUM_THREADS // 2)} for name in feature_sets}
+    model_rounds = {name: args.rounds for name in feature_sets}
+    tuning = None
+
+    if args.tune:
+        from tuning import tune_models
+
+        print("\n" + "="*80)
+        print(f"TUNING ({args.trials} trials, {args.folds} rolling-origin folds, {args.workers} workers)")
+        print("="*80)
+        with timed('tune'):
+            tuning, leaderboard = tune_models(
+                df, feature_sets, {**DEFAULT_PARAMS, 'num_threads': max(1, TRAIN_NUM_THREADS // args.workers)},
+                n_trials=args.trials, n_folds=args.folds, workers=args.workers, seed=args.seed,
+            )
+        leaderboard.to_csv(LEADERBOARD_FILE, index=False)
+
+        for name, result in tuning.items():
+            model_params[name] = {**result['params'], 'num_threads': max(1, TRAIN_NUM_THREADS // 2)}
+            model_rounds[name] = min(args.rounds, result['num_boost_round'])
+            tuned = {k: v for k, v in result['params'].items() if k not in DEFAULT_PARAMS or v != DEFAULT_PARAMS[k]}
+            print(f"\n[{name.upper()} CHOSEN CONFIG] trial {result['trial']}: CV RMSE {result['cv_rmse']:.4f}, "
+                  f"CV MAE {result['cv_mae']:.4f}, {model_rounds[name]} rounds")
+            print(f"  {tuned}")
+        print(f"\n✓ Saved: {LEADERBOARD_FILE}")
+
+    print("\n" + "="*80)
+    print(f"TRAINING BASE (new plants) AND ENHANCED (existing plants) MODELS "
+          f"({max(1, TRAIN_NUM_THREADS // 2)} threads each)")
+    print("="*80)
+
+    with timed('fit'), ThreadPoolExecutor(max_workers=2) as pool:
+        base_future = pool.submit(fit_model, df, 'base', BASE_FEATURES, model_params['base'], model_rounds['base'])
+        enhanced_future = pool.submit(fit_model, df, 'enhanced', ENHANCED_FEATURES, model_params['enhanced'],
+                                      model_rounds['enhanced'])
+        quantile_future = None
+        if not args.no_quantiles:
+            quantile_future = pool.submit(fit_quantile_models, df, BASE_FEATURES, model_params['base'],
+                                          num_boost_round=args.rounds)
+        fits = base_future.result(), enhanced_future.result(), \
+            quantile_future.result() if quantile_future else ([], None)
+    return fleet_stats, model_params, tuning, fits
+
+def train_out_of_core(args):
+    """Column store, fleet averages and both models from chunks of ``TRAIN_DATA``; see out_of_core.py."""
+    import out_of_core
+
+    plan = out_of_core.memory_plan(args.memory_budget)
+    paths = out_of_core.partition_paths(TRAIN_DATA)
+    params = {**DEFAULT_PARAMS, 'num_threads': TRAIN_NUM_THREADS}
+    with tempfile.TemporaryDirectory(prefix='plf_out_of_core_', dir=TRAIN_WORK_DIR or None) as work_dir:
+        print(f"\n[1] Streaming {len(paths)} partition(s) in chunks of {plan['chunk_rows']:,} rows "
+              f"(budget {args.memory_budget} MB) into {work_dir}...")
+        with timed('column_store'):
+            store, stats, n_series = out_of_core.build_column_store(paths, work_dir, plan['chunk_rows'],
+                                                                    args.series_key)
+        print(f"Rows (with Capacity): {store.rows:,}, {args.series_key} series: {n_series:,}")
+        fleet_stats = {**stats.average_frames(), 'capacity_stats': stats.capacity_stats()}
+
+        print("\n" + "="*80)
+        print(f"TRAINING BASE (new plants) AND ENHANCED (existing plants) MODELS OUT OF CORE "
+              f"({TRAIN_NUM_THREADS} threads, one model at a time)")
+        print("="*80)
+        splits, fits = {}, []
+        for name, features in [('base', BASE_FEATURES), ('enhanced', ENHANCED_FEATURES)]:
+            with timed(f'fit_{name}'):
+                splits[name] = out_of_core.write_datasets(store, stats, name, features, work_dir, plan)
+                fits.append(out_of_core.fit_model(store, stats, splits[name], params, plan, args.rounds))
+        quantiles = ([], None)
+        if not args.no_quantiles:
+            # the quantile models train on the base model's binned Datasets
+            with timed('fit_quantiles'):
+                quantiles = out_of_core.fit_quantile_models(store, stats, splits['base'], params, plan,
+                                                            num_boost_round=args.rounds)
+    return fleet_stats, {'base': params, 'enhanced': params}, None, (*fits, quantiles)
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the base and enhanced PLF models")
+    parser.add_argument('--tune', action='store_true',
+                        help="search LightGBM params with rolling-origin CV before the final fit")
+    parser.add_argument('--trials', type=int, default=20)
+    parser.add_argument('--folds', type=int, default=4)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-quantiles', action='store_true',
+                        help="skip the P10/P50/P90 quantile models used for PLF intervals")
+    parser.add_argument('--rounds', type=int, default=500, help="maximum boosting rounds per model")
+    parser.add_argument('--out-of-core', action='store_true',
+                        help="stream TRAIN_DATA (a CSV, a directory of CSV partitions or a glob) in chunks "
+                             "instead of loading it into memory")
+    parser.add_argument('--memory-budget', type=int, default=TRAIN_MEMORY_BUDGET_MB,
+                        help="MB for the out-of-core chunk and feature-batch buffers")
+    parser.add_argument('--series-key', default='plant_key',
+                        help="column identifying a PLF series for the lag features, e.g. a unit id (out-of-core)")
+    args = parser.parse_args()
+    if args.tune and args.out_of_core:
+        parser.error("--tune needs the in-memory frame; tune on a sample, then train with --out-of-core")
+
+    print("="*80)
+    print("GENERALIZED PLF PREDICTION MODEL")
+    print("="*80)
+
+    fleet_stats, model_params, tuning, fits = (train_out_of_core if args.out_of_core else train_in_memory)(args)
+    base_model, base_metrics, base_residuals, base_shape, base_train, base_test = fits[0]
+    enhanced_model, enhanced_metrics, enhanced_residuals, enh_shape, enh_train, enh_test = fits[1]
+    quantile_models, quantile_metrics = fits[2]
+    tech_month_avg = fleet_stats['tech_month_avg']
+    band_month_avg = fleet_stats['band_month_avg']
+
+    rmse_base, rmse_enh = base_metrics['rmse'], enhanced_metrics['rmse']
+
+    for label, shape, n_train, n_test, model, metrics in [
+        ('BASE', base_shape, base_train, base_test, base_model, base_metrics),
+        ('ENHANCED', enh_shape, enh_train, enh_test, enhanced_model, enhanced_metrics),
+    ]:
+        print(f"\n[{label} MODEL RESULTS]")
+        print(f"Training data: {shape}, Train: {n_train}, Test: {n_test}, Best iteration: {model.best_iteration}")
+        print(f"RMSE: {metrics['rmse']:.4f} ({metrics['rmse']*100:.2f}% error)")
+        print(f"MAE: {metrics['mae']:.4f}")
+        print(f"R²: {metrics['r2']:.4f}")
+
+    if quantile_metrics:
+        print(f"\n[QUANTILE MODELS (base features, alpha {', '.join(map(str, QUANTILE_ALPHAS))})]")
+        print(f"Best iterations: {quantile_metrics['best_iterations']}")
+        print(f"P{round(QUANTILE_ALPHAS[0]*100)}-P{round(QUANTILE_ALPHAS[-1]*100)} coverage: "
+              f"{quantile_metrics['coverage']:.3f} (nominal {quantile_metrics['nominal_coverage']:.2f}), "
+              f"below {quantile_metrics['below_lower']:.3f}, above {quantile_metrics['above_upper']:.3f}")
+        print(f"Mean width: {quantile_metrics['mean_width']*100:.2f} PLF points, "
+              f"crossing rate: {quantile_metrics['crossing_rate']:.3f}")
+        for alpha, loss in quantile_metrics['pinball_loss'].items():
+            print(f"  alpha {alpha}: pinball {loss:.4f}, observed below {quantile_metrics['observed_below'][alpha]:.3f}")
+
+    print("\n" + "="*80)
+    print("SAVING MODELS")
+    print("="*80)
+
+    with timed('save'):
+        base_model.save_model('plf_base_model.txt')
+        enhanced_model.save_model('plf_enhanced_model.txt')
+        for model, path in zip(quantile_models, QUANTILE_MODEL_FILES.values()):
+            model.save_model(path)
+        if not quantile_models:
+            # stale quantile files would otherwise be served next to the new point models
+            for path in QUANTILE_MODEL_FILES.values():
+                if os.path.exists(path):
+                    os.remove(path)
+
+        metadata = {
+            'base_features': BASE_FEATURES,
+            'enhanced_features': ENHANCED_FEATURES,
+            'base_metrics': base_metrics,
+            'enhanced_metrics': enhanced_metrics,
+            'base_params': model_params['base'],
+            'enhanced_params': model_params['enhanced'],
+            'base_residuals': base_residuals.tolist(),
+            'enhanced_residuals': enhanced_residuals.tolist(),
+            'tech_month_avg': tech_month_avg.to_dict('records'),
+            'band_month_avg': band_month_avg.to_dict('records'),
+            'capacity_stats': fleet_stats['capacity_stats'],
+            'tech_map': TECH_MAP,
+            'band_map': BAND_MAP,
+        }
+        if tuning:
+            metadata['tuning'] = tuning
+        if quantile_metrics:
+            metadata['quantile_alphas'] = list(QUANTILE_ALPHAS)
+            metadata['quantile_metrics'] = quantile_metrics
+
+        with open('generalized_model_metadata.pkl', 'wb') as f:
+            pickle.dump(metadata, f)
+
+    print("✓ Saved: plf_base_model.txt")
+    print("✓ Saved: plf_enhanced_model.txt")
+    for path in QUANTILE_MODEL_FILES.values() if quantile_models else []:
+        print(f"✓ Saved: {path}")
+    print("✓ Saved: generalized_model_metadata.pkl")
+
+    if os.getenv("MODEL_REGISTRY_DIR", "model_registry"):
+        with timed('publish'):
+            registry = ModelRegistry(os.getenv("MODEL_REGISTRY_DIR", "model_registry"))
+            version = registry.publish('.', metrics={
+                'base': base_metrics, 'enhanced': enhanced_metrics, 'quantiles': quantile_metrics,
+                'stage_seconds': stage_seconds, 'tuning': tuning,
+            }, extra_files=[LEADERBOARD_FILE] if tuning else [])
+        print(f"✓ Published model version {version} to {registry.root}")
+
+    print("\n" + "="*80)
+    print("[SUCCESS] Models ready for forecasting!")
+    print("="*80)
+    print(f"\nBase Model (new plants): RMSE = {rmse_base:.4f}")
+    print(f"Enhanced Model (existing plants): RMSE = {rmse_enh:.4f}")
+
+    shared = " (fit_base, fit_enhanced and fit_quantiles share two workers inside fit)" if 'fit' in stage_seconds else ""
+    print(f"\nStage timings{shared}:")
+    for stage, seconds in stage_seconds.items():
+        print(f"  {stage:<16}{seconds:8.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+# LightGBM's kZeroThreshold is the float 1e-35f; inputs no larger in magnitude are read as zero
+ZERO_THRESHOLD = float(np.float32(1e-35))
+MISSING_NONE, MISSING_ZERO, MISSING_NAN = 0, 1, 2
+MAX_LEAVES = 63
+CHUNK_ELEMENTS = 2_000_000
+ARRAY_FIELDS = [
+    'split_feature', 'threshold', 'right_mask', 'default_left', 'missing_type', 'tree_starts', 'leaf_value',
+]
+
+
+def _parse_trees(model_text):
+    header = {}
+    trees = []
+    current = None
+    for line in model_text.splitlines():
+        line = line.strip()
+        if line == 'end of trees':
+            break
+        if line.startswith('Tree='):
+            current = {}
+            trees.append(current)
+            continue
+        if '=' not in line:
+            continue
+        key, value = line.split('=', 1)
+        if current is None:
+            header[key] = value
+        else:
+            current[key] = value
+    return header, trees
+
+
+def _in_order_leaves(left, right):
+    order = []
+    left_ranges = {}
+    stack = [(0, False)]
+    while stack:
+        node, visited = stack.pop()
+        if node < 0:
+            order.append(~node)
+        elif visited:
+            left_ranges[node] = (left_ranges[node], len(order))
+            stack.append((right[node], False))
+        else:
+            left_ranges[node] = len(order)
+            stack.append((node, True))
+            stack.append((left[node], False))
+    return order, left_ranges
+
+
+class CompiledEnsemble:
+    """Flat-array evaluator for LightGBM regression models saved as text.
+
+    Each tree's leaves are laid out left to right and every split stores the
+    bitmask of leaves that stay reachable when the row goes right. A row's exit
+    leaf is the lowest bit left after AND-ing the masks of all right-going
+    splits, so a whole batch is scored with a handful of array operations.
+    """
+
+    def __init__(self, model_text):
+        header, trees = _parse_trees(model_text)
+        if header.get('num_class', '1') != '1':
+            raise ValueError("Only single-output models are supported")
+        if header.get('objective', '').split()[0] not in ('regression', 'quantile'):
+            raise ValueError(f"Unsupported objective: {header.get('objective')}")
+        if 'average_output' in header:
+            raise ValueError("Random forest (average_output) models are not supported")
+
+        self.feature_names = header['feature_names'].split()
+        self.num_trees = len(trees)
+
+        features, thresholds, masks, default_left, missing_type = [], [], [], [], []
+        leaf_values, tree_starts = [], []
+        self.constant = 0.0
+        node_offset = 0
+        for tree in trees:
+            if tree.get('is_linear', '0') != '0':
+                raise ValueError("Linear trees are not supported")
+            if tree.get('num_cat', '0') != '0':
+                raise ValueError("Categorical splits are not supported")
+
+            num_leaves = int(tree['num_leaves'])
+            values = np.array(tree['leaf_value'].split(), dtype=np.float64)
+            if num_leaves == 1:
+                self.constant += values[0]
+                continue
+            if num_leaves > MAX_LEAVES:
+                raise ValueError(f"Trees with more than {MAX_LEAVES} leaves are not supported")
+
+            left = np.array(tree['left_child'].split(), dtype=np.int64)
+            right = np.array(tree['right_child'].split(), dtype=np.int64)
+            decision = np.array(tree['decision_type'].split(), dtype=np.int64)
+            order, left_ranges = _in_order_leaves(left, right)
+
+            all_leaves = (1 << num_leaves) - 1
+            masks.append(np.array([
+                all_leaves & ~((1 << end) - (1 << start))
+                for start, end in (left_ranges[node] for node in range(num_leaves - 1))
+            ], dtype=np.int64))
+            features.append(np.array(tree['split_feature'].split(), dtype=np.int64))
+            thresholds.append(np.array(tree['threshold'].split(), dtype=np.float64))
+            default_left.append((decision & 2) > 0)
+            missing_type.append((decision >> 2) & 3)
+
+            padded = np.zeros(MAX_LEAVES + 1)
+            padded[:num_leaves] = values[order]
+            leaf_values.append(padded)
+            tree_starts.append(node_offset)
+            node_offset += num_leaves - 1
+
+        self.split_feature = np.concatenate(features) if features else np.empty(0, dtype=np.int64)
+        self.threshold = np.concatenate(thresholds) if thresholds else np.empty(0)
+        self.right_mask = np.concatenate(masks) if masks else np.empty(0, dtype=np.int64)
+        self.default_left = np.concatenate(default_left) if default_left else np.empty(0, dtype=bool)
+        self.missing_type = np.concatenate(missing_type) if missing_type else np.empty(0, dtype=np.int64)
+        self.tree_starts = np.array(tree_starts, dtype=np.intp)
+        self.leaf_value = np.array(leaf_values).reshape(len(tree_starts), MAX_LEAVES + 1)
+        self.output_bounds = None
+        self._finalize()
+
+    @classmethod
+    def from_model_file(cls, path):
+        with open(path, 'r') as f:
+            return cls(f.read())
+
+    def save(self, directory):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for field in ARRAY_FIELDS:
+            np.save(directory / f'{field}.npy', getattr(self, field))
+        with open(directory / 'ensemble.json', 'w') as f:
+            json.dump({
+                'feature_names': self.feature_names,
+                'num_trees': self.num_trees,
+                'constant': self.constant,
+            }, f)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        directory = Path(directory)
+        ensemble = cls.__new__(cls)
+        with open(directory / 'ensemble.json', 'r') as f:
+            info = json.load(f)
+        ensemble.feature_names = info['feature_names']
+        ensemble.num_trees = info['num_trees']
+        ensemble.constant = info['constant']
+        for field in ARRAY_FIELDS:
+            setattr(ensemble, field, np.load(directory / f'{field}.npy', mmap_mode=mmap_mode))
+        ensemble.output_bounds = None
+        ensemble._finalize()
+        return ensemble
+
+    def _goes_right(self, X):
+        fval = X[:, self.split_feature]
+        if not self.has_zero_missing and not np.isnan(fval).any():
+            return fval > self.threshold
+
+        is_nan = np.isnan(fval)
+        fval = np.where(is_nan & (self.missing_type != MISSING_NAN), 0.0, fval)
+        use_default = ((self.missing_type == MISSING_ZERO) & (np.abs(fval) <= ZERO_THRESHOLD)) | \
+                      ((self.missing_type == MISSING_NAN) & is_nan)
+        return np.where(use_default, ~self.default_left, fval > self.threshold)
+
+    @classmethod
+    def stack(cls, ensembles):
+        """One ensemble holding every tree of ``ensembles`` (same features), scored in a single
+        pass; ``predict`` then returns one column per input ensemble."""
+        if len({tuple(e.feature_names) for e in ensembles}) != 1:
+            raise ValueError("Stacked ensembles must share the same features")
+        stacked = cls.__new__(cls)
+        stacked.feature_names = list(ensembles[0].feature_names)
+        stacked.num_trees = sum(e.num_trees for e in ensembles)
+        stacked.constant = np.array([e.constant for e in ensembles])
+        for field in ARRAY_FIELDS:
+            if field != 'tree_starts':
+                setattr(stacked, field, np.concatenate([np.asarray(getattr(e, field)) for e in ensembles]))
+        node_offsets = np.cumsum([0] + [len(e.split_feature) for e in ensembles])
+        stacked.tree_starts = np.concatenate([
+            np.asarray(e.tree_starts) + offset for e, offset in zip(ensembles, node_offsets)
+        ]).astype(np.intp)
+        stacked.output_bounds = np.cumsum([0] + [len(e.tree_starts) for e in ensembles])
+        stacked._finalize()
+        return stacked
+
+    def _finalize(self):
+        self.tree_index = np.arange(len(self.tree_starts))[np.newaxis, :]
+        self.has_zero_missing = bool((self.missing_type == MISSING_ZERO).any())
+
+    def predict(self, X):
+        if hasattr(X, 'to_numpy'):
+            X = X.to_numpy()
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+        X = np.where(np.abs(X) <= ZERO_THRESHOLD, 0.0, X)
+
+        out = np.empty((X.shape[0],) + np.shape(self.constant))
+        out[:] = self.constant
+        if len(self.tree_starts) == 0:
+            return out
+
+        step = max(1, CHUNK_ELEMENTS // len(self.split_feature))
+        for start in range(0, X.shape[0], step):
+            goes_right = self._goes_right(X[start:start + step])
+            reachable = np.bitwise_and.reduceat(
+                np.where(goes_right, self.right_mask, -1), self.tree_starts, axis=1
+            )
+            exit_leaf = np.log2((reachable & -reachable).astype(np.float64)).astype(np.intp)
+            values = self.leaf_value[self.tree_index, exit_leaf]
+            if self.output_bounds is None:
+                out[start:start + step] += values.sum(axis=1)
+            else:
+                for k, (lo, hi) in enumerate(zip(self.output_bounds[:-1], self.output_bounds[1:])):
+                    out[start:start + step, k] += values[:, lo:hi].sum(axis=1)
+        return out
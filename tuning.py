@@ -0,0 +1,158 @@
+import multiprocessing
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+
+from tree_engine import MAX_LEAVES
+
+DATASET_PARAMS = {'feature_pre_filter': False, 'verbose': -1}
+
+# (kind, low, high); num_leaves is capped so tuned models stay loadable by tree_engine
+SEARCH_SPACE = {
+    'num_leaves': ('int_log', 7, MAX_LEAVES),
+    'learning_rate': ('log', 0.01, 0.2),
+    'min_data_in_leaf': ('int_log', 5, 200),
+    'feature_fraction': ('uniform', 0.6, 1.0),
+    'bagging_fraction': ('uniform', 0.6, 1.0),
+    'lambda_l2': ('log', 1e-3, 10.0),
+}
+
+_datasets = {}
+_folds = {}
+
+
+def sample_params(rng, base_params, n_trials):
+    configs = [dict(base_params)]
+    for _ in range(n_trials - 1):
+        params = dict(base_params)
+        for name, (kind, low, high) in SEARCH_SPACE.items():
+            if kind == 'uniform':
+                params[name] = float(rng.uniform(low, high))
+            else:
+                value = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+                params[name] = int(round(value)) if kind == 'int_log' else value
+        params['bagging_freq'] = 1
+        configs.append(params)
+    return configs
+
+
+def rolling_origin_folds(dates, n_folds=4, min_train_fraction=0.5):
+    """Expanding-window folds: each fold trains on every period before its block and validates on the block."""
+    periods = np.unique(dates)
+    start = int(len(periods) * min_train_fraction)
+    if start < 1 or len(periods) - start < n_folds:
+        raise ValueError(f"{len(periods)} periods are too few for {n_folds} rolling-origin folds")
+
+    edges = np.linspace(start, len(periods), n_folds + 1).astype(int)
+    return [
+        (np.flatnonzero(dates < periods[lo]),
+         np.flatnonzero((dates >= periods[lo]) & (dates <= periods[hi - 1])))
+        for lo, hi in zip(edges[:-1], edges[1:])
+    ]
+
+
+def _shared_inputs(dataset_path, folds_path):
+    if dataset_path not in _datasets:
+        _datasets[dataset_path] = lgb.Dataset(dataset_path, params=DATASET_PARAMS).construct()
+    if folds_path not in _folds:
+        with np.load(folds_path) as f:
+            _folds[folds_path] = [(f[f'train_{k}'], f[f'valid_{k}']) for k in range(len(f.files) // 2)]
+    return _datasets[dataset_path], _folds[folds_path]
+
+
+def evaluate_config(dataset_path, folds_path, params, num_boost_round):
+    """Score one config on every fold, reusing the pre-binned Dataset through ``subset``."""
+    dataset, folds = _shared_inputs(dataset_path, folds_path)
+    results = []
+    for train_idx, valid_idx in folds:
+        evals = {}
+        model = lgb.train(
+            {**params, 'metric': ['rmse', 'l1'], 'verbose': -1},
+            dataset.subset(train_idx),
+            num_boost_round=num_boost_round,
+            valid_sets=[dataset.subset(valid_idx)],
+            valid_names=['valid'],
+            callbacks=[lgb.early_stopping(50, first_metric_only=True, verbose=False), lgb.record_evaluation(evals)],
+        )
+        best = model.best_iteration or num_boost_round
+        results.append({
+            'rmse': evals['valid']['rmse'][best - 1],
+            'mae': evals['valid']['l1'][best - 1],
+            'best_iteration': best,
+        })
+    return results
+
+
+def successive_halving(pool, dataset_path, folds_path, configs, min_rounds, max_rounds, eta=3):
+    survivors = list(range(len(configs)))
+    scores = {}
+    rows = []
+    rounds, rung = min_rounds, 0
+    while True:
+        futures = {
+            trial: pool.submit(evaluate_config, dataset_path, folds_path, configs[trial], rounds)
+            for trial in survivors
+        }
+        for trial, future in futures.items():
+            fold_results = future.result()
+            scores[trial] = float(np.mean([r['rmse'] for r in fold_results]))
+            rows += [
+                {'trial': trial, 'rung': rung, 'num_boost_round': rounds, 'fold': fold, **result}
+                for fold, result in enumerate(fold_results)
+            ]
+        if len(survivors) == 1 or rounds >= max_rounds:
+            break
+        survivors = sorted(survivors, key=scores.get)[:max(1, len(survivors) // eta)]
+        rounds, rung = min(rounds * eta, max_rounds), rung + 1
+    return min(survivors, key=scores.get), pd.DataFrame(rows)
+
+
+def tune_models(df, feature_sets, base_params, n_trials=20, n_folds=4, workers=None,
+                min_rounds=50, max_rounds=500, seed=0):
+    """Random search with successive halving and rolling-origin CV for each named feature set.
+
+    Returns the chosen params per model and a leaderboard with one row per
+    (model, trial, rung, fold).
+    """
+    rng = np.random.default_rng(seed)
+    chosen = {}
+    leaderboards = []
+    with tempfile.TemporaryDirectory(prefix='plf_tuning_') as tmp_dir, ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context('spawn')
+    ) as pool:
+        for name, features in feature_sets.items():
+            start = time.perf_counter()
+            data = df[features + ['PLF', 'date']].dropna()
+            dataset_path = str(Path(tmp_dir) / f'{name}.bin')
+            folds_path = str(Path(tmp_dir) / f'{name}_folds.npz')
+            lgb.Dataset(data[features], label=data['PLF'], params=DATASET_PARAMS).save_binary(dataset_path)
+
+            folds = rolling_origin_folds(data['date'].to_numpy(), n_folds)
+            np.savez(folds_path, **{f'{kind}_{k}': idx for k, fold in enumerate(folds)
+                                    for kind, idx in zip(('train', 'valid'), fold)})
+
+            configs = sample_params(rng, base_params, n_trials)
+            best, leaderboard = successive_halving(pool, dataset_path, folds_path, configs, min_rounds, max_rounds)
+
+            params = pd.DataFrame(configs)[list(SEARCH_SPACE)]
+            leaderboard = leaderboard.join(params, on='trial')
+            leaderboard.insert(0, 'model', name)
+            leaderboards.append(leaderboard)
+
+            final = leaderboard[(leaderboard['trial'] == best) & (leaderboard['rung'] == leaderboard['rung'].max())]
+            chosen[name] = {
+                'params': configs[best],
+                'trial': best,
+                'cv_rmse': float(final['rmse'].mean()),
+                'cv_mae': float(final['mae'].mean()),
+                'num_boost_round': int(final['best_iteration'].max()),
+                'folds': n_folds,
+                'trials': n_trials,
+                'seconds': time.perf_counter() - start,
+            }
+    return chosen, pd.concat(leaderboards, ignore_index=True)
@@ -0,0 +1,136 @@
+from statistics import NormalDist
+
+import numpy as np
+
+# Ministry of Coal non-coking grades: G2 is 6701-7000 kcal/kg and each grade below
+# drops by 300; G1 (above 7000) is given the same width.
+COAL_GRADE_GCV_BANDS = {'G1': (7001, 7300)}
+COAL_GRADE_GCV_BANDS.update({f'G{k}': (7000 - 300 * (k - 1) + 1, 7000 - 300 * (k - 2)) for k in range(2, 18)})
+GCV_BAND_WIDTH = 300
+
+SHR_RELATIVE_SD = 0.03
+AUX_SD = 0.005
+QUANTILES = (0.1, 0.5, 0.9)
+CHUNK_ELEMENTS = 2_000_000
+
+
+def gcv_bounds(coal_grade, gcv):
+    """Triangular GCV range per row: the grade band, or a band-wide window centred on ``gcv``
+    when the grade is unknown or the estimate falls outside its band."""
+    gcv = np.asarray(gcv, dtype=float)
+    bands = np.array([COAL_GRADE_GCV_BANDS.get(g, (np.nan, np.nan)) for g in coal_grade], dtype=float)
+    low, high = bands[:, 0], bands[:, 1]
+    outside = np.isnan(low) | (gcv < low) | (gcv > high)
+    low = np.where(outside, gcv - GCV_BAND_WIDTH / 2, low)
+    high = np.where(outside, gcv + GCV_BAND_WIDTH / 2, high)
+    return low, high
+
+
+class ResidualDistribution:
+    """PLF errors: the stored test residuals when available, otherwise N(0, rmse)."""
+
+    def __init__(self, residuals=None, rmse=None):
+        self.residuals = np.asarray(residuals, dtype=np.float32) if residuals is not None and len(residuals) else None
+        self.rmse = rmse or 0.0
+
+    def draw(self, rng, shape):
+        if self.residuals is not None:
+            return self.residuals[rng.integers(0, len(self.residuals), shape)]
+        return rng.standard_normal(shape, dtype=np.float32) * np.float32(self.rmse)
+
+    def quantiles(self, quantiles):
+        if self.residuals is not None:
+            return np.quantile(self.residuals, quantiles)
+        return np.array([NormalDist(0.0, self.rmse).inv_cdf(q) if self.rmse else 0.0 for q in quantiles])
+
+
+def _triangular(rng, low, mode, high, out):
+    """Inverse-CDF triangular draws written into ``out`` (rows x samples, float32)."""
+    u = rng.random(out.shape, dtype=np.float32)
+    width = high - low
+    left = np.sqrt(u * (width * (mode - low)))
+    np.subtract(1, u, out=out)
+    out *= width * (high - mode)
+    np.sqrt(out, out=out)
+    np.subtract(high, out, out=out)
+    np.add(low, left, out=left)
+    return np.copyto(out, left, where=u < (mode - low) / width)
+
+
+def sample_coal(rng, n_samples, plf, full_load_kwh, heat_rate, gcv, gcv_low, gcv_high, aux, residuals):
+    """(rows, n_samples) float32 draws of coal tonnes for one block of plant-months.
+
+    Works in place on two buffers; coal = load * PLF * SHR / (GCV * (1 - aux)).
+    """
+    shape = (len(plf), n_samples)
+    column = lambda values: values.astype(np.float32)[:, None]
+
+    draws = residuals.draw(rng, shape)
+    draws += column(plf)
+    np.clip(draws, 0.0, 1.0, out=draws)
+
+    noise = rng.standard_normal(shape, dtype=np.float32)
+    noise *= np.float32(SHR_RELATIVE_SD)
+    noise += 1
+    draws *= noise
+
+    rng.standard_normal(dtype=np.float32, out=noise)
+    noise *= np.float32(AUX_SD)
+    noise += column(aux)
+    np.clip(noise, 0.0, 0.3, out=noise)
+    np.subtract(1, noise, out=noise)
+    draws /= noise
+
+    _triangular(rng, column(gcv_low), column(gcv), column(gcv_high), out=noise)
+    draws /= noise
+    draws *= column(full_load_kwh / 1000 * heat_rate)
+    return draws
+
+
+def coal_quantiles(plf, full_load_kwh, heat_rate, gcv, coal_grade, aux_consumption, residuals,
+                   n_samples=20000, rng=None, quantiles=QUANTILES):
+    """P10/P50/P90 (by default) of PLF and coal tonnes for each row.
+
+    PLF quantiles follow directly from the residual distribution. Coal
+    quantiles come from joint draws of PLF, GCV, SHR and auxiliary
+    consumption, simulated in blocks of about ``CHUNK_ELEMENTS`` draws so
+    memory stays bounded however many plant-months are passed in.
+    """
+    rng = rng if rng is not None else np.random.default_rng(0)
+    plf = np.asarray(plf, dtype=float)
+    full_load_kwh = np.asarray(full_load_kwh, dtype=float)
+    heat_rate = np.asarray(heat_rate, dtype=float)
+    gcv = np.asarray(gcv, dtype=float)
+    aux = np.asarray(aux_consumption, dtype=float)
+    aux = np.where(aux > 1, aux / 100, aux)
+    gcv_low, gcv_high = gcv_bounds(coal_grade, gcv)
+
+    coal = np.empty((len(plf), len(quantiles)))
+    ranks = np.round(np.asarray(quantiles) * (n_samples - 1)).astype(int)
+    step = max(1, CHUNK_ELEMENTS // n_samples)
+    for start in range(0, len(plf), step):
+        block = slice(start, start + step)
+        draws = sample_coal(
+            rng, n_samples, plf[block], full_load_kwh[block], heat_rate[block],
+            gcv[block], gcv_low[block], gcv_high[block], aux[block], residuals,
+        )
+        coal[block] = np.partition(draws, ranks, axis=1)[:, ranks]
+    return {
+        'plf': np.clip(plf[:, None] + residuals.quantiles(quantiles)[None, :], 0.0, 1.0),
+        'coal_required_tonnes': coal,
+    }
+
+
+def iter_plant_quantiles(plant_keys, plf, full_load_kwh, heat_rate, gcv, coal_grade, aux_consumption,
+                         residuals, n_samples=20000, seed=0, quantiles=QUANTILES):
+    """Yield ``(plant_key, row_indices, quantiles)`` one plant at a time."""
+    rng = np.random.default_rng(seed)
+    plant_keys = np.asarray(plant_keys, dtype=object)
+    columns = [np.asarray(c) for c in (plf, full_load_kwh, heat_rate, gcv, coal_grade, aux_consumption)]
+    order = np.argsort(plant_keys, kind='stable')
+    boundaries = np.flatnonzero(plant_keys[order][1:] != plant_keys[order][:-1]) + 1
+    for rows in np.split(order, boundaries):
+        if len(rows) == 0:
+            continue
+        result = coal_quantiles(*(c[rows] for c in columns), residuals, n_samples, rng, quantiles)
+        yield plant_keys[rows[0]], rows, result